@@ -0,0 +1,61 @@
+"""
+Measures lookup throughput (lookups/sec) and memory of the Bloom filter variants.
+
+Every filter holds the same interest list and answers the same mix of
+member and non-member lookups through contains_many, which is how task_4
+queries them; the observed false-positive rate is reported alongside.
+
+    python scripts/bench_bloom.py --items 100000 --lookups 200000
+"""
+
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from src.bloom import FILTERS, MappedBloomFilter, build  # noqa: E402
+
+
+def measure(name: str, bloom, members: list[str], others: list[str]) -> None:
+    queries = members + others
+    start = time.perf_counter()
+    found = bloom.contains_many(queries)
+    elapsed = time.perf_counter() - start
+    false_positives = sum(found[len(members):]) / len(others)
+    print(
+        f"{name:<12} {len(queries) / elapsed:>14,.0f} lookups/s  "
+        f"{bloom.nbytes / 1024:>10,.1f} KiB  fpr={false_positives:.4%}"
+    )
+
+
+def main(items: int, lookups: int, error_rate: float) -> None:
+    interests = [f"interest {i}" for i in range(items)]
+    members = interests[: lookups // 2]
+    others = [f"message {i}" for i in range(lookups - len(members))]
+
+    for name, kind in FILTERS.items():
+        # The scalable filter starts small and grows to hold the whole list
+        bloom = kind(items // 16 if name == "scalable" else items, error_rate)
+        for item in interests:
+            bloom.add(item)
+        measure(name, bloom, members, others)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "interests.bloom"
+        build(interests, path, items, error_rate)
+        with MappedBloomFilter(path) as bloom:
+            measure("mapped", bloom, members, others)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", default=100000, type=int, help="Items in the interest list")
+    parser.add_argument("--lookups", default=200000, type=int, help="Lookups, half of them members")
+    parser.add_argument("--error-rate", default=0.001, type=float, help="Target false-positive rate")
+    args = parser.parse_args()
+
+    main(args.items, args.lookups, args.error_rate)
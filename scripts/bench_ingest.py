@@ -0,0 +1,92 @@
+"""
+Measures decoding throughput (events/sec) of the compute loops.
+
+Compares the original loop (json.load per file, one process) against
+src.ingest.ParallelDecoder with an increasing number of workers.
+
+    python scripts/bench_ingest.py --num-files 64 --events-per-batch 20000
+"""
+
+import json
+import pathlib
+import random
+import sys
+import tempfile
+import time
+from typing import Callable
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from src.ingest import ParallelDecoder  # noqa: E402
+
+
+def write_files(directory: pathlib.Path, num_files: int, events_per_batch: int) -> list[pathlib.Path]:
+    random.seed(a=42)
+    statuses = [200, 201, 202, 203, 400, 401, 402, 403, 404, 500]
+    services = ["training", "evaluation", "inference", "monitoring"]
+    paths = []
+    for i in range(num_files):
+        batch = [
+            {
+                "service": random.choice(services),
+                "timestamp": 1760559686.0 + random.random() * 3600,
+                "message": f"HTTP Status Code: {random.choice(statuses)}",
+            }
+            for _ in range(events_per_batch)
+        ]
+        path = directory / f"batch_{i:06d}.json"
+        path.write_text(json.dumps(batch))
+        paths.append(path)
+    return paths
+
+
+def json_load_loop(paths: list[pathlib.Path]) -> int:
+    total = 0
+    for path in paths:
+        with open(path, "r") as f:
+            log_events = json.load(f)
+        total += len(log_events)
+    return total
+
+
+def decoder_loop(workers: int, order: str) -> Callable[[list[pathlib.Path]], int]:
+    def run(paths: list[pathlib.Path]) -> int:
+        with ParallelDecoder(workers, order=order) as decoder:
+            return sum(len(batch) for batch in decoder.decode(paths))
+
+    return run
+
+
+def measure(name: str, method: Callable[[list[pathlib.Path]], int], paths: list[pathlib.Path]) -> None:
+    start = time.perf_counter()
+    events = method(paths)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {events / elapsed:>14,.0f} events/s  ({elapsed:.2f}s)")
+
+
+def main(num_files: int, events_per_batch: int, workers: list[int]) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_files(pathlib.Path(tmp), num_files, events_per_batch)
+        measure("json.load loop", json_load_loop, paths)
+        for count in workers:
+            measure(f"decoder workers={count}", decoder_loop(count, "file"), paths)
+        for count in workers:
+            measure(f"decoder workers={count} time", decoder_loop(count, "time"), paths)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-files", default=64, type=int, help="Number of batch files")
+    parser.add_argument("--events-per-batch", default=20000, type=int, help="Events in each file")
+    parser.add_argument(
+        "--workers",
+        default=[1, 2, 4, 8],
+        type=int,
+        nargs="+",
+        help="Worker counts to measure",
+    )
+    args = parser.parse_args()
+
+    main(args.num_files, args.events_per_batch, args.workers)
@@ -0,0 +1,90 @@
+"""
+Measures wall time and peak memory of the task_5 Polars analysis.
+
+Compares the original approach (three separate .collect() calls over the
+same lazy plan) against one pl.collect_all on the streaming engine. The
+headline inputs are NDJSON and the same events compacted to Parquet, which
+the streaming engine reads by blocks. JSON documents are measured last and
+labelled "eager": Polars decodes each one whole before the plan runs. Each
+run happens in a fresh process so that its peak RSS is its own.
+
+    python scripts/bench_task_5.py --num-files 32 --events-per-batch 100000
+"""
+
+import concurrent.futures
+import json
+import multiprocessing
+import pathlib
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+
+def write_files(directory: pathlib.Path, num_files: int, events_per_batch: int, suffix: str) -> None:
+    random.seed(a=42)
+    statuses = [200, 201, 202, 203, 400, 401, 402, 403, 404, 500]
+    services = ["training", "evaluation", "inference", "monitoring"]
+    for i in range(num_files):
+        batch = [
+            {
+                "service": random.choice(services),
+                "timestamp": 1760559686.0 + random.random() * 3600,
+                "message": f"HTTP Status Code: {random.choice(statuses)}",
+                "response_time_ms": random.expovariate(1 / 120),
+            }
+            for _ in range(events_per_batch)
+        ]
+        with open(directory / f"batch_{i:06d}{suffix}", "w") as file:
+            if suffix == ".json":
+                json.dump(batch, file)
+            else:
+                file.writelines(json.dumps(event) + "\n" for event in batch)
+
+
+def run(uri: str, single_pass: bool) -> tuple[float, float]:
+    from src.task_5.task_5 import analyze
+
+    report = analyze(uri, single_pass=single_pass)
+    return report.seconds, report.peak_memory_mb
+
+
+def measure(name: str, uri: str, single_pass: bool) -> None:
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+        seconds, peak = executor.submit(run, uri, single_pass).result()
+    print(f"{name:<28} {seconds:>8.2f}s  {peak:>10,.0f} MB peak")
+
+
+def main(num_files: int, events_per_batch: int) -> None:
+    from src.task_5.compaction import compact
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directories = {}
+        for suffix in (".ndjson", ".json"):
+            directory = directories[suffix] = pathlib.Path(tmp) / suffix.strip(".")
+            directory.mkdir()
+            write_files(directory, num_files, events_per_batch, suffix)
+        compacted = pathlib.Path(tmp) / "parquet"
+        compact(str(directories[".json"] / "*.json"), compacted)
+
+        inputs = [
+            (".ndjson", str(directories[".ndjson"] / "*.ndjson")),
+            (".parquet", str(compacted / "**" / "*.parquet")),
+            ("eager .json", str(directories[".json"] / "*.json")),
+        ]
+        for label, uri in inputs:
+            measure(f"{label} three collects", uri, single_pass=False)
+            measure(f"{label} collect_all", uri, single_pass=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-files", default=32, type=int, help="Number of batch files")
+    parser.add_argument("--events-per-batch", default=100000, type=int, help="Events in each file")
+    args = parser.parse_args()
+
+    main(args.num_files, args.events_per_batch)
@@ -0,0 +1,176 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List
+
+from src import status
+from src.domain import Events
+
+# Stored for events without response_time_ms; real response times are never negative
+NO_RESPONSE_TIME = -1.0
+
+@dataclass
+class EventBatch:
+    """
+    Events of one batch stored column by column in typed arrays.
+
+    Services and messages are interned per batch: `service_ids` and
+    `message_ids` index into the small `service_names` and `message_table`
+    lists, so a template such as "HTTP Status Code: 200" is stored once however
+    many events carry it, and anything derived from it (the status code, a
+    filter decision) is computed once per distinct value. `messages` and
+    `status_codes` are only materialized when asked for.
+
+    A missing timestamp is stored as 0.0, a missing service as "", a missing
+    response time as -1.0 and a message without status code gets status 0.
+    """
+
+    service_names: List[str] = field(default_factory=list)
+    service_ids: array = field(default_factory=lambda: array("I"))
+    timestamps: array = field(default_factory=lambda: array("d"))
+    message_table: List[str] = field(default_factory=list)
+    message_ids: array = field(default_factory=lambda: array("I"))
+    # response_time_ms of every event
+    response_times: array = field(default_factory=lambda: array("d"))
+    source: str = ""
+    error: str | None = None
+    # Byte offset the source has been consumed up to, for segments that grow
+    offset: int = 0
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getstate__(self) -> dict:
+        # Lookups and materialized columns are rebuilt on demand
+        return {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+
+    @classmethod
+    def from_events(cls, events: Iterable[Events], source: str = "") -> "EventBatch":
+        batch = cls(source=source)
+        batch.extend(events)
+        return batch
+
+    def service_id(self, service: str) -> int:
+        index = self._index("_service_index", self.service_names)
+        sid = index.get(service)
+        if sid is None:
+            sid = index[service] = len(self.service_names)
+            self.service_names.append(service)
+        return sid
+
+    def message_id(self, message: str) -> int:
+        index = self._index("_message_index", self.message_table)
+        mid = index.get(message)
+        if mid is None:
+            mid = index[message] = len(self.message_table)
+            self.message_table.append(message)
+        return mid
+
+    def append(self, service: str, timestamp: float, message: str, response_time: float = NO_RESPONSE_TIME) -> None:
+        self.service_ids.append(self.service_id(service))
+        self.timestamps.append(timestamp)
+        self.message_ids.append(self.message_id(message))
+        self.response_times.append(response_time)
+        self._invalidate()
+
+    def extend(self, events: Iterable[Events]) -> None:
+        """
+        Appends events. One with a field of the wrong type raises TypeError or
+        ValueError before any of its columns is touched, so the events
+        appended before it stay consistent.
+        """
+        names = self.service_names
+        table = self.message_table
+        service_index = self._index("_service_index", names)
+        message_index = self._index("_message_index", table)
+        add_service = self.service_ids.append
+        add_timestamp = self.timestamps.append
+        add_message = self.message_ids.append
+        add_response_time = self.response_times.append
+        try:
+            for event in events:
+                service = event.get("service") or ""
+                message = event.get("message") or ""
+                if not isinstance(service, str) or not isinstance(message, str):
+                    raise TypeError(f"Service and message must be strings: {event!r:.200}")
+                timestamp = float(event.get("timestamp") or 0.0)
+                response_time = event.get("response_time_ms")
+                response_time = NO_RESPONSE_TIME if response_time is None else float(response_time)
+                sid = service_index.get(service)
+                if sid is None:
+                    sid = service_index[service] = len(names)
+                    names.append(service)
+                mid = message_index.get(message)
+                if mid is None:
+                    mid = message_index[message] = len(table)
+                    table.append(message)
+                add_service(sid)
+                add_timestamp(timestamp)
+                add_message(mid)
+                add_response_time(response_time)
+        finally:
+            self._invalidate()
+
+    @property
+    def services(self) -> List[str]:
+        names = self.service_names
+        return [names[sid] for sid in self.service_ids]
+
+    @property
+    def messages(self) -> List[str]:
+        messages = self.__dict__.get("_messages")
+        if messages is None:
+            table = self.message_table
+            messages = self.__dict__["_messages"] = [table[mid] for mid in self.message_ids]
+        return messages
+
+    @property
+    def status_codes(self) -> array:
+        """HTTP status code of every event as uint16, 0 when there is none."""
+        codes = self.__dict__.get("_status_codes")
+        if codes is None:
+            codes = self.__dict__["_status_codes"] = status.extract(self.message_table, self.message_ids)
+        return codes
+
+    def events(self) -> Iterator[Events]:
+        """Materializes the rows as event dicts."""
+        names = self.service_names
+        table = self.message_table
+        for sid, timestamp, mid, response_time in zip(
+            self.service_ids, self.timestamps, self.message_ids, self.response_times
+        ):
+            event: Events = {"service": names[sid], "timestamp": timestamp, "message": table[mid]}
+            if response_time >= 0:
+                event["response_time_ms"] = response_time
+            yield event
+
+    def take(self, indices: Iterable[int]) -> "EventBatch":
+        """Returns the rows at `indices`, in that order, with the same tables."""
+        indices = list(indices)
+        service_ids = self.service_ids
+        timestamps = self.timestamps
+        message_ids = self.message_ids
+        response_times = self.response_times
+        return EventBatch(
+            service_names=list(self.service_names),
+            service_ids=array("I", [service_ids[i] for i in indices]),
+            timestamps=array("d", [timestamps[i] for i in indices]),
+            message_table=list(self.message_table),
+            message_ids=array("I", [message_ids[i] for i in indices]),
+            response_times=array("d", [response_times[i] for i in indices]),
+            source=self.source,
+            error=self.error,
+            offset=self.offset,
+        )
+
+    def sorted_by_time(self) -> "EventBatch":
+        return self.take(sorted(range(len(self)), key=self.timestamps.__getitem__))
+
+    def _index(self, name: str, table: List[str]) -> Dict[str, int]:
+        index = self.__dict__.get(name)
+        if index is None:
+            index = self.__dict__[name] = {value: i for i, value in enumerate(table)}
+        return index
+
+    def _invalidate(self) -> None:
+        self.__dict__.pop("_messages", None)
+        self.__dict__.pop("_status_codes", None)
@@ -0,0 +1,396 @@
+"""
+Bloom filters over the messages of interest.
+
+Items are hashed with blake2b from hashlib: the standard library has no fast
+non-cryptographic hash (xxhash, murmur) and those are not dependencies here,
+so hashing is most of the cost of a lookup. Batches are therefore looked up
+through `contains_many`, which hashes the whole message table of a batch in
+one pass and derives every index from those two hashes.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import pathlib
+import struct
+from typing import Iterable, Iterator, List, Set, Tuple
+
+from bitarray import bitarray
+
+from src.checkpoint import _fsync_directory
+from src.reader import open_text
+
+# False-positive rate filters are sized for by default
+DEFAULT_ERROR_RATE = 0.001
+
+_MAGIC = b"BLMF"
+_VERSION = 1
+# magic, format version, number of bits, number of hashes, items added;
+# padded so the bits start 8-byte aligned
+_HEADER = struct.Struct("<4sBxxxQII")
+
+
+def optimal_shape(capacity: int, error_rate: float = DEFAULT_ERROR_RATE) -> Tuple[int, int]:
+    """
+    Number of bits and of hash functions that hold `capacity` items at a
+    false-positive rate of `error_rate` in the least memory:
+    m = -n ln p / (ln 2)^2 and k = (m / n) ln 2.
+    """
+    if not 0 < error_rate < 1:
+        raise ValueError("error_rate must be in (0, 1)")
+    capacity = max(capacity, 1)
+    size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    hash_count = max(1, round(size / capacity * math.log(2)))
+    return size, hash_count
+
+
+def _base_hashes(item: str) -> Tuple[int, int]:
+    """The two 64-bit halves of a single 128-bit hash of the item."""
+    digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+    # An odd h2 is never 0, so the k indexes never collapse into one
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+def _base_hashes_many(items: Iterable[str]) -> List[Tuple[int, int]]:
+    """_base_hashes of every item, in one pass over the batch."""
+    blake2b = hashlib.blake2b
+    from_bytes = int.from_bytes
+    hashes = []
+    for item in items:
+        value = from_bytes(blake2b(item.encode("utf-8"), digest_size=16).digest(), "little")
+        hashes.append((value & 0xFFFFFFFFFFFFFFFF, (value >> 64) | 1))
+    return hashes
+
+
+def _lookup_many(slots, size: int, hash_count: int, hashes: Iterable[Tuple[int, int]]) -> List[bool]:
+    """
+    Whether all k slots of each hash pair are set. The indexes h1 + i * h2 are
+    walked by adding h2 mod size, which avoids a big-integer product per index.
+    """
+    found = []
+    for h1, h2 in hashes:
+        index = h1 % size
+        step = h2 % size
+        for _ in range(hash_count):
+            if not slots[index]:
+                found.append(False)
+                break
+            index += step
+            if index >= size:
+                index -= size
+        else:
+            found.append(True)
+    return found
+
+
+class BloomFilter:
+    """
+    Bloom filter with double hashing (Kirsch & Mitzenmacher): the k indexes
+    are derived as h1 + i * h2 from one 128-bit hash instead of computing k
+    independent hashes, with no loss in false-positive rate.
+
+    Sized from the expected number of items (`capacity`) and the target
+    false-positive rate (`error_rate`); `size` and `hash_count` force a shape.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        size: int | None = None,
+        hash_count: int | None = None,
+    ):
+        optimal_size, optimal_hash_count = optimal_shape(capacity, error_rate)
+        self.size = size or optimal_size
+        self.hash_count = hash_count or optimal_hash_count
+        self.bit_array = bitarray(self.size)
+        self.bit_array.setall(False)
+
+    def _hashes(self, item: str) -> List[int]:
+        """The `hash_count` indexes of an item."""
+        h1, h2 = _base_hashes(item)
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        for index in self._hashes(item):
+            self.bit_array[index] = True
+
+    def __contains__(self, item: str):
+        bits = self.bit_array
+        h1, h2 = _base_hashes(item)
+        size = self.size
+        for i in range(self.hash_count):
+            if not bits[(h1 + i * h2) % size]:
+                return False
+        return True
+
+    def contains_many(self, items: Iterable[str]) -> List[bool]:
+        """Membership of a whole batch of items, e.g. the message table of a batch."""
+        return _lookup_many(self.bit_array, self.size, self.hash_count, _base_hashes_many(items))
+
+    @property
+    def nbytes(self) -> int:
+        return self.bit_array.nbytes
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows with its contents (Almeida et al., 2007).
+
+    Items go into the newest BloomFilter stage until it holds its capacity;
+    then a stage `growth` times larger is added whose error rate is
+    `tightening` times the previous one's. The stages' rates form a geometric
+    series, so the overall false-positive rate stays below `error_rate` however
+    many items are added, at the cost of one lookup per stage.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        growth: int = 2,
+        tightening: float = 0.5,
+    ):
+        if not 0 < tightening < 1:
+            raise ValueError("tightening must be in (0, 1)")
+        self.initial_capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.stages: List[BloomFilter] = []
+        self.capacities: List[int] = []
+        self.count = 0
+        self._stage_count = 0
+
+    def add(self, item: str):
+        if not self.stages or self._stage_count >= self.capacities[-1]:
+            self._grow()
+        self.stages[-1].add(item)
+        self._stage_count += 1
+        self.count += 1
+
+    def __contains__(self, item: str):
+        if not self.stages:
+            return False
+        h1, h2 = _base_hashes(item)
+        for stage in self.stages:
+            bits = stage.bit_array
+            size = stage.size
+            if all(bits[(h1 + i * h2) % size] for i in range(stage.hash_count)):
+                return True
+        return False
+
+    def contains_many(self, items: Iterable[str]) -> List[bool]:
+        hashes = _base_hashes_many(items)
+        found = [False] * len(hashes)
+        # Each stage only looks up the items no earlier stage holds
+        pending = list(range(len(hashes)))
+        for stage in self.stages:
+            if not pending:
+                break
+            hits = _lookup_many(stage.bit_array, stage.size, stage.hash_count, [hashes[i] for i in pending])
+            for position, hit in zip(pending, hits):
+                found[position] = hit
+            pending = [position for position, hit in zip(pending, hits) if not hit]
+        return found
+
+    @property
+    def nbytes(self) -> int:
+        return sum(stage.nbytes for stage in self.stages)
+
+    def _grow(self) -> None:
+        n = len(self.stages)
+        capacity = self.initial_capacity * self.growth ** n
+        # Stage rates p0 * r^i add up to at most p0 / (1 - r) = error_rate
+        error_rate = self.error_rate * (1 - self.tightening) * self.tightening ** n
+        self.stages.append(BloomFilter(capacity, error_rate))
+        self.capacities.append(capacity)
+        self._stage_count = 0
+
+
+class CountingBloomFilter:
+    """
+    Bloom filter with a small counter instead of a bit per slot (Fan et al.,
+    2000), so items can be removed. Counters take one byte and stick at 255
+    once they saturate, which only makes removals less effective, never
+    lookups wrong. Removing an item that was never added may cause false
+    negatives, so `remove` refuses items the filter does not contain.
+    """
+
+    def __init__(self, capacity: int = 10000, error_rate: float = DEFAULT_ERROR_RATE):
+        self.size, self.hash_count = optimal_shape(capacity, error_rate)
+        self.counters = bytearray(self.size)
+        self.count = 0
+
+    def _indexes(self, item: str) -> Set[int]:
+        # A set: an index repeated among the k must be counted once
+        h1, h2 = _base_hashes(item)
+        size = self.size
+        return {(h1 + i * h2) % size for i in range(self.hash_count)}
+
+    def add(self, item: str):
+        counters = self.counters
+        for index in self._indexes(item):
+            if counters[index] < 255:
+                counters[index] += 1
+        self.count += 1
+
+    def remove(self, item: str):
+        indexes = self._indexes(item)
+        counters = self.counters
+        if not all(counters[index] for index in indexes):
+            raise KeyError(item)
+        for index in indexes:
+            if counters[index] < 255:
+                counters[index] -= 1
+        self.count -= 1
+
+    def __contains__(self, item: str):
+        counters = self.counters
+        return all(counters[index] for index in self._indexes(item))
+
+    def contains_many(self, items: Iterable[str]) -> List[bool]:
+        return _lookup_many(self.counters, self.size, self.hash_count, _base_hashes_many(items))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.counters)
+
+
+# In-memory filters by name; all take (capacity, error_rate)
+FILTERS = {
+    "standard": BloomFilter,
+    "scalable": ScalableBloomFilter,
+    "counting": CountingBloomFilter,
+}
+
+
+class MappedBloomFilter(BloomFilter):
+    """
+    A BloomFilter whose bits live in a file written by `build`, mapped
+    read-only. Opening it reads only the header, pages are loaded as lookups
+    touch them, and every process mapping the same file shares them through
+    the page cache, so the filter may be larger than the memory of any one
+    process.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = pathlib.Path(path)
+        with open(self.path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size:
+            self._mmap.close()
+            raise ValueError(f"Not a Bloom filter file: {self.path}")
+        magic, version, size, hash_count, self.count = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _VERSION or len(self._mmap) < _HEADER.size + _byte_length(size):
+            self._mmap.close()
+            raise ValueError(f"Not a Bloom filter file: {self.path}")
+        self.size = size
+        self.hash_count = hash_count
+        self._view = memoryview(self._mmap)[_HEADER.size:]
+        self.bit_array = bitarray(buffer=self._view, endian="big")
+
+    def add(self, item: str):
+        raise TypeError("A mapped Bloom filter is read-only; rebuild it with bloom.build")
+
+    @property
+    def nbytes(self) -> int:
+        return _byte_length(self.size)
+
+    def close(self) -> None:
+        # The bitarray and the view hold exports of the map, which must go first
+        self.bit_array = bitarray()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "MappedBloomFilter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _byte_length(bits: int) -> int:
+    return (bits + 7) // 8
+
+
+def build(
+    items: Iterable[str],
+    path: str | os.PathLike,
+    capacity: int,
+    error_rate: float = DEFAULT_ERROR_RATE,
+) -> int:
+    """
+    Writes a Bloom filter of `items`, sized for `capacity` of them, to `path`.
+    Bits are set directly in a mapped file, so only the pages being written
+    are in memory. The file is built next to `path` and renamed over it, so
+    readers see either the old filter or the new one. Returns the number of
+    items added.
+    """
+    size, hash_count = optimal_shape(capacity, error_rate)
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    count = 0
+    with open(tmp_path, "w+b") as file:
+        file.truncate(_HEADER.size + _byte_length(size))
+        with mmap.mmap(file.fileno(), 0) as mapped:
+            view = memoryview(mapped)[_HEADER.size:]
+            bits = bitarray(buffer=view, endian="big")
+            for item in items:
+                h1, h2 = _base_hashes(item)
+                for i in range(hash_count):
+                    bits[(h1 + i * h2) % size] = True
+                count += 1
+            del bits
+            view.release()
+            _HEADER.pack_into(mapped, 0, _MAGIC, _VERSION, size, hash_count, count)
+            mapped.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(path.parent)
+    return count
+
+
+def iter_interests(path: str | os.PathLike) -> Iterator[str]:
+    """Messages of an interest list, one per line (plain, .gz or .zst); blank lines are skipped."""
+    with open_text(path) as file:
+        for line in file:
+            line = line.rstrip("\r\n")
+            if line:
+                yield line
+
+
+def build_from_file(
+    interests_path: str | os.PathLike,
+    path: str | os.PathLike,
+    error_rate: float = DEFAULT_ERROR_RATE,
+    capacity: int | None = None,
+) -> int:
+    """
+    Streams an interest list into a Bloom filter file. Without `capacity` the
+    list is read twice: once to count it, once to add it.
+    """
+    if capacity is None:
+        capacity = sum(1 for _ in iter_interests(interests_path))
+    return build(iter_interests(interests_path), path, capacity, error_rate)
+
+
+def _cli() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Builds a Bloom filter file from an interest list.")
+    parser.add_argument("interests", type=pathlib.Path)
+    parser.add_argument("output", type=pathlib.Path)
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_ERROR_RATE)
+    parser.add_argument("--capacity", type=int, default=None)
+    args = parser.parse_args()
+
+    count = build_from_file(args.interests, args.output, args.error_rate, args.capacity)
+    print(f"{count} items written to {args.output}")
+
+
+if __name__ == "__main__":
+    _cli()
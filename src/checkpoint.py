@@ -0,0 +1,98 @@
+import os
+import pathlib
+import pickle
+import struct
+import time
+import zlib
+from typing import Any, Callable, Dict
+
+State = Dict[str, Any]
+
+_MAGIC = b"SCKP"
+_VERSION = 2
+# magic, format version, schema of the task's state, crc32 of the payload
+_HEADER = struct.Struct("<4sBHI")
+
+
+class Checkpointer:
+    """
+    Periodically snapshots a task's state to local disk so a restart resumes
+    from the last snapshot instead of replaying every file in the data path.
+
+    Snapshots are a small header followed by a zlib-compressed pickle. They are
+    written to a temporary file, fsynced and renamed over the previous one, so
+    a crash leaves either the old or the new snapshot, never a torn one.
+
+    `schema` identifies the layout of the task's state. A task bumps it
+    whenever that layout changes, and snapshots of another schema are
+    ignored instead of being resumed from.
+    """
+
+    def __init__(self, path: str | os.PathLike, interval: float = 30.0, schema: int = 0):
+        self.path = pathlib.Path(path)
+        self.interval = interval
+        self.schema = schema
+        self._last_save = time.monotonic()
+
+    def load(self) -> State | None:
+        """Returns the last snapshot, or None when there is no usable one."""
+        try:
+            with open(self.path, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+
+        if len(blob) < _HEADER.size:
+            return None
+        magic, version, schema, crc = _HEADER.unpack_from(blob)
+        payload = blob[_HEADER.size:]
+        # A snapshot is only an optimisation: replaying from scratch is always
+        # correct, so an unreadable or outdated one is treated as missing.
+        if magic != _MAGIC or version != _VERSION or schema != self.schema or zlib.crc32(payload) != crc:
+            return None
+        try:
+            return pickle.loads(zlib.decompress(payload))
+        except Exception:
+            # e.g. a class that was renamed or moved since the snapshot
+            return None
+
+    def save(self, state: State) -> None:
+        payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.schema, zlib.crc32(payload)))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        _fsync_directory(self.path.parent)
+        self._last_save = time.monotonic()
+
+    def maybe_save(self, state: Callable[[], State]) -> bool:
+        """
+        Saves `state()` if `interval` seconds have passed since the last save.
+        `state()` may return None to skip this save; it is attempted again on
+        the next call.
+        """
+        if time.monotonic() - self._last_save < self.interval:
+            return False
+        snapshot = state()
+        if snapshot is None:
+            return False
+        self.save(snapshot)
+        return True
+
+
+def _fsync_directory(path: pathlib.Path) -> None:
+    # Makes the rename itself durable; not every platform can open directories.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -1,15 +1,39 @@
 from datetime import datetime
-from typing import NamedTuple, TypedDict
-from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, NotRequired, Tuple, TypedDict
+from dataclasses import dataclass, field
 
 
 class Events(TypedDict):
     service: str
     timestamp: float
     message: str
+    response_time_ms: NotRequired[float]
+
+
+@dataclass
+class ServiceStats:
+    count: int
+    success_rate: float
+    # Inter-arrival statistics: seconds between consecutive events of the
+    # service, whatever their status; unrelated to success_rate
+    mean_interarrival: float
+    interarrival_variance: float
+    # Success rate with older events decayed, keyed by half-life in seconds
+    decayed_success_rate: Dict[float, float] = field(default_factory=dict)
+
 
 @dataclass
 class Result:
     value: float
     newest_considered: datetime
     oldest_considered: datetime
+    # Per-service breakdown, for tasks that report every service at once
+    services: Dict[str, ServiceStats] = field(default_factory=dict, compare=False)
+    # Per-window breakdown by service, keyed by window name
+    windows: Dict[str, Dict[str, float]] = field(default_factory=dict, compare=False)
+    # Response time quantiles ("p95", ...) by window and service
+    latencies: Dict[str, Dict[str, Dict[str, float]]] = field(default_factory=dict, compare=False)
+    # Top keys with their (over)estimated counts, by stream ("status_codes", ...)
+    heavy_hitters: Dict[str, List[Tuple[object, int]]] = field(default_factory=dict, compare=False)
+    # Named counters such as late or dropped events
+    counters: Dict[str, int] = field(default_factory=dict, compare=False)
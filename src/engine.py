@@ -0,0 +1,328 @@
+import abc
+import random
+from datetime import datetime
+from typing import Dict, Generator, List, Sequence
+
+from src import status, task_1, task_2, task_4
+from src.batch import EventBatch
+from src.checkpoint import Checkpointer, State
+from src.domain import Result
+from src.heavy_hitters import CountMap
+from src.pipeline import Pipeline
+from src.sampling import SkipReservoir
+from src.source import START_CURSOR
+from src.window import SlidingCounter
+
+# Version of the checkpoint contents, operator states included; bumped
+# whenever the layout of either changes
+CHECKPOINT_SCHEMA = 1
+
+
+class Operator(abc.ABC):
+    """
+    One query of the engine. It folds every decoded batch into its own state
+    and reports a Result on demand; reading and parsing are shared.
+    """
+
+    name: str = ""
+
+    @abc.abstractmethod
+    def update(self, batch: EventBatch) -> None:
+        ...
+
+    @abc.abstractmethod
+    def result(self) -> Result | None:
+        """The current answer, or None while nothing relevant has been seen."""
+
+    @abc.abstractmethod
+    def merge(self, other: "Operator") -> None:
+        """Folds in the state of the same operator run over another shard."""
+
+    def state(self) -> State:
+        return {}
+
+    def restore(self, state: State) -> None:
+        pass
+
+
+class RunningAverage(Operator):
+    """Success rate of one service over every event seen, plus per-service statistics (task_1)."""
+
+    name = "running_average"
+
+    def __init__(self, service: str = "monitoring", half_lives: Sequence[float] = task_1.DEFAULT_HALF_LIVES):
+        self.service = service
+        self.service_metrics = task_1.ServiceMetrics(half_lives)
+        self.newest_timestamp = 0.0
+        self.oldest_timestamp = float("inf")
+
+    def update(self, batch: EventBatch) -> None:
+        if not len(batch):
+            return
+        task_1.process_batch(batch, self.service_metrics)
+        self.newest_timestamp = max(self.newest_timestamp, max(batch.timestamps))
+        self.oldest_timestamp = min(
+            self.oldest_timestamp, min(filter(None, batch.timestamps), default=self.oldest_timestamp)
+        )
+
+    def result(self) -> Result | None:
+        if not self.newest_timestamp:
+            return None
+        return Result(
+            value=task_1.get_service_average(self.service_metrics, self.service),
+            newest_considered=datetime.fromtimestamp(self.newest_timestamp),
+            oldest_considered=datetime.fromtimestamp(self.oldest_timestamp),
+            services=self.service_metrics.snapshot(),
+        )
+
+    def merge(self, other: "RunningAverage") -> None:
+        self.service_metrics.merge(other.service_metrics)
+        self.newest_timestamp = max(self.newest_timestamp, other.newest_timestamp)
+        self.oldest_timestamp = min(self.oldest_timestamp, other.oldest_timestamp)
+
+    def state(self) -> State:
+        return {
+            "service_metrics": self.service_metrics.state(),
+            "newest_timestamp": self.newest_timestamp,
+            "oldest_timestamp": self.oldest_timestamp,
+        }
+
+    def restore(self, state: State) -> None:
+        self.service_metrics = task_1.ServiceMetrics.from_state(
+            state["service_metrics"], self.service_metrics.half_lives
+        )
+        self.newest_timestamp = state["newest_timestamp"]
+        self.oldest_timestamp = state["oldest_timestamp"]
+
+
+class SlidingWindow(Operator):
+    """Failures of one service in the last `seconds` of event time (task_2)."""
+
+    name = "sliding_window"
+
+    def __init__(self, service: str = "monitoring", seconds: float = task_2.SLIDING_WINDOW_SECONDS):
+        self.service = service
+        self.failure_window = SlidingCounter(seconds)
+        self.newest_timestamp = 0.0
+
+    def update(self, batch: EventBatch) -> None:
+        if not len(batch):
+            return
+        self.newest_timestamp = max(self.newest_timestamp, max(batch.timestamps))
+        names = batch.service_names
+        for sid, ts, code in zip(batch.service_ids, batch.timestamps, batch.status_codes):
+            if task_2.is_failure(code) and names[sid]:
+                self.failure_window.add(names[sid], ts)
+        self.failure_window.advance(self.newest_timestamp)
+
+    def result(self) -> Result | None:
+        if not self.newest_timestamp:
+            return None
+        return Result(
+            value=float(self.failure_window.count(self.service)),
+            newest_considered=datetime.fromtimestamp(self.newest_timestamp),
+            oldest_considered=datetime.fromtimestamp(self.failure_window.start),
+            counters={"dropped_events": self.failure_window.dropped},
+        )
+
+    def merge(self, other: "SlidingWindow") -> None:
+        self.failure_window.merge(other.failure_window)
+        self.newest_timestamp = max(self.newest_timestamp, other.newest_timestamp)
+
+    def state(self) -> State:
+        return {"failure_window": self.failure_window.state(), "newest_timestamp": self.newest_timestamp}
+
+    def restore(self, state: State) -> None:
+        self.failure_window = SlidingCounter.from_state(state["failure_window"])
+        self.newest_timestamp = state["newest_timestamp"]
+
+
+class Reservoir(Operator):
+    """Most common HTTP status code in a uniform sample of `k` events (task_3)."""
+
+    name = "reservoir"
+
+    def __init__(self, k: int = 1000, seed: int | None = None):
+        self.sampler = SkipReservoir(k, random.Random(seed), CountMap())
+        self.newest_timestamp = 0.0
+        self.oldest_timestamp = float("inf")
+
+    def update(self, batch: EventBatch) -> None:
+        codes = batch.status_codes
+        if status.NO_STATUS in codes:
+            codes = [code for code in codes if code != status.NO_STATUS]
+        if not codes:
+            return
+        self.sampler.extend(codes)
+        timestamps = [ts for ts in batch.timestamps if ts]
+        if timestamps:
+            self.newest_timestamp = max(self.newest_timestamp, max(timestamps))
+            self.oldest_timestamp = min(self.oldest_timestamp, min(timestamps))
+
+    def result(self) -> Result | None:
+        most_common = self.sampler.counts.most_common()
+        if most_common is None:
+            return None
+        return Result(
+            value=float(most_common[0]),
+            newest_considered=datetime.fromtimestamp(self.newest_timestamp),
+            oldest_considered=datetime.fromtimestamp(self.oldest_timestamp),
+        )
+
+    def merge(self, other: "Reservoir") -> None:
+        self.sampler.merge(other.sampler)
+        self.newest_timestamp = max(self.newest_timestamp, other.newest_timestamp)
+        self.oldest_timestamp = min(self.oldest_timestamp, other.oldest_timestamp)
+
+    def state(self) -> State:
+        return {
+            "sampler": self.sampler,
+            "newest_timestamp": self.newest_timestamp,
+            "oldest_timestamp": self.oldest_timestamp,
+        }
+
+    def restore(self, state: State) -> None:
+        self.sampler = state["sampler"]
+        self.newest_timestamp = state["newest_timestamp"]
+        self.oldest_timestamp = state["oldest_timestamp"]
+
+
+class BloomDetector(Operator):
+    """Share of events whose message is a known error pattern or an HTTP error (task_4)."""
+
+    name = "bloom"
+
+    def __init__(self, bloom: task_4.BloomFilter | None = None):
+        self.bloom = bloom if bloom is not None else task_4.load_dynamic_bloom_filter()
+        self.matcher = task_4.load_pattern_matcher()
+        self.total_events = 0
+        self.detected_events = 0
+        self.newest_timestamp = 0.0
+        self.oldest_timestamp = float("inf")
+
+    def update(self, batch: EventBatch) -> None:
+        bloom = self.bloom
+        matcher = self.matcher
+        matches = bloom.contains_many(batch.message_table)
+        detected = [
+            match or matcher.matches(message) or task_4.is_http_error(message)
+            for match, message in zip(matches, batch.message_table)
+        ]
+        self.total_events += len(batch)
+        for ts, mid in zip(batch.timestamps, batch.message_ids):
+            if detected[mid]:
+                self.detected_events += 1
+                if ts:
+                    self.newest_timestamp = max(self.newest_timestamp, ts)
+                    self.oldest_timestamp = min(self.oldest_timestamp, ts)
+
+    def result(self) -> Result | None:
+        if not self.detected_events:
+            return None
+        return Result(
+            value=self.detected_events / self.total_events,
+            newest_considered=datetime.fromtimestamp(self.newest_timestamp),
+            oldest_considered=datetime.fromtimestamp(self.oldest_timestamp),
+        )
+
+    def merge(self, other: "BloomDetector") -> None:
+        # Every shard builds the same filter from the current patterns
+        self.total_events += other.total_events
+        self.detected_events += other.detected_events
+        self.newest_timestamp = max(self.newest_timestamp, other.newest_timestamp)
+        self.oldest_timestamp = min(self.oldest_timestamp, other.oldest_timestamp)
+
+    def state(self) -> State:
+        # The filter is rebuilt from the current patterns rather than saved
+        return {
+            "total_events": self.total_events,
+            "detected_events": self.detected_events,
+            "newest_timestamp": self.newest_timestamp,
+            "oldest_timestamp": self.oldest_timestamp,
+        }
+
+    def restore(self, state: State) -> None:
+        self.total_events = state["total_events"]
+        self.detected_events = state["detected_events"]
+        self.newest_timestamp = state["newest_timestamp"]
+        self.oldest_timestamp = state["oldest_timestamp"]
+
+
+def default_operators() -> List[Operator]:
+    return [RunningAverage(), SlidingWindow(), Reservoir(), BloomDetector()]
+
+
+class Engine:
+    """Fans every batch out to a set of operators with distinct names."""
+
+    def __init__(self, operators: Sequence[Operator]):
+        self.operators: Dict[str, Operator] = {}
+        for operator in operators:
+            if operator.name in self.operators:
+                raise ValueError(f"Duplicate operator name: {operator.name!r}")
+            self.operators[operator.name] = operator
+
+    def update(self, batch: EventBatch) -> None:
+        for operator in self.operators.values():
+            operator.update(batch)
+
+    def results(self) -> Dict[str, Result]:
+        results = {}
+        for name, operator in self.operators.items():
+            result = operator.result()
+            if result is not None:
+                results[name] = result
+        return results
+
+    def merge(self, other: "Engine") -> None:
+        for name, operator in self.operators.items():
+            operator.merge(other.operators[name])
+
+    def state(self) -> Dict[str, State]:
+        return {name: operator.state() for name, operator in self.operators.items()}
+
+    def restore(self, state: Dict[str, State]) -> None:
+        # Operators added since the snapshot start empty
+        for name, operator_state in state.items():
+            if name in self.operators:
+                self.operators[name].restore(operator_state)
+
+
+def compute(
+    data_path: str,
+    operators: Sequence[Operator] | None = None,
+    checkpoint_path: str | None = None,
+    checkpoint_interval: float = 30.0,
+    workers: int = 0,
+) -> Generator[Dict[str, Result], None, None]:
+    """
+    Reads and parses every file once and feeds it to all `operators` (the four
+    task queries by default). Yields the Result of each operator, by name, after
+    every tick.
+    """
+    engine = Engine(default_operators() if operators is None else operators)
+    cursor = START_CURSOR
+    offsets = None
+
+    checkpointer = None
+    if checkpoint_path is not None:
+        checkpointer = Checkpointer(checkpoint_path, checkpoint_interval, schema=CHECKPOINT_SCHEMA)
+        state = checkpointer.load()
+        if state is not None:
+            engine.restore(state["operators"])
+            cursor = state["cursor"]
+            offsets = state["offsets"]
+
+    with Pipeline.from_directory(data_path, cursor, offsets, workers) as pipeline:
+        for tick in pipeline.ticks():
+            for batch in tick:
+                engine.update(batch)
+
+            if checkpointer is not None:
+                checkpointer.maybe_save(lambda: {
+                    "cursor": tick.cursor,
+                    "offsets": tick.offsets,
+                    "operators": engine.state(),
+                })
+
+            yield engine.results()
@@ -0,0 +1,179 @@
+import heapq
+import zlib
+from array import array
+from typing import Dict, Hashable, List, Set, Tuple
+
+
+class CountMap:
+    """
+    Exact counts with the most frequent key available in O(1).
+
+    Keys are grouped in buckets by count (a "stream summary"), so incrementing
+    or decrementing a key moves it to the neighbouring bucket and the largest
+    non-empty bucket is always known. Meant for small, churning multisets such
+    as the contents of a reservoir.
+    """
+
+    def __init__(self):
+        self.counts: Dict[Hashable, int] = {}
+        self.buckets: Dict[int, Set[Hashable]] = {}
+        self.max_count = 0
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __getitem__(self, key: Hashable) -> int:
+        return self.counts.get(key, 0)
+
+    def increment(self, key: Hashable) -> None:
+        count = self.counts.get(key, 0)
+        if count:
+            self._unlink(key, count)
+        count += 1
+        self.counts[key] = count
+        self.buckets.setdefault(count, set()).add(key)
+        if count > self.max_count:
+            self.max_count = count
+
+    def decrement(self, key: Hashable) -> None:
+        count = self.counts[key]
+        self._unlink(key, count)
+        if count == self.max_count and count not in self.buckets:
+            self.max_count = count - 1
+        count -= 1
+        if count:
+            self.counts[key] = count
+            self.buckets.setdefault(count, set()).add(key)
+        else:
+            del self.counts[key]
+
+    def replace(self, old: Hashable, new: Hashable) -> None:
+        if old != new:
+            self.increment(new)
+            self.decrement(old)
+
+    def most_common(self) -> Tuple[Hashable, int] | None:
+        if not self.max_count:
+            return None
+        return next(iter(self.buckets[self.max_count])), self.max_count
+
+    def _unlink(self, key: Hashable, count: int) -> None:
+        bucket = self.buckets[count]
+        bucket.discard(key)
+        if not bucket:
+            del self.buckets[count]
+
+
+class SpaceSaving:
+    """
+    Top-`capacity` heavy hitters of an unbounded stream (Metwally et al.).
+
+    At most `capacity` keys are monitored. An unmonitored key replaces the one
+    with the smallest count and inherits it as its error, so a reported count
+    overestimates the true one by at most `error[key]`, and every key with
+    true frequency above total / capacity is guaranteed to be monitored.
+    Updates take weights, so a batch can be folded in one update per distinct
+    key. The ranking is cached and only recomputed after an update, so
+    repeated top-k queries are O(1).
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        self.total = 0
+        # (count, key) entries; stale ones are skipped when popped
+        self._heap: List[Tuple[int, Hashable]] = []
+        self._ranking: List[Tuple[Hashable, int]] | None = []
+
+    def update(self, key: Hashable, weight: int = 1) -> None:
+        counts = self.counts
+        self.total += weight
+        self._ranking = None
+        if key in counts:
+            counts[key] += weight
+        elif len(counts) < self.capacity:
+            counts[key] = weight
+            self.errors[key] = 0
+        else:
+            evicted, floor = self._pop_min()
+            del counts[evicted]
+            del self.errors[evicted]
+            counts[key] = floor + weight
+            self.errors[key] = floor
+        heapq.heappush(self._heap, (counts[key], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, k) for k, count in counts.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, n: int | None = None) -> List[Tuple[Hashable, int]]:
+        """The `n` keys with the largest counts, largest first."""
+        if self._ranking is None:
+            self._ranking = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return self._ranking if n is None else self._ranking[:n]
+
+    def _pop_min(self) -> Tuple[Hashable, int]:
+        heap = self._heap
+        while True:
+            count, key = heapq.heappop(heap)
+            if self.counts.get(key) == count:
+                return key, count
+
+
+class CountMinSketch:
+    """
+    Approximate frequency of any key in `width` x `depth` counters (Cormode &
+    Muthukrishnan). Estimates never undercount; with width = ceil(e / eps) and
+    depth = ceil(ln(1 / delta)) they overcount by more than eps * total with
+    probability at most delta. Hashing is stable across processes so the
+    counters can be checkpointed.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 5):
+        self.width = width
+        self.depth = depth
+        self.table = array("Q", bytes(8 * width * depth))
+        self.total = 0
+
+    def _indexes(self, key: Hashable) -> List[int]:
+        data = str(key).encode("utf-8")
+        h1 = zlib.crc32(data)
+        h2 = zlib.adler32(data) | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def update(self, key: Hashable, weight: int = 1) -> None:
+        table = self.table
+        for index in self._indexes(key):
+            table[index] += weight
+        self.total += weight
+
+    def estimate(self, key: Hashable) -> int:
+        table = self.table
+        return min(table[index] for index in self._indexes(key))
+
+
+class HeavyHitters:
+    """Space-Saving top-k plus a Count-Min sketch over one stream of keys."""
+
+    def __init__(self, capacity: int = 100, width: int = 2048, depth: int = 5):
+        self.top_k = SpaceSaving(capacity)
+        self.sketch = CountMinSketch(width, depth)
+
+    def update(self, key: Hashable, weight: int = 1) -> None:
+        self.top_k.update(key, weight)
+        self.sketch.update(key, weight)
+
+    def update_counts(self, counts: Dict[Hashable, int]) -> None:
+        for key, weight in counts.items():
+            self.update(key, weight)
+
+    def top(self, n: int | None = None) -> List[Tuple[Hashable, int]]:
+        return self.top_k.top(n)
+
+    def estimate(self, key: Hashable) -> int:
+        return self.sketch.estimate(key)
+
+    @property
+    def total(self) -> int:
+        return self.sketch.total
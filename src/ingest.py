@@ -0,0 +1,180 @@
+import concurrent.futures
+import heapq
+import itertools
+import os
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from src.batch import EventBatch
+from src.reader import is_tailable, iter_appended, iter_events
+
+
+def read_batches(
+    path: str | os.PathLike,
+    offset: int = 0,
+    chunk_size: int | None = None,
+) -> Iterator[EventBatch]:
+    """
+    Decodes a batch file, or what was appended to a segment since `offset`,
+    into batches of at most `chunk_size` events (a single batch if None).
+
+    Errors are reported on the last batch instead of raised; the events parsed
+    before the error are kept. Values that are not objects, and malformed
+    lines of a segment, are skipped and reported on the batch they were
+    found in. Each batch records the byte offset the segment has been
+    consumed up to.
+    """
+    source = str(path)
+    position = [offset]
+    errors: List[str] = []
+
+    def appended() -> Iterator:
+        for end, event in iter_appended(path, offset, errors=errors):
+            position[0] = end
+            if event is not None:
+                yield event
+
+    def objects(values: Iterator) -> Iterator:
+        for value in values:
+            if isinstance(value, dict):
+                yield value
+            else:
+                errors.append(f"Skipped a JSON {type(value).__name__} that is not an event")
+
+    batch = EventBatch(source=source, offset=offset)
+    try:
+        events = objects(appended() if is_tailable(path) else iter_events(path))
+        while True:
+            batch.extend(itertools.islice(events, chunk_size))
+            batch.offset = position[0]
+            if errors:
+                batch.error = "; ".join(errors)
+                errors.clear()
+            if chunk_size is None or len(batch) < chunk_size:
+                break
+            yield batch
+            batch = EventBatch(source=source, offset=position[0])
+    except (OSError, ValueError, TypeError) as e:
+        batch.offset = position[0]
+        batch.error = "; ".join([*errors, str(e)])
+    yield batch
+
+
+def decode_file(
+    path: str | os.PathLike,
+    sort_by_time: bool = False,
+    offset: int = 0,
+) -> EventBatch:
+    """Decodes one file into a single EventBatch; runs inside pool workers."""
+    batch = next(read_batches(path, offset))
+    if sort_by_time:
+        batch = batch.sorted_by_time()
+    return batch
+
+
+def merge_by_time(batches: Sequence[EventBatch]) -> EventBatch:
+    """k-way merges batches that are each sorted by timestamp into one batch."""
+    merged = EventBatch()
+    service_ids = [[merged.service_id(name) for name in batch.service_names] for batch in batches]
+    message_ids = [[merged.message_id(message) for message in batch.message_table] for batch in batches]
+    rows = heapq.merge(*(_rows(b, batch) for b, batch in enumerate(batches)))
+    for timestamp, b, i in rows:
+        batch = batches[b]
+        merged.service_ids.append(service_ids[b][batch.service_ids[i]])
+        merged.timestamps.append(timestamp)
+        merged.message_ids.append(message_ids[b][batch.message_ids[i]])
+        merged.response_times.append(batch.response_times[i])
+    return merged
+
+
+def _rows(b: int, batch: EventBatch) -> Iterator[tuple]:
+    for i, timestamp in enumerate(batch.timestamps):
+        yield timestamp, b, i
+
+
+class ParallelDecoder:
+    """
+    Decodes the files of a tick, fanning them out to `workers` processes.
+
+    With order="file" one batch per file is yielded in the order the files
+    were given. With order="time" the files are sorted by the workers and
+    merged into a single batch in event-time order. With `workers` <= 1 files
+    are decoded in this process, in chunks of `chunk_size` events so that
+    aggregation overlaps with parsing. NDJSON segments are read from the byte
+    offset reached the previous time they were handed in.
+
+    Files that fail to decode are still reported: in file order on their own
+    batch, in time order as an empty batch carrying the error, ahead of the
+    merged one.
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        order: str = "file",
+        chunk_size: int = 1024,
+        offsets: Dict[str, int] | None = None,
+        max_tracked: int = 1024,
+    ):
+        if order not in ("file", "time"):
+            raise ValueError(f"Invalid order: {order}")
+        self.workers = workers
+        self.order = order
+        self.chunk_size = chunk_size
+        # Byte offsets reached in NDJSON segments that may still grow. Only the
+        # `max_tracked` most recently read segments are remembered; older ones
+        # are assumed to be finished.
+        self.offsets: Dict[str, int] = dict(offsets or {})
+        self.max_tracked = max_tracked
+        self._executor: concurrent.futures.ProcessPoolExecutor | None = None
+
+    def decode(self, paths: Iterable[str | os.PathLike]) -> Iterator[EventBatch]:
+        paths = list(paths)
+        offsets = [self.offsets.get(str(path), 0) for path in paths]
+        sort_by_time = self.order == "time"
+        if self.workers > 1 and len(paths) > 1:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+            batches: Iterable[EventBatch] = self._executor.map(
+                decode_file, paths, [sort_by_time] * len(paths), offsets
+            )
+        elif sort_by_time:
+            batches = (decode_file(path, True, offset) for path, offset in zip(paths, offsets))
+        else:
+            batches = (
+                batch
+                for path, offset in zip(paths, offsets)
+                for batch in read_batches(path, offset, self.chunk_size)
+            )
+
+        if not sort_by_time:
+            for batch in batches:
+                self._commit(batch)
+                yield batch
+            return
+
+        decoded: List[EventBatch] = []
+        for batch in batches:
+            self._commit(batch)
+            if batch.error is not None:
+                yield EventBatch(source=batch.source, error=batch.error)
+            decoded.append(batch)
+        yield merge_by_time(decoded)
+
+    def _commit(self, batch: EventBatch) -> None:
+        if not is_tailable(batch.source):
+            return
+        self.offsets.pop(batch.source, None)
+        self.offsets[batch.source] = batch.offset
+        if len(self.offsets) > self.max_tracked:
+            del self.offsets[next(iter(self.offsets))]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "ParallelDecoder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
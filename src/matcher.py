@@ -0,0 +1,147 @@
+from typing import Dict, Iterable, List, Sequence
+
+from bitarray import bitarray
+
+# Length of the n-grams the prefilter samples
+DEFAULT_GRAM = 4
+
+
+class AhoCorasick:
+    """
+    Finds every occurrence of a set of patterns in one left-to-right pass over
+    a text (Aho & Corasick, 1975), however many patterns there are.
+
+    The patterns form a trie; each node links to the node of its longest
+    proper suffix that is also in the trie, so on a mismatch the scan follows
+    that link instead of moving back in the text. Transitions are resolved
+    into one dict per node when the automaton is built, so scanning costs one
+    dict lookup per character.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        # Pattern indexes ending at each node, including via suffix links
+        self._output: List[List[int]] = [[]]
+        for pattern in patterns:
+            if not pattern:
+                raise ValueError("Patterns must not be empty")
+            node = 0
+            for char in pattern:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = self._goto[node][char] = len(self._goto)
+                    self._goto.append({})
+                    self._output.append([])
+                node = child
+            self._output[node].append(len(self.patterns))
+            self.patterns.append(pattern)
+        self._link()
+
+    def _link(self) -> None:
+        goto, output = self._goto, self._output
+        fail = [0] * len(goto)
+        # Breadth-first, so a node's suffix link is final before its children need it
+        queue = list(goto[0].values())
+        for node in queue:
+            for char, child in goto[node].items():
+                queue.append(child)
+                target = fail[node]
+                while target and char not in goto[target]:
+                    target = fail[target]
+                fallback = goto[target].get(char, 0)
+                fail[child] = fallback if fallback != child else 0
+                output[child] = output[child] + output[fail[child]]
+        # Fill in the missing transitions from the suffix links
+        for node in queue:
+            inherited = goto[fail[node]]
+            transitions = goto[node]
+            for char, target in inherited.items():
+                transitions.setdefault(char, target)
+
+    def search(self, text: str) -> List[int]:
+        """Indexes of the patterns occurring in `text`, once each, in order of first match."""
+        goto, output = self._goto, self._output
+        root = goto[0]
+        node = 0
+        found: Dict[int, None] = {}
+        for char in text:
+            node = goto[node].get(char) or root.get(char, 0)
+            for index in output[node]:
+                found[index] = None
+        return list(found)
+
+    def matches(self, text: str) -> bool:
+        """Whether any pattern occurs in `text`; stops at the first occurrence."""
+        goto, output = self._goto, self._output
+        root = goto[0]
+        node = 0
+        for char in text:
+            node = goto[node].get(char) or root.get(char, 0)
+            if output[node]:
+                return True
+        return False
+
+
+class PatternMatcher:
+    """
+    Substring matching of many patterns with a cheap rejection test first.
+
+    Every n-gram of every pattern is set in a small Bloom filter. A pattern of
+    length L covers L - n + 1 consecutive n-gram positions, so any occurrence
+    of it includes an n-gram starting at a multiple of `stride` = (shortest
+    pattern) - n + 1. The prefilter probes only those positions, a handful per
+    message; if none is in the filter the message cannot contain a pattern and
+    the automaton is never run. Messages that pass are confirmed by the
+    Aho–Corasick scan, so there are no false positives.
+    """
+
+    def __init__(self, patterns: Sequence[str], gram: int = DEFAULT_GRAM):
+        self.automaton = AhoCorasick(patterns)
+        self._requested_gram = gram
+        shortest = min((len(pattern) for pattern in patterns), default=0)
+        # Too short a pattern for the prefilter: every message is scanned
+        self.gram = min(gram, shortest)
+        self.stride = shortest - self.gram + 1
+        grams = {
+            pattern[i:i + self.gram]
+            for pattern in patterns
+            for i in range(len(pattern) - self.gram + 1)
+        } if self.gram else set()
+        # One hash per n-gram; at 16 bits per n-gram about 6% of probes pass
+        self._mask = (1 << max(10, (16 * len(grams)).bit_length())) - 1
+        self._bits = bitarray(self._mask + 1)
+        self._bits.setall(False)
+        for gram_text in grams:
+            self._bits[hash(gram_text) & self._mask] = True
+
+    def __reduce__(self):
+        # str hashes differ between processes, so the prefilter is rebuilt
+        return type(self), (self.patterns, self._requested_gram)
+
+    @property
+    def patterns(self) -> List[str]:
+        return self.automaton.patterns
+
+    def may_match(self, text: str) -> bool:
+        """False when `text` certainly contains no pattern."""
+        if not self.gram:
+            return bool(self.patterns)
+        bits, mask, gram = self._bits, self._mask, self.gram
+        for i in range(0, len(text) - gram + 1, self.stride):
+            if bits[hash(text[i:i + gram]) & mask]:
+                return True
+        return False
+
+    def matches(self, text: str) -> bool:
+        return self.may_match(text) and self.automaton.matches(text)
+
+    def matches_many(self, texts: Iterable[str]) -> List[bool]:
+        """Match of each text, e.g. of the message table of a batch."""
+        return [self.may_match(text) and self.automaton.matches(text) for text in texts]
+
+    def search(self, text: str) -> List[str]:
+        """The patterns occurring in `text`."""
+        if not self.may_match(text):
+            return []
+        return [self.patterns[index] for index in self.automaton.search(text)]
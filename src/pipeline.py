@@ -0,0 +1,218 @@
+import pathlib
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List
+
+from src.batch import EventBatch
+from src.ingest import ParallelDecoder
+from src.source import START_CURSOR, Cursor, DirectoryTailer
+
+
+@dataclass
+class StageStats:
+    """Throughput counters of one pipeline stage."""
+
+    name: str
+    batches: int = 0
+    events: int = 0
+    # Time spent doing the stage's own work
+    busy_seconds: float = 0.0
+    # Time spent waiting on the queue: full for the reader, empty for compute
+    waiting_seconds: float = 0.0
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+
+@dataclass
+class _TickStart:
+    files: List[pathlib.Path]
+
+
+@dataclass
+class _TickEnd:
+    cursor: Cursor
+    offsets: Dict[str, int]
+
+
+@dataclass
+class _Failure:
+    error: BaseException
+
+
+class Tick:
+    """
+    The batches decoded from the files of one poll. Iterate it to consume
+    them; afterwards `cursor` and `offsets` give the source position that the
+    consumed state corresponds to, which is what a checkpoint must record.
+    """
+
+    def __init__(self, pipeline: "Pipeline", files: List[pathlib.Path]):
+        self.files = files
+        self.cursor: Cursor = START_CURSOR
+        self.offsets: Dict[str, int] = {}
+        self._pipeline = pipeline
+        self._done = False
+
+    def __iter__(self) -> Iterator[EventBatch]:
+        while not self._done:
+            item = self._pipeline._get()
+            if isinstance(item, _TickEnd):
+                self.cursor = item.cursor
+                self.offsets = item.offsets
+                self._done = True
+            else:
+                yield item
+
+    def drain(self) -> None:
+        for _ in self:
+            pass
+
+
+class Pipeline:
+    """
+    Runs reading (tailing and decoding) in a background thread that feeds the
+    compute stage through a bounded queue.
+
+    When compute falls behind, the queue fills up and the reader blocks, so at
+    most `max_pending` decoded batches are held in memory. Each stage keeps
+    throughput counters in `stats`. `close()` stops the reader, closes the
+    tailer and decoder and joins the thread; errors raised while reading are
+    re-raised in the consumer.
+    """
+
+    def __init__(
+        self,
+        tailer: DirectoryTailer,
+        decoder: ParallelDecoder,
+        max_pending: int = 8,
+        poll_timeout: float = 0.25,
+    ):
+        self.tailer = tailer
+        self.decoder = decoder
+        self.poll_timeout = poll_timeout
+        self.stats = {"read": StageStats("read"), "compute": StageStats("compute")}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._tick: Tick | None = None
+        self._last_get: float | None = None
+
+    @classmethod
+    def from_directory(
+        cls,
+        path: str,
+        cursor: Cursor = START_CURSOR,
+        offsets: Dict[str, int] | None = None,
+        workers: int = 0,
+        max_pending: int = 8,
+    ) -> "Pipeline":
+        """Tails `path` from `cursor` and decodes with `workers` processes."""
+        return cls(
+            DirectoryTailer(path, cursor=cursor),
+            ParallelDecoder(workers, offsets=offsets),
+            max_pending=max_pending,
+        )
+
+    def start(self) -> "Pipeline":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._read, name="pipeline-reader", daemon=True)
+            self._thread.start()
+        return self
+
+    def ticks(self, idle_timeout: float | None = None) -> Iterator[Tick | None]:
+        """
+        Yields one Tick per poll that found files. With `idle_timeout`, yields
+        None whenever that many seconds pass without a new tick.
+        """
+        self.start()
+        while True:
+            if self._tick is not None:
+                self._tick.drain()
+            item = self._get(idle_timeout)
+            if item is None:
+                self._tick = None
+                yield None
+                continue
+            if not isinstance(item, _TickStart):
+                raise RuntimeError(f"Unexpected pipeline item: {item!r}")
+            self._tick = Tick(self, item.files)
+            yield self._tick
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            # Unblock a reader waiting for room in the queue
+            while self._thread.is_alive():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._thread.join(timeout=0.05)
+            self._thread = None
+        self.decoder.close()
+        self.tailer.close()
+
+    def __enter__(self) -> "Pipeline":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _get(self, timeout: float | None = None) -> object:
+        compute = self.stats["compute"]
+        now = time.perf_counter()
+        if self._last_get is not None:
+            compute.busy_seconds += now - self._last_get
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            item = None
+        self._last_get = time.perf_counter()
+        compute.waiting_seconds += self._last_get - now
+
+        if isinstance(item, _Failure):
+            raise item.error
+        if isinstance(item, EventBatch):
+            compute.batches += 1
+            compute.events += len(item)
+        return item
+
+    def _put(self, item: object) -> bool:
+        started = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.stats["read"].waiting_seconds += time.perf_counter() - started
+
+    def _read(self) -> None:
+        read = self.stats["read"]
+        try:
+            while not self._stop.is_set():
+                files = self.tailer.poll(timeout=self.poll_timeout)
+                if not files:
+                    continue
+                if not self._put(_TickStart(files)):
+                    return
+                started = time.perf_counter()
+                for batch in self.decoder.decode(files):
+                    read.busy_seconds += time.perf_counter() - started
+                    read.batches += 1
+                    read.events += len(batch)
+                    if not self._put(batch):
+                        return
+                    started = time.perf_counter()
+                read.busy_seconds += time.perf_counter() - started
+                if not self._put(_TickEnd(self.tailer.cursor, dict(self.decoder.offsets))):
+                    return
+        except BaseException as e:
+            self._put(_Failure(e))
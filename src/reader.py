@@ -0,0 +1,293 @@
+import gzip
+import io
+import json
+import os
+import re
+from typing import Any, Iterator, List, TextIO, Tuple
+
+from src.domain import Events
+
+# Characters read from disk per refill; memory stays around this size plus
+# the largest single event, whatever the size of the batch file.
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+# Files up to this size are decoded in one go, which is faster than parsing
+# element by element and still keeps memory small.
+SMALL_FILE_SIZE = 4 << 20
+
+# Batch documents hold one JSON array (or object); segments hold one event per
+# line. Either may be compressed, in which case it is decompressed as a stream.
+DOCUMENT_SUFFIXES = (".json",)
+LINE_DELIMITED_SUFFIXES = (".jsonl", ".ndjson")
+COMPRESSION_SUFFIXES = (".gz", ".zst")
+INPUT_PATTERNS = tuple(
+    f"*{suffix}{compression}"
+    for suffix in DOCUMENT_SUFFIXES + LINE_DELIMITED_SUFFIXES
+    for compression in ("",) + COMPRESSION_SUFFIXES
+)
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+
+
+class _StreamBuffer:
+    """A window over a text stream that is refilled and trimmed as it is consumed."""
+
+    def __init__(self, stream: TextIO, block_size: int):
+        self._stream = stream
+        self._block_size = block_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def refill(self) -> bool:
+        if self.eof:
+            return False
+        block = self._stream.read(self._block_size)
+        if not block:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos:] + block
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character ('' at end of input)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.refill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.text, self.pos)
+        self.pos += 1
+
+    def decode(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                # Most likely the value is cut by the end of the window
+                if self.refill():
+                    continue
+                raise
+            # A number cut by the end of the window still decodes, just wrongly
+            if (
+                isinstance(value, (int, float))
+                and _NUMBER_TAIL.match(self.text, end).end() == len(self.text)
+                and self.refill()
+            ):
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_array(buffer: _StreamBuffer) -> Iterator[Any]:
+    decode = _decoder.raw_decode
+    separator = _SEPARATOR.match
+    while True:
+        # Fast path: elements that sit entirely inside the current window
+        text = buffer.text
+        size = len(text)
+        pos = _WHITESPACE.match(text, buffer.pos).end()
+        try:
+            while True:
+                value, end = decode(text, pos)
+                if isinstance(value, (int, float)) and _NUMBER_TAIL.match(text, end).end() == size:
+                    break
+                match = separator(text, end)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group(1) == "]":
+                    buffer.pos = pos
+                    yield value
+                    return
+                # A separator at the very end may be followed by "]" or more whitespace
+                if pos == size:
+                    break
+                buffer.pos = pos
+                yield value
+        except json.JSONDecodeError:
+            # Either cut by the window or malformed; the slow path tells them apart
+            pass
+
+        # Slow path: the next element (or its separator) crosses the window
+        yield buffer.decode()
+        if buffer.peek() == "]":
+            buffer.pos += 1
+            return
+        buffer.expect(",")
+
+
+def iter_json(stream: TextIO, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[Any]:
+    """
+    Incrementally parses a JSON document and yields the elements of its
+    top-level array one at a time. Any other document is yielded whole.
+    """
+    buffer = _StreamBuffer(stream, block_size)
+    first = buffer.peek()
+    if first == "":
+        raise json.JSONDecodeError("Expecting value", buffer.text, buffer.pos)
+    if first != "[":
+        yield buffer.decode()
+    else:
+        buffer.pos += 1
+        if buffer.peek() == "]":
+            buffer.pos += 1
+        else:
+            yield from _iter_array(buffer)
+
+    if buffer.peek() != "":
+        raise json.JSONDecodeError("Extra data", buffer.text, buffer.pos)
+
+
+def _suffixes(path: str | os.PathLike) -> Tuple[str, str]:
+    """Returns the (format, compression) suffixes of a file name."""
+    name = os.fspath(path).lower()
+    compression = next((c for c in COMPRESSION_SUFFIXES if name.endswith(c)), "")
+    name = name[:len(name) - len(compression)]
+    return os.path.splitext(name)[1], compression
+
+
+def is_line_delimited(path: str | os.PathLike) -> bool:
+    return _suffixes(path)[0] in LINE_DELIMITED_SUFFIXES
+
+
+def is_tailable(path: str | os.PathLike) -> bool:
+    """Uncompressed NDJSON segments can be read again from a byte offset as they grow."""
+    suffix, compression = _suffixes(path)
+    return suffix in LINE_DELIMITED_SUFFIXES and not compression
+
+
+def open_text(path: str | os.PathLike) -> TextIO:
+    """Opens a batch file for reading, decompressing it on the fly if needed."""
+    compression = _suffixes(path)[1]
+    if compression == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if compression == ".zst":
+        return _open_zstd(path)
+    return open(path, "r", encoding="utf-8")
+
+
+def _open_zstd(path: str | os.PathLike) -> TextIO:
+    try:
+        from compression import zstd  # Python >= 3.14
+    except ImportError:
+        pass
+    else:
+        return zstd.open(path, "rt", encoding="utf-8")
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(f"Reading {path} requires the zstandard package") from e
+    stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def iter_ndjson(stream: TextIO) -> Iterator[Events]:
+    """Yields one event per non-blank line."""
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_appended(
+    path: str | os.PathLike,
+    offset: int = 0,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    errors: List[str] | None = None,
+) -> Iterator[Tuple[int, Events]]:
+    """
+    Reads the events appended to an NDJSON segment since byte `offset`.
+
+    Yields (offset after the event, event) so the caller can resume from the
+    last complete event. A trailing line without newline is only consumed
+    when it already holds a complete object; otherwise the writer is still
+    busy with it and it is left for the next call. A file shorter than
+    `offset` was truncated or replaced and is read from the start.
+
+    A complete line that is not valid JSON is skipped, so that it cannot stop
+    the segment at the same offset forever: (offset after it, None) is yielded
+    in its place and its error is appended to `errors`.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < offset:
+            offset = 0
+        f.seek(offset)
+        position = offset
+        pending = b""
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            lines = (pending + block).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                position += len(line) + 1
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError as e:
+                    if errors is not None:
+                        errors.append(f"Line ending at byte {position}: {e}")
+                    event = None
+                yield position, event
+
+    if pending.strip():
+        try:
+            event = json.loads(pending)
+        except ValueError:
+            return
+        if isinstance(event, dict):
+            yield position + len(pending), event
+
+
+def iter_events(
+    path: str | os.PathLike,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    small_file_size: int = SMALL_FILE_SIZE,
+) -> Iterator[Events]:
+    """
+    Yields the events of a batch file or segment as they are parsed, so
+    aggregation can start before a large file has been read.
+    """
+    suffix, compression = _suffixes(path)
+    if suffix in LINE_DELIMITED_SUFFIXES:
+        with open_text(path) as f:
+            yield from iter_ndjson(f)
+    elif compression:
+        with open_text(path) as f:
+            yield from iter_json(f, block_size)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            if os.fstat(f.fileno()).st_size <= small_file_size:
+                data = json.load(f)
+                yield from data if isinstance(data, list) else [data]
+            else:
+                yield from iter_json(f, block_size)
+
+
+def iter_chunks(
+    path: str | os.PathLike,
+    chunk_size: int = 1024,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    small_file_size: int = SMALL_FILE_SIZE,
+) -> Iterator[List[Events]]:
+    """Same as `iter_events`, grouped in lists of at most `chunk_size` events."""
+    chunk: List[Events] = []
+    for event in iter_events(path, block_size, small_file_size):
+        chunk.append(event)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,216 @@
+import heapq
+import itertools
+import math
+import random
+import sys
+from bisect import bisect_left
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+from src.heavy_hitters import CountMap
+
+
+def _uniform(rng: random.Random) -> float:
+    """Uniform on the open interval (0, 1), safe to take the log of."""
+    return rng.random() or 5e-324
+
+
+class SkipReservoir:
+    """
+    Uniform sample of `k` items from a stream (Algorithm L, Li 1994).
+
+    Instead of drawing a random number per item, the position of the next
+    replacement is drawn from a geometric distribution, so once the
+    reservoir is full a whole column is consumed in O(replacements) and a
+    batch with none is skipped in O(1). Optionally keeps the exact counts of
+    the sampled values in a shared CountMap.
+    """
+
+    def __init__(self, k: int, rng: random.Random | None = None, counts: CountMap | None = None):
+        self.k = k
+        self.items: List[Hashable] = []
+        self.seen = 0
+        self.counts = counts
+        self._rng = rng or random.Random()
+        self._w = 1.0
+        # Stream position of the next item to go into the reservoir
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def extend(self, values: Sequence[Hashable]) -> None:
+        """Offers a whole column of values; only the selected ones are read."""
+        n = len(values)
+        position = 0
+        items = self.items
+        counts = self.counts
+        while len(items) < self.k and position < n:
+            items.append(values[position])
+            if counts is not None:
+                counts.increment(values[position])
+            position += 1
+            if len(items) == self.k:
+                self._w = math.exp(math.log(_uniform(self._rng)) / self.k)
+                self._next = self.seen + position + self._skip()
+
+        end = self.seen + n
+        if len(items) == self.k:
+            rng = self._rng
+            while self._next < end:
+                value = values[self._next - self.seen]
+                slot = rng.randrange(self.k)
+                if counts is not None:
+                    counts.replace(items[slot], value)
+                items[slot] = value
+                self._w *= math.exp(math.log(_uniform(rng)) / self.k)
+                self._next += 1 + self._skip()
+        self.seen = end
+
+    def merge(self, other: "SkipReservoir") -> None:
+        """
+        Turns this sample into a uniform sample of both streams: each slot is
+        drawn from one side with probability proportional to the part of its
+        stream not yet represented.
+        """
+        rng = self._rng
+        mine, theirs = list(self.items), list(other.items)
+        rng.shuffle(mine)
+        rng.shuffle(theirs)
+        left, right = self.seen, other.seen
+        items: List[Hashable] = []
+        while len(items) < self.k and (mine or theirs):
+            if mine and (not theirs or rng.random() * (left + right) < left):
+                items.append(mine.pop())
+                left -= 1
+            else:
+                items.append(theirs.pop())
+                right -= 1
+        if self.counts is not None:
+            for item in self.items:
+                self.counts.decrement(item)
+            for item in items:
+                self.counts.increment(item)
+        self.items = items
+        self.seen += other.seen
+        if len(items) == self.k:
+            self._w = math.exp(math.log(_uniform(rng)) / self.k)
+            self._next = self.seen + self._skip()
+
+    def _skip(self) -> int:
+        # Items to pass over before the next replacement
+        if self._w >= 1.0:
+            return 0
+        if self._w <= 0.0:
+            return sys.maxsize
+        return int(math.log(_uniform(self._rng)) / math.log1p(-self._w))
+
+
+class StratifiedReservoir:
+    """
+    A SkipReservoir of `k` items per stratum (e.g. per service), so rare
+    strata are represented however skewed the stream is. The counts of all
+    strata together are kept in `counts`.
+    """
+
+    def __init__(self, k: int, rng: random.Random | None = None):
+        self.k = k
+        self.strata: Dict[str, SkipReservoir] = {}
+        self.counts = CountMap()
+        self._rng = rng or random.Random()
+
+    def extend(self, values: Sequence[Hashable], strata: Sequence[int], names: Sequence[str]) -> None:
+        """
+        Offers a column of values with, per value, the index of its stratum in
+        `names` (the service_ids and service_names columns of a batch).
+        """
+        if len(names) == 1:
+            self._reservoir(names[0]).extend(values)
+            return
+        groups: List[List[int]] = [[] for _ in names]
+        appends = [group.append for group in groups]
+        for position, stratum in enumerate(strata):
+            appends[stratum](position)
+        for name, group in zip(names, groups):
+            if group:
+                self._reservoir(name).extend([values[position] for position in group])
+
+    def _reservoir(self, name: str) -> SkipReservoir:
+        reservoir = self.strata.get(name)
+        if reservoir is None:
+            reservoir = self.strata[name] = SkipReservoir(self.k, self._rng, self.counts)
+        return reservoir
+
+
+class WeightedReservoir:
+    """
+    Weighted sample of `k` items without replacement (A-Res, Efraimidis &
+    Spirakis 2006), where an item's chance to be kept grows with its weight.
+
+    Each kept item has key u ** (1 / weight). Once the reservoir is full the
+    exponential jumps variant (A-ExpJ) draws how much weight to pass over
+    before the next insertion, found with a binary search over the column's
+    cumulative weights, so random numbers are only drawn for insertions.
+    Items with a weight <= 0 are never sampled.
+    """
+
+    def __init__(self, k: int, rng: random.Random | None = None):
+        self.k = k
+        # Min-heap of (key, sequence number, value)
+        self.heap: List[Tuple[float, int, Hashable]] = []
+        self.counts = CountMap()
+        self.seen = 0
+        self._rng = rng or random.Random()
+        # Weight left to pass over before the next insertion
+        self._remaining = 0.0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    @property
+    def items(self) -> List[Hashable]:
+        return [value for _, _, value in self.heap]
+
+    def extend(self, values: Sequence[Hashable], weights: Sequence[float]) -> None:
+        rng = self._rng
+        heap = self.heap
+        n = len(values)
+        position = 0
+        while len(heap) < self.k and position < n:
+            weight = weights[position]
+            if weight > 0:
+                key = _uniform(rng) ** (1.0 / weight)
+                heapq.heappush(heap, (key, self.seen + position, values[position]))
+                self.counts.increment(values[position])
+                if len(heap) == self.k:
+                    self._remaining = self._jump()
+            position += 1
+
+        if len(heap) == self.k and position < n:
+            cumulative = list(itertools.accumulate(w if w > 0 else 0.0 for w in weights[position:]))
+            base = 0.0
+            index = -1
+            while True:
+                index = bisect_left(cumulative, base + self._remaining, index + 1)
+                # A zero jump lands on the first item that adds weight
+                while index < len(cumulative) and cumulative[index] == base:
+                    index += 1
+                if index == len(cumulative):
+                    self._remaining -= cumulative[-1] - base
+                    break
+                weight = weights[position + index]
+                threshold = heap[0][0] ** weight
+                key = rng.uniform(threshold, 1.0) ** (1.0 / weight)
+                value = values[position + index]
+                _, _, evicted = heapq.heapreplace(heap, (key, self.seen + position + index, value))
+                self.counts.replace(evicted, value)
+                base = cumulative[index]
+                self._remaining = self._jump()
+        self.seen += n
+
+    def _jump(self) -> float:
+        smallest = self.heap[0][0]
+        if smallest <= 0.0:
+            return 0.0
+        if smallest >= 1.0:
+            return math.inf
+        return math.log(_uniform(self._rng)) / math.log(smallest)
@@ -0,0 +1,265 @@
+import copy
+import multiprocessing
+import os
+import pathlib
+import time
+import zlib
+from typing import Callable, Dict, Generator, List, Sequence, Tuple
+
+from src.batch import EventBatch
+from src.checkpoint import Checkpointer
+from src.domain import Result
+from src.engine import Engine, Operator, default_operators
+from src.ingest import read_batches
+from src.reader import is_tailable
+from src.source import START_CURSOR, DirectoryTailer
+
+# Version of the checkpoint contents; the shards' engine states are part of
+# them, so this is bumped along with engine.CHECKPOINT_SCHEMA too
+CHECKPOINT_SCHEMA = 1
+
+OperatorFactory = Callable[[], Sequence[Operator]]
+
+
+def shard_of(service: str, shards: int) -> int:
+    """Owner of a service; stable across processes and restarts."""
+    return zlib.crc32(service.encode("utf-8")) % shards
+
+
+def split_by_shard(batch: EventBatch, shards: int) -> List[EventBatch | None]:
+    """The rows of `batch` owned by each shard, None where a shard owns none."""
+    parts: List[EventBatch | None] = [None] * shards
+    if not len(batch):
+        return parts
+    owners = [shard_of(name, shards) for name in batch.service_names]
+    if len(set(owners)) == 1:
+        parts[owners[0]] = batch
+        return parts
+    rows: List[List[int]] = [[] for _ in range(shards)]
+    appends = [row.append for row in rows]
+    for position, sid in enumerate(batch.service_ids):
+        appends[owners[sid]](position)
+    for shard, positions in enumerate(rows):
+        if positions:
+            parts[shard] = batch.take(positions)
+    return parts
+
+
+def _run_shard(
+    index: int,
+    factory: OperatorFactory,
+    state: Dict | None,
+    inboxes: Sequence,
+    outbox,
+    chunk_size: int,
+) -> None:
+    """
+    Worker loop. Decodes the files it is handed, keeps the rows of the
+    services it owns and sends the others to their owners; once every peer has
+    finished a tick, acknowledges it to the coordinator, with a snapshot of
+    its operators if one was asked for.
+    """
+    shards = len(inboxes)
+    inbox = inboxes[index]
+    engine = Engine(factory())
+    if state is not None:
+        engine.restore(state)
+    # tick -> (offsets reached, snapshot wanted), once this shard has decoded it
+    decoded: Dict[int, Tuple[Dict[str, int], bool]] = {}
+    # tick -> number of peers that have sent all their rows for it
+    finished: Dict[int, int] = {}
+
+    try:
+        while True:
+            message = inbox.get()
+            kind, tick = message[0], message[1]
+            if kind == "stop":
+                return
+            if kind == "rows":
+                engine.update(message[2])
+                continue
+            if kind == "done":
+                finished[tick] = finished.get(tick, 0) + 1
+            elif kind == "files":
+                offsets: Dict[str, int] = {}
+                for path, offset in message[2]:
+                    for batch in read_batches(path, offset, chunk_size):
+                        if is_tailable(path):
+                            offsets[batch.source] = batch.offset
+                        for shard, part in enumerate(split_by_shard(batch, shards)):
+                            if part is None:
+                                continue
+                            if shard == index:
+                                engine.update(part)
+                            else:
+                                inboxes[shard].put(("rows", tick, part))
+                for shard in range(shards):
+                    if shard != index:
+                        inboxes[shard].put(("done", tick))
+                decoded[tick] = (offsets, message[3])
+
+            if tick in decoded and finished.get(tick, 0) == shards - 1:
+                offsets, snapshot = decoded.pop(tick)
+                finished.pop(tick, None)
+                outbox.put(("ack", index, tick, offsets, engine.state() if snapshot else None))
+    except BaseException as e:
+        outbox.put(("error", index, -1, e, None))
+
+
+class ShardedEngine:
+    """
+    Runs the engine's operators over `shards` worker processes.
+
+    Every tick's files are spread over the workers by size, so parsing runs
+    on all cores. Rows are then hash-partitioned by service: each worker owns
+    a fixed set of services and keeps the counters, reservoirs, Bloom filters
+    and windows for them, so no service's state is split. When asked, the
+    workers send snapshots that the coordinator merges into global Results.
+    """
+
+    def __init__(
+        self,
+        shards: int,
+        factory: OperatorFactory = default_operators,
+        states: Sequence[Dict] | None = None,
+        chunk_size: int = 1024,
+    ):
+        if shards < 1:
+            raise ValueError("At least one shard is required")
+        self.shards = shards
+        self.factory = factory
+        self.chunk_size = chunk_size
+        self._context = multiprocessing.get_context()
+        self._inboxes = [self._context.Queue() for _ in range(shards)]
+        self._outbox = self._context.Queue()
+        self._processes = [
+            self._context.Process(
+                target=_run_shard,
+                args=(i, factory, states[i] if states else None, self._inboxes, self._outbox, chunk_size),
+                name=f"shard-{i}",
+                daemon=True,
+            )
+            for i in range(shards)
+        ]
+        for process in self._processes:
+            process.start()
+        self._tick = 0
+        # Empty operators that snapshots are restored into before merging
+        self._template = Engine(factory())
+
+    def process(
+        self,
+        files: Sequence[Tuple[pathlib.Path, int]],
+        snapshot: bool = False,
+    ) -> Tuple[Dict[str, int], List[Dict] | None]:
+        """
+        Processes the (path, byte offset) pairs of one tick on all shards and
+        returns the offsets reached, plus each shard's snapshot if asked for.
+        """
+        self._tick += 1
+        assigned: List[List[Tuple[str, int]]] = [[] for _ in range(self.shards)]
+        loads = [0] * self.shards
+        for path, offset in sorted(files, key=lambda item: -_size(item[0])):
+            shard = loads.index(min(loads))
+            assigned[shard].append((str(path), offset))
+            loads[shard] += _size(path) - offset
+        for inbox, paths in zip(self._inboxes, assigned):
+            inbox.put(("files", self._tick, paths, snapshot))
+
+        offsets: Dict[str, int] = {}
+        states: List[Dict | None] = [None] * self.shards
+        for _ in range(self.shards):
+            kind, index, tick, payload, state = self._outbox.get()
+            if kind == "error":
+                raise payload
+            offsets.update(payload)
+            states[index] = state
+        return offsets, (states if snapshot else None)
+
+    def merge(self, states: Sequence[Dict]) -> Engine:
+        """Combines shard snapshots into one engine holding the global state."""
+        merged = copy.deepcopy(self._template)
+        for state in states:
+            shard = copy.deepcopy(self._template)
+            shard.restore(state)
+            merged.merge(shard)
+        return merged
+
+    def close(self) -> None:
+        for inbox in self._inboxes:
+            inbox.put(("stop", 0))
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def __enter__(self) -> "ShardedEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _size(path: str | os.PathLike) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def compute(
+    data_path: str,
+    shards: int | None = None,
+    factory: OperatorFactory = default_operators,
+    merge_interval: float = 1.0,
+    checkpoint_path: str | None = None,
+    checkpoint_interval: float = 30.0,
+    max_tracked: int = 1024,
+) -> Generator[Dict[str, Result], None, None]:
+    """
+    Like engine.compute, but on `shards` processes (one per core by default).
+    Shard snapshots are merged at most every `merge_interval` seconds, and a
+    dict of Results by operator name is yielded after each merge.
+    """
+    shards = shards or os.cpu_count() or 1
+    cursor = START_CURSOR
+    offsets: Dict[str, int] = {}
+    states = None
+
+    checkpointer = None
+    if checkpoint_path is not None:
+        checkpointer = Checkpointer(checkpoint_path, checkpoint_interval, schema=CHECKPOINT_SCHEMA)
+        state = checkpointer.load()
+        # Services are owned by shard count, so a snapshot only fits the same count
+        if state is not None and len(state["shards"]) == shards:
+            states = state["shards"]
+            cursor = state["cursor"]
+            offsets = state["offsets"]
+
+    last_merge = float("-inf")
+    last_save = time.monotonic()
+    with ShardedEngine(shards, factory, states) as engine, DirectoryTailer(data_path, cursor=cursor) as tailer:
+        while True:
+            files = tailer.poll(timeout=1.0)
+            if not files:
+                continue
+            now = time.monotonic()
+            save = checkpointer is not None and now - last_save >= checkpoint_interval
+            snapshot = save or now - last_merge >= merge_interval
+            reached, states = engine.process([(path, offsets.get(str(path), 0)) for path in files], snapshot)
+
+            # Segments that may still grow, most recently read last
+            for source, offset in reached.items():
+                offsets.pop(source, None)
+                offsets[source] = offset
+            while len(offsets) > max_tracked:
+                del offsets[next(iter(offsets))]
+
+            if states is None:
+                continue
+            if save:
+                checkpointer.save({"cursor": tailer.cursor, "offsets": dict(offsets), "shards": states})
+                last_save = now
+            last_merge = now
+            yield engine.merge(states).results()
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import os
+import pathlib
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, List, Tuple
+
+Record = Dict[str, Any]
+
+
+class SinkError(Exception):
+    """A batch was refused by the receiving system."""
+
+
+class HttpTransport:
+    """
+    POSTs NDJSON bodies to `url` over a pool of at most `pool_size`
+    keep-alive HTTP/1.1 connections, reused across batches. With `unix_socket`
+    the connections go to that socket instead of the URL's host, which is how
+    local agents usually listen. Any status outside 2xx raises SinkError.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 4,
+        timeout: float = 10.0,
+        unix_socket: str | os.PathLike | None = None,
+    ):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.path = parts.path or "/"
+        if parts.query:
+            self.path += f"?{parts.query}"
+        self.unix_socket = None if unix_socket is None else os.fspath(unix_socket)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots: asyncio.Semaphore | None = None
+
+    async def send(self, body: bytes) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            reader, writer = self._idle.pop() if self._idle else await self._connect()
+            try:
+                status, keep_alive = await asyncio.wait_for(self._exchange(reader, writer, body), self.timeout)
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+        if not 200 <= status < 300:
+            raise SinkError(f"HTTP {status} from {self.host}{self.path}")
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self.unix_socket is not None:
+            connection = asyncio.open_unix_connection(self.unix_socket)
+        else:
+            connection = asyncio.open_connection(self.host, self.port)
+        return await asyncio.wait_for(connection, self.timeout)
+
+    async def _exchange(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        body: bytes,
+    ) -> Tuple[int, bool]:
+        writer.write(
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            "Content-Type: application/x-ndjson\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the server")
+        version, status = status_line.split(None, 2)[:2]
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length:
+            await reader.readexactly(length)
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" and (version == b"HTTP/1.1" or connection == "keep-alive")
+        return int(status), keep_alive and "content-length" in headers
+
+
+class ForwardingSink:
+    """
+    Forwards records to another system in batches, off the caller's thread.
+
+    `submit` only appends to a buffer. A batch goes out once it holds
+    `max_batch` records or its oldest record is `max_delay` seconds old, from
+    an asyncio loop in a background thread, so slow sends overlap with
+    processing and with each other (up to the transport's pool size).
+
+    At most `max_pending` records may be buffered or in flight; past that
+    `submit` blocks, which slows the producer down instead of growing memory.
+    A batch that still fails after `retries` retries with exponential
+    backoff is written to `spool_dir`. Spooled batches, including those left
+    by a previous run, are sent again oldest first after the next successful
+    send.
+    Without a spool directory, or when spooling fails, such a batch is
+    dropped and counted, as is one holding a record that is not JSON
+    serializable.
+    """
+
+    def __init__(
+        self,
+        transport: HttpTransport,
+        max_batch: int = 500,
+        max_delay: float = 0.5,
+        max_pending: int = 10000,
+        retries: int = 3,
+        backoff: float = 0.1,
+        spool_dir: str | os.PathLike | None = None,
+    ):
+        self.transport = transport
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.retries = retries
+        self.backoff = backoff
+        self.spool_dir = None if spool_dir is None else pathlib.Path(spool_dir)
+        if self.spool_dir is not None:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.sent = 0
+        self.spooled = 0
+        self.dropped = 0
+        self.failures = 0
+        self._buffer: List[Record] = []
+        self._buffered_at = 0.0
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._replaying = False
+
+    def start(self) -> "ForwardingSink":
+        if self._thread is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="forwarding-sink", daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self._tick(), self._loop)
+        return self
+
+    def submit(self, record: Record) -> None:
+        self.start()
+        with self._condition:
+            while self._pending >= self.max_pending:
+                self._condition.wait()
+            if not self._buffer:
+                self._buffered_at = time.monotonic()
+            self._buffer.append(record)
+            self._pending += 1
+            if len(self._buffer) >= self.max_batch:
+                self._dispatch()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Sends what is buffered and waits until nothing is in flight; False on timeout."""
+        if self._thread is None:
+            return True
+        with self._condition:
+            if self._buffer:
+                self._dispatch()
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self.flush()
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+
+    def __enter__(self) -> "ForwardingSink":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _dispatch(self) -> None:
+        # Called with the condition held
+        batch, self._buffer = self._buffer, []
+        self._loop.call_soon_threadsafe(self._loop.create_task, self._deliver(batch))
+
+    async def _shutdown(self) -> None:
+        # Nothing is in flight after a flush: only the timer is left
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.transport.close()
+
+    async def _tick(self) -> None:
+        # Time-based flushing
+        while True:
+            await asyncio.sleep(self.max_delay / 2)
+            with self._condition:
+                if self._buffer and time.monotonic() - self._buffered_at >= self.max_delay:
+                    self._dispatch()
+
+    async def _deliver(self, batch: List[Record]) -> None:
+        try:
+            try:
+                body = "".join(json.dumps(record) + "\n" for record in batch).encode("utf-8")
+            except (TypeError, ValueError):
+                # A record that cannot be serialized would fail again on every retry
+                self.dropped += len(batch)
+                return
+            delivered = await self._send(body)
+            if delivered:
+                self.sent += len(batch)
+                # The receiver is reachable again: catch up before reporting the
+                # batch done, so a flush also waits for the spool
+                await self._replay()
+            elif self.spool_dir is not None:
+                try:
+                    self._spool(body)
+                    self.spooled += len(batch)
+                except OSError:
+                    self.dropped += len(batch)
+            else:
+                self.dropped += len(batch)
+        finally:
+            # Whatever happened, the batch is no longer pending, or flush and
+            # submit would wait for it forever
+            with self._condition:
+                self._pending -= len(batch)
+                self._condition.notify_all()
+
+    async def _send(self, body: bytes) -> bool:
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                await self.transport.send(body)
+                return True
+            except (OSError, EOFError, asyncio.TimeoutError, SinkError, ValueError):
+                # EOFError covers asyncio.IncompleteReadError, a body cut short
+                self.failures += 1
+        return False
+
+    def _spool(self, body: bytes) -> None:
+        name = f"{time.time_ns():020d}-{id(body):x}.ndjson"
+        tmp_path = self.spool_dir / f".{name}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(body)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.spool_dir / name)
+
+    async def _replay(self) -> None:
+        if self.spool_dir is None or self._replaying:
+            return
+        self._replaying = True
+        try:
+            for path in sorted(self.spool_dir.glob("*.ndjson")):
+                body = path.read_bytes()
+                if not await self._send(body):
+                    return
+                path.unlink()
+                self.sent += body.count(b"\n")
+        finally:
+            self._replaying = False
@@ -0,0 +1,143 @@
+import math
+from typing import Dict, Iterable
+
+# Relative accuracy of the quantiles
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Bins kept per sketch; with 1% accuracy 2048 bins span about 18 orders of magnitude
+DEFAULT_MAX_BINS = 2048
+
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with relative error guarantees (DDSketch,
+    Masson et al., VLDB 2019).
+
+    A positive value x is counted in bin ceil(log_gamma(x)), with gamma =
+    (1 + a) / (1 - a). Every value of a bin is within a relative distance `a`
+    of the bin's representative, so any quantile q is answered with a value
+    within a factor (1 ± a) of the true q-quantile. Values <= 0 are counted
+    apart and reported as 0.
+
+    Memory is at most `max_bins` bins whatever the number of values. Once more
+    bins are needed the lowest ones are collapsed into one, so the guarantee
+    keeps holding for quantiles above the collapsed range, which for
+    latencies (p50 and up) means always in practice. Two sketches with the
+    same parameters merge by adding bin counts, and the result is the sketch
+    of the union.
+    """
+
+    __slots__ = ("relative_accuracy", "max_bins", "bins", "zero_count", "count", "total", "min", "max", "_gamma_log")
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        max_bins: int = DEFAULT_MAX_BINS,
+    ):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._gamma_log = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+
+    def __getstate__(self) -> dict:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __setstate__(self, state: dict) -> None:
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value: float | None) -> None:
+        # Missing values (None or NaN) are skipped
+        if value is None or value != value:
+            return
+        if value > 0:
+            key = math.ceil(math.log(value) / self._gamma_log)
+            bins = self.bins
+            bins[key] = bins.get(key, 0) + 1
+            if len(bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "DDSketch") -> None:
+        if other._gamma_log != self._gamma_log:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        bins = self.bins
+        for key, count in other.bins.items():
+            bins[key] = bins.get(key, 0) + count
+        if len(bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile `q` in [0, 1]; NaN for an empty sketch."""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # Midpoint of the bin in relative terms: within `a` of any value in it
+                value = 2 * math.exp(key * self._gamma_log) / (1 + math.exp(self._gamma_log))
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def gamma_log(self) -> float:
+        """ln(gamma): a value x > 0 goes to bin ceil(ln(x) / gamma_log)."""
+        return self._gamma_log
+
+    def merge_bins(
+        self,
+        bins: Dict[int, int],
+        zero_count: int = 0,
+        total: float = 0.0,
+        minimum: float = math.inf,
+        maximum: float = -math.inf,
+    ) -> None:
+        """Adds values already binned elsewhere (e.g. by a dataframe engine) with this sketch's gamma."""
+        for key, count in bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += zero_count
+        self.count += sum(bins.values()) + zero_count
+        self.total += total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def _collapse(self) -> None:
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        lowest = keys[excess]
+        self.bins[lowest] += sum(self.bins.pop(key) for key in keys[:excess])
@@ -0,0 +1,254 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import pathlib
+import select
+import struct
+import sys
+import time
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from src.reader import INPUT_PATTERNS, is_tailable
+
+# A cursor orders files by (arrival time in ns, file name). Everything at or
+# below the cursor has already been handed out, so no per-file set is kept.
+Cursor = Tuple[int, str]
+
+START_CURSOR: Cursor = (0, "")
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _arrival(stat: os.stat_result) -> int:
+    """
+    When a file landed: the later of its mtime and ctime. A file moved or
+    renamed into the directory keeps its mtime, but on POSIX systems the
+    rename sets its ctime, so it still sorts past the cursor. The price is
+    that a metadata change (chmod, touch) hands an old file out again.
+    """
+    return max(stat.st_mtime_ns, stat.st_ctime_ns)
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DirectoryTailer:
+    """
+    Hands out files that finished landing in a directory, in arrival order.
+
+    On Linux the directory is watched with inotify (IN_CLOSE_WRITE and
+    IN_MOVED_TO), so a tick costs O(new files). Elsewhere, or when inotify is
+    unavailable, the directory is polled and only entries past the cursor are
+    collected; a file must be `settle` seconds old before it is handed out so
+    writers have finished with it. Either way memory does not grow with
+    history.
+
+    NDJSON segments that are still being appended to are handed out again
+    each time they grow (IN_MODIFY, or a newer arrival time while polling),
+    without waiting for them to settle; the reader resumes them from the last
+    byte offset.
+    """
+
+    _fd = -1
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        pattern: str | Sequence[str] = INPUT_PATTERNS,
+        *,
+        cursor: Cursor = START_CURSOR,
+        use_inotify: bool | None = None,
+        interval: float = 0.25,
+        settle: float = 0.05,
+    ):
+        self.path = pathlib.Path(path)
+        self.patterns = (pattern,) if isinstance(pattern, str) else tuple(pattern)
+        self.interval = interval
+        self.settle = settle
+        self._cursor: Cursor = (cursor[0], cursor[1])
+        self._boundary: Cursor = self._cursor
+        self._fd = -1
+        self._pending: List[pathlib.Path] = []
+        # Arrival time of the unsettled segments handed out by the last scan
+        self._growing: Dict[str, int] = {}
+
+        if use_inotify is not False:
+            self._fd = self._start_inotify()
+            if use_inotify and self._fd < 0:
+                raise OSError(f"inotify is not available for {self.path}")
+
+        if self._fd >= 0:
+            # The watch is in place, so anything that already exists can be
+            # picked up by one scan without racing new arrivals.
+            self._pending = self._scan(settle=0.0)
+            self._boundary = self._cursor
+
+    @property
+    def cursor(self) -> Cursor:
+        """Position of the last file handed out; persist it to resume later."""
+        return self._cursor
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd >= 0
+
+    def poll(self, timeout: float | None = 0.0) -> List[pathlib.Path]:
+        """
+        Returns the files completed since the last call, oldest first. Waits up
+        to `timeout` seconds (forever if None) for at least one file to arrive.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._fd >= 0:
+                wait = 0.0 if self._pending else self._remaining(deadline)
+                files = self._pending + self._read_events(wait)
+                self._pending = []
+            else:
+                files = self._scan(self.settle)
+            if files or (deadline is not None and time.monotonic() >= deadline):
+                return files
+            if self._fd < 0:
+                remaining = self._remaining(deadline)
+                time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+
+    def __iter__(self) -> Iterator[pathlib.Path]:
+        while True:
+            yield from self.poll(timeout=None)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "DirectoryTailer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        self.close()
+
+    @staticmethod
+    def _remaining(deadline: float | None) -> float | None:
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+
+    def _matches(self, name: str) -> bool:
+        return not name.startswith(".") and any(fnmatch.fnmatch(name, p) for p in self.patterns)
+
+    def _scan(self, settle: float) -> List[pathlib.Path]:
+        """Collects the entries past the cursor and advances it."""
+        limit = time.time_ns() - int(settle * 1e9)
+        found: List[Cursor] = []
+        growing: List[Cursor] = []
+        try:
+            entries = os.scandir(self.path)
+        except FileNotFoundError:
+            return []
+        with entries:
+            for entry in entries:
+                if not self._matches(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    key = (_arrival(entry.stat()), entry.name)
+                except FileNotFoundError:
+                    continue
+                if key <= self._cursor:
+                    continue
+                # Anything newer than `limit` may still be written to; leaving
+                # it for the next scan also guarantees later arrivals cannot
+                # land behind the cursor within the same timestamp tick.
+                if key[0] <= limit:
+                    found.append(key)
+                elif is_tailable(entry.name):
+                    # Read up to its last complete line, but keep the cursor
+                    # behind it so it is offered again until it settles
+                    growing.append(key)
+        if found:
+            found.sort()
+            self._cursor = found[-1]
+        previous = self._growing
+        self._growing = {name: arrival for arrival, name in growing}
+        growing = [(arrival, name) for arrival, name in growing if previous.get(name) != arrival]
+        return [self.path / name for _, name in sorted(found + growing)]
+
+    def _start_inotify(self) -> int:
+        libc = _load_inotify()
+        if libc is None:
+            return -1
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return -1
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MODIFY
+        wd = libc.inotify_add_watch(fd, os.fsencode(self.path), mask)
+        if wd < 0:
+            os.close(fd)
+            return -1
+        return fd
+
+    def _read_events(self, timeout: float | None) -> List[pathlib.Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+
+        # Appends to a segment raise one IN_MODIFY per write; keep one entry per file
+        files: dict = {}
+        overflow = False
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & IN_ISDIR or not self._matches(name):
+                    continue
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) or is_tailable(name):
+                    path = self._accept(name)
+                    if path is not None:
+                        files[path] = None
+
+        if overflow:
+            # The kernel dropped events; the cursor tells us what is missing.
+            files.update(dict.fromkeys(self._scan(settle=0.0)))
+        return list(files)
+
+    def _accept(self, name: str) -> pathlib.Path | None:
+        path = self.path / name
+        try:
+            key = (_arrival(path.stat()), name)
+        except FileNotFoundError:
+            return None
+        # Files closed between adding the watch and the initial scan are
+        # reported twice; the boundary left by that scan filters them out.
+        if key <= self._boundary:
+            return None
+        if key > self._cursor:
+            self._cursor = key
+        return path
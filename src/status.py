@@ -0,0 +1,41 @@
+import re
+from array import array
+from typing import Dict, Iterable, List, Sequence
+
+STATUS_PREFIX = "HTTP Status Code:"
+SUCCESS = 200
+# Status of a message that does not carry an HTTP status code
+NO_STATUS = 0
+
+# Producers emit a handful of exact templates, so the common case is a single
+# dict lookup; anything else falls back to one regex search per distinct message.
+TEMPLATES: Dict[str, int] = {f"{STATUS_PREFIX} {code}": code for code in range(100, 600)}
+_PATTERN = re.compile(re.escape(STATUS_PREFIX) + r"\s*(\d{3})(?!\d)")
+
+
+def lookup(message: str) -> int:
+    """Returns the HTTP status code in `message`, or NO_STATUS."""
+    code = TEMPLATES.get(message)
+    if code is not None:
+        return code
+    match = _PATTERN.search(message)
+    return int(match.group(1)) if match else NO_STATUS
+
+
+def lookup_table(messages: Iterable[str]) -> List[int]:
+    """Status code of each distinct message of a batch's message table."""
+    get = TEMPLATES.get
+    return [get(message) or lookup(message) for message in messages]
+
+
+def extract(message_table: Sequence[str], message_ids: Iterable[int]) -> array:
+    """
+    Status codes of a whole batch as a uint16 column. Every distinct message
+    is resolved once; events only index into the result.
+    """
+    by_message = lookup_table(message_table)
+    return array("H", map(by_message.__getitem__, message_ids))
+
+
+def is_error(code: int) -> bool:
+    return 400 <= code < 600
@@ -1,80 +1,242 @@
-import json
-import os
-from typing import Dict, Any, Generator
+import math
+from typing import Dict, Generator, List, Sequence
 # FIX: Ensure datetime is imported for use in compute
 from datetime import datetime 
-from src.domain import Result
+from src import status
+from src.batch import EventBatch
+from src.domain import Result, ServiceStats
+from src.checkpoint import Checkpointer
+from src.pipeline import Pipeline
+from src.source import START_CURSOR
 
+# Half-lives (seconds of event time) of the decayed success rates
+DEFAULT_HALF_LIVES = (60.0, 600.0, 3600.0)
+# Version of the checkpoint contents; bumped whenever their layout changes
+CHECKPOINT_SCHEMA = 1
 
-def process_log(log_event: Dict[str, Any], service_metrics: Dict[str, Dict[str, int]]) -> None:
-    service_name = log_event.get("service")
-    message = log_event.get("message", "")
 
-    if service_name not in service_metrics:
-        service_metrics[service_name] = {
-            "success_count": 0,
-            "log_count": 0
-        }
+class ServiceMetrics:
+    """
+    Running statistics of every service, stored column by column.
 
-    # Success criteria: message contains "HTTP Status Code: 200"
-    is_success = "HTTP Status Code: 200" in message
+    Each service gets a slot in flat lists, so folding in an event costs a few
+    list writes and no per-event dict lookups. Per service it keeps the event
+    and success counts, Welford's mean and variance of the inter-arrival gaps
+    (seconds between consecutive events, whatever their status, not the
+    success indicator), and a success rate decayed in event time for every
+    half-life in `half_lives`. An event older than the newest one seen for its
+    service is weighted down by its age instead of rewinding the decay.
 
-    if is_success:
-        service_metrics[service_name]["success_count"] += 1
+    `snapshot()` is cached until the next change, so reporting the services
+    after a tick that added nothing does not rebuild them.
+    """
 
-    service_metrics[service_name]["log_count"] += 1
+    def __init__(self, half_lives: Sequence[float] = DEFAULT_HALF_LIVES):
+        self.half_lives = tuple(float(h) for h in half_lives)
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.counts: List[int] = []
+        self.successes: List[int] = []
+        self.last_seen: List[float] = []
+        self.intervals: List[int] = []
+        self.interval_mean: List[float] = []
+        self.interval_m2: List[float] = []
+        # One column per half-life, decayed as of `last_seen`
+        self.decayed_weight: List[List[float]] = [[] for _ in self.half_lives]
+        self.decayed_success: List[List[float]] = [[] for _ in self.half_lives]
+        self._snapshot: Dict[str, ServiceStats] | None = None
 
+    def slot(self, service: str) -> int:
+        slot = self.index.get(service)
+        if slot is None:
+            slot = self.index[service] = len(self.names)
+            self.names.append(service)
+            for column in (self.counts, self.successes, self.intervals):
+                column.append(0)
+            for column in (self.last_seen, self.interval_mean, self.interval_m2):
+                column.append(0.0)
+            for column in self.decayed_weight + self.decayed_success:
+                column.append(0.0)
+        return slot
 
-def get_service_average(service_metrics: Dict[str, Dict[str, int]], service_name: str) -> float:
-    """Calculates the success rate (float) for a specific service."""
-    metrics = service_metrics.get(service_name)
-    
-    if not metrics:
-        return 0.0
-        
-    count = metrics["log_count"]
-    successes = metrics["success_count"]
-    
-    return (successes / count) if count > 0 else 0.0
+    def success_rate(self, service: str) -> float:
+        slot = self.index.get(service)
+        if slot is None or not self.counts[slot]:
+            return 0.0
+        return self.successes[slot] / self.counts[slot]
 
+    def snapshot(self) -> Dict[str, ServiceStats]:
+        if self._snapshot is not None:
+            return self._snapshot
+        stats = {}
+        for slot, name in enumerate(self.names):
+            intervals = self.intervals[slot]
+            stats[name] = ServiceStats(
+                count=self.counts[slot],
+                success_rate=self.success_rate(name),
+                mean_interarrival=self.interval_mean[slot],
+                interarrival_variance=self.interval_m2[slot] / (intervals - 1) if intervals > 1 else 0.0,
+                decayed_success_rate={
+                    half_life: (hits[slot] / weights[slot]) if weights[slot] else 0.0
+                    for half_life, weights, hits in zip(self.half_lives, self.decayed_weight, self.decayed_success)
+                },
+            )
+        self._snapshot = stats
+        return stats
 
-def compute(data_path: str) -> Generator[Result, None, None]:
-    service_metrics: Dict[str, Dict[str, int]] = {}
-    processed_files = set()
-    newest_timestamp = 0.0
-    oldest_timestamp = float('inf')
+    def merge(self, other: "ServiceMetrics") -> None:
+        """Folds in the statistics of another shard of the stream."""
+        if other.half_lives != self.half_lives:
+            raise ValueError("Cannot merge metrics with different half-lives")
+        self._snapshot = None
+        rates = [math.log(2) / half_life for half_life in self.half_lives]
+        for other_slot, name in enumerate(other.names):
+            slot = self.slot(name)
+            self.counts[slot] += other.counts[other_slot]
+            self.successes[slot] += other.successes[other_slot]
 
-    while True:
-        try:
-            current_files = set(os.listdir(data_path))
-        except FileNotFoundError:
-            current_files = set()
-            
-        new_files = sorted(list(current_files - processed_files))
+            # Chan et al.'s pairwise update of Welford's mean and M2
+            n_a, n_b = self.intervals[slot], other.intervals[other_slot]
+            if n_b:
+                n = n_a + n_b
+                delta = other.interval_mean[other_slot] - self.interval_mean[slot]
+                self.interval_mean[slot] += delta * n_b / n
+                self.interval_m2[slot] += other.interval_m2[other_slot] + delta * delta * n_a * n_b / n
+                self.intervals[slot] = n
+
+            # Decay both sides to the later of the two reference times
+            last_a, last_b = self.last_seen[slot], other.last_seen[other_slot]
+            end = max(last_a, last_b)
+            for rate, weights, hits, other_weights, other_hits in zip(
+                rates, self.decayed_weight, self.decayed_success, other.decayed_weight, other.decayed_success
+            ):
+                factor_a = math.exp(-rate * (end - last_a))
+                factor_b = math.exp(-rate * (end - last_b))
+                weights[slot] = weights[slot] * factor_a + other_weights[other_slot] * factor_b
+                hits[slot] = hits[slot] * factor_a + other_hits[other_slot] * factor_b
+            self.last_seen[slot] = end
+
+    def state(self) -> dict:
+        return {key: value for key, value in self.__dict__.items() if key not in ("index", "_snapshot")}
+
+    @classmethod
+    def from_state(cls, state: dict, half_lives: Sequence[float] = DEFAULT_HALF_LIVES) -> "ServiceMetrics":
+        metrics = cls(half_lives)
+        decayed = state["half_lives"] == metrics.half_lives
+        for key, value in state.items():
+            # Decayed rates for other half-lives cannot be converted; start them over
+            if key in ("half_lives", "decayed_weight", "decayed_success") and not decayed:
+                continue
+            setattr(metrics, key, value)
+        if not decayed:
+            zeros = [0.0] * len(metrics.names)
+            metrics.decayed_weight = [list(zeros) for _ in metrics.half_lives]
+            metrics.decayed_success = [list(zeros) for _ in metrics.half_lives]
+        metrics.index = {name: slot for slot, name in enumerate(metrics.names)}
+        return metrics
 
-        if new_files:
-            for file_name in new_files:
-                file_path = os.path.join(data_path, file_name)
 
-                try:
-                    with open(file_path, 'r') as f:
-                        log_events = json.load(f)
-                except Exception:
-                    continue 
+def process_batch(batch: EventBatch, service_metrics: ServiceMetrics) -> None:
+    # Success criteria: the message carries "HTTP Status Code: 200"
+    service_metrics._snapshot = None
+    slots = [service_metrics.slot(name) for name in batch.service_names]
+    counts = service_metrics.counts
+    successes = service_metrics.successes
+    last_seen = service_metrics.last_seen
+    intervals = service_metrics.intervals
+    interval_mean = service_metrics.interval_mean
+    interval_m2 = service_metrics.interval_m2
+    decayed = list(zip(
+        [math.log(2) / half_life for half_life in service_metrics.half_lives],
+        service_metrics.decayed_weight,
+        service_metrics.decayed_success,
+    ))
+    exp = math.exp
+
+    for sid, ts, code in zip(batch.service_ids, batch.timestamps, batch.status_codes):
+        slot = slots[sid]
+        success = code == status.SUCCESS
+        counts[slot] += 1
+        if success:
+            successes[slot] += 1
+        if not ts:
+            continue
+
+        last = last_seen[slot]
+        if ts >= last:
+            if last:
+                gap = ts - last
+                n = intervals[slot] = intervals[slot] + 1
+                delta = gap - interval_mean[slot]
+                interval_mean[slot] += delta / n
+                interval_m2[slot] += delta * (gap - interval_mean[slot])
+            last_seen[slot] = ts
+            for rate, weights, hits in decayed:
+                factor = exp(-rate * (ts - last))
+                weights[slot] = weights[slot] * factor + 1.0
+                hits[slot] = hits[slot] * factor + success
+        else:
+            for rate, weights, hits in decayed:
+                factor = exp(-rate * (last - ts))
+                weights[slot] += factor
+                if success:
+                    hits[slot] += factor
+
+
+def get_service_average(service_metrics: ServiceMetrics, service_name: str) -> float:
+    """Calculates the success rate (float) for a specific service."""
+    return service_metrics.success_rate(service_name)
+
+
+def compute(
+    data_path: str,
+    checkpoint_path: str | None = None,
+    checkpoint_interval: float = 30.0,
+    workers: int = 0,
+    half_lives: Sequence[float] = DEFAULT_HALF_LIVES,
+) -> Generator[Result, None, None]:
+    """
+    Yields, after every tick, the success rate of "monitoring" as `value` and
+    the statistics of every service in `services`.
+    """
+    service_metrics = ServiceMetrics(half_lives)
+    newest_timestamp = 0.0
+    oldest_timestamp = float('inf')
+    cursor = START_CURSOR
+    offsets = None
 
-                if not isinstance(log_events, list):
-                    log_events = [log_events]
+    checkpointer = None
+    if checkpoint_path is not None:
+        checkpointer = Checkpointer(checkpoint_path, checkpoint_interval, schema=CHECKPOINT_SCHEMA)
+        state = checkpointer.load()
+        if state is not None:
+            service_metrics = ServiceMetrics.from_state(state["service_metrics"], half_lives)
+            newest_timestamp = state["newest_timestamp"]
+            oldest_timestamp = state["oldest_timestamp"]
+            cursor = state["cursor"]
+            offsets = state["offsets"]
 
-                for event in log_events:
-                    process_log(event, service_metrics)
+    with Pipeline.from_directory(data_path, cursor, offsets, workers) as pipeline:
+        for tick in pipeline.ticks():
+            # Unreadable or malformed files only contribute what was parsed
+            for batch in tick:
+                if not len(batch):
+                    continue
+                process_batch(batch, service_metrics)
 
-                    ts = event.get("timestamp", 0.0)
-                    if ts > newest_timestamp:
-                        newest_timestamp = ts
-                    if ts < oldest_timestamp and ts != 0.0:
-                        oldest_timestamp = ts
+                newest_timestamp = max(newest_timestamp, max(batch.timestamps))
+                oldest_timestamp = min(
+                    oldest_timestamp, min(filter(None, batch.timestamps), default=oldest_timestamp)
+                )
 
-                processed_files.add(file_name)
+            if checkpointer is not None:
+                checkpointer.maybe_save(lambda: {
+                    "cursor": tick.cursor,
+                    "offsets": tick.offsets,
+                    "service_metrics": service_metrics.state(),
+                    "newest_timestamp": newest_timestamp,
+                    "oldest_timestamp": oldest_timestamp,
+                })
 
             average_value = get_service_average(service_metrics, "monitoring") 
             
@@ -85,6 +247,7 @@ def compute(data_path: str) -> Generator[Result, None, None]:
                 value=average_value,
                 newest_considered=newest_dt,
                 oldest_considered=oldest_dt,
+                services=service_metrics.snapshot(),
             )
 
 
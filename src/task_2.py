@@ -1,88 +1,168 @@
 import json
 import os
 import time
-from typing import Dict, Any, Generator, List, Tuple
+from typing import Generator, Sequence
 from datetime import datetime, timedelta
+from src import status
 from src.domain import Result
+from src.checkpoint import Checkpointer
+from src.pipeline import Pipeline
+from src.sketch import DDSketch
+from src.source import START_CURSOR
+from src.window import PaneWindows, SlidingCounter, Watermark, WindowSpec, sliding
 
 # The sliding window is 60 seconds (1 minute)
 SLIDING_WINDOW_SECONDS = 60
-
-
-def is_failure(log_event: Dict[str, Any]) -> bool:
-    message = log_event.get("message", "")
-    return "HTTP Status Code: 200" not in message
-
-
-ServiceMetrics = Dict[str, List[Tuple[float, Dict[str, Any]]]]
-
-
-def compute(data_path: str) -> Generator[Result, None, None]:
-    failure_window: ServiceMetrics = {}
-    processed_files = set()
+# Extra views answered from shared 1-minute panes
+DEFAULT_WINDOWS = (sliding(60, "1m"), sliding(300, "5m"), sliding(900, "15m"), sliding(3600, "1h"))
+# Response time quantiles reported per service and window
+LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+# Version of the checkpoint contents; bumped whenever their layout changes
+CHECKPOINT_SCHEMA = 1
+
+
+def is_failure(code: int) -> bool:
+    return code != status.SUCCESS
+
+
+# Timestamps of the failures of each service; the events themselves are not kept
+ServiceMetrics = SlidingCounter
+
+
+def compute(
+    data_path: str,
+    checkpoint_path: str | None = None,
+    checkpoint_interval: float = 30.0,
+    workers: int = 0,
+    window_seconds: float = SLIDING_WINDOW_SECONDS,
+    windows: Sequence[WindowSpec] = DEFAULT_WINDOWS,
+    allowed_lateness: float = 0.0,
+) -> Generator[Result, None, None]:
+    """
+    Yields the failures of "monitoring" in the `window_seconds` before the
+    watermark as `value`, and the failures of every service in the last window
+    of each of `windows` (tumbling, hopping or sliding, all answered from the
+    same panes) that the watermark closed.
+
+    The watermark trails the newest timestamp by `allowed_lateness` seconds and
+    moves after every file. Out-of-order failures still inside the exact
+    window are counted; only events older than its start are dropped. The
+    pane views take late events while their window is open and refuse those
+    that would change a window already reported. The late, dropped and
+    refused counts are reported in `counters`. Events carrying
+    `response_time_ms` also feed a quantile sketch per service and pane, so
+    `latencies` holds p50/p95/p99 per window and service within 1% relative
+    error.
+    """
+    watermark = Watermark(allowed_lateness, horizon=window_seconds)
+    failure_window = SlidingCounter(window_seconds)
+    failure_panes = PaneWindows(windows) if windows else None
+    latency_panes = PaneWindows(windows, aggregate=DDSketch) if windows else None
     newest_timestamp = 0.0
     oldest_timestamp = float('inf')
-
-    while True:
-        # Get list of files in directory
-        current_files = set(os.listdir(data_path))
-        new_files = sorted(list(current_files - processed_files))
-
-        if new_files:
-            for file_name in new_files:
-                file_path = os.path.join(data_path, file_name)
-
-                try:
-                    with open(file_path, 'r') as f:
-                        log_events = json.load(f)
-                except Exception:
-                    continue
-
-                if not isinstance(log_events, list):
-                    log_events = [log_events]
-
-                for event in log_events:
-                    ts = event.get("timestamp", 0.0)
-                    service_name = event.get("service")
-
-                    if ts > newest_timestamp:
-                        newest_timestamp = ts
-                    if ts < oldest_timestamp and ts != 0.0:
-                        oldest_timestamp = ts
-
-                    if service_name and is_failure(event):
-                        if service_name not in failure_window:
-                            failure_window[service_name] = []
-                        failure_window[service_name].append((ts, event))
-
-                processed_files.add(file_name)
-
-            # Compute sliding window statistics
-            window_end_time = newest_timestamp
-            window_start_time = window_end_time - SLIDING_WINDOW_SECONDS
-            total_failures_in_window = 0
-
-            for service in failure_window:
-                failure_window[service] = [
-                    (ts, event)
-                    for ts, event in failure_window[service]
-                    if ts >= window_start_time
-                ]
-                total_failures_in_window += len(failure_window[service])
-
-            monitoring_failures_count = len(failure_window.get("monitoring", []))
-            average_value = float(monitoring_failures_count)
-
-            newest_dt = datetime.fromtimestamp(newest_timestamp)
-            oldest_dt = datetime.fromtimestamp(window_start_time)
-
-            yield Result(
-                value=average_value,
-                newest_considered=newest_dt,
-                oldest_considered=oldest_dt,
-            )
-
-        yield
+    cursor = START_CURSOR
+    offsets = None
+
+    checkpointer = None
+    if checkpoint_path is not None:
+        checkpointer = Checkpointer(checkpoint_path, checkpoint_interval, schema=CHECKPOINT_SCHEMA)
+        state = checkpointer.load()
+        if state is not None:
+            watermark = Watermark.from_state(state["watermark"])
+            watermark.allowed_lateness = allowed_lateness
+            watermark.horizon = window_seconds
+            failure_window = SlidingCounter.from_state(state["failure_window"])
+            if failure_panes is not None and state.get("failure_panes") is not None:
+                failure_panes.restore(state["failure_panes"])
+            if latency_panes is not None and state.get("latency_panes") is not None:
+                latency_panes.restore(state["latency_panes"])
+            newest_timestamp = state["newest_timestamp"]
+            oldest_timestamp = state["oldest_timestamp"]
+            cursor = state["cursor"]
+            offsets = state["offsets"]
+
+    with Pipeline.from_directory(data_path, cursor, offsets, workers) as pipeline:
+        # Only files that landed since the previous tick
+        for tick in pipeline.ticks(idle_timeout=1.0):
+            if tick is not None:
+                # Unreadable or malformed files only contribute what was parsed
+                for batch in tick:
+                    if not len(batch):
+                        continue
+                    newest_timestamp = max(newest_timestamp, max(batch.timestamps))
+                    oldest_timestamp = min(
+                        oldest_timestamp, min(filter(None, batch.timestamps), default=oldest_timestamp)
+                    )
+
+                    admit = watermark.admit
+                    add_failure = failure_window.add
+                    add_to_pane = failure_panes.add if failure_panes is not None else None
+                    add_latency = latency_panes.add if latency_panes is not None else None
+                    names = batch.service_names
+                    for sid, ts, code, response_time in zip(
+                        batch.service_ids, batch.timestamps, batch.status_codes, batch.response_times
+                    ):
+                        if not admit(ts) or not names[sid]:
+                            continue
+                        if is_failure(code):
+                            add_failure(names[sid], ts)
+                            if add_to_pane is not None:
+                                add_to_pane(names[sid], ts)
+                        if response_time >= 0 and add_latency is not None:
+                            add_latency(names[sid], ts, response_time)
+                    watermark.observe(max(batch.timestamps))
+
+                    # Evicts only the failures the watermark moved past
+                    failure_window.advance(watermark.value)
+                    if failure_panes is not None:
+                        failure_panes.advance(watermark.value)
+                        latency_panes.advance(watermark.value)
+
+                window_end_time = max(watermark.value, 0.0)
+                window_start_time = window_end_time - failure_window.seconds
+
+                if checkpointer is not None:
+                    checkpointer.maybe_save(lambda: {
+                        "cursor": tick.cursor,
+                        "offsets": tick.offsets,
+                        "watermark": watermark.state(),
+                        "failure_window": failure_window.state(),
+                        "failure_panes": failure_panes.state() if failure_panes is not None else None,
+                        "latency_panes": latency_panes.state() if latency_panes is not None else None,
+                        "newest_timestamp": newest_timestamp,
+                        "oldest_timestamp": oldest_timestamp,
+                    })
+
+                monitoring_failures_count = failure_window.count("monitoring", until=window_end_time)
+                average_value = float(monitoring_failures_count)
+
+                newest_dt = datetime.fromtimestamp(window_end_time)
+                oldest_dt = datetime.fromtimestamp(window_start_time)
+
+                yield Result(
+                    value=average_value,
+                    newest_considered=newest_dt,
+                    oldest_considered=oldest_dt,
+                    windows={
+                        name: {service: float(count.value) for service, count in counts.items()}
+                        for name, counts in failure_panes.windows().items()
+                    } if failure_panes is not None else {},
+                    latencies={
+                        name: {
+                            service: {f"p{q * 100:g}": sketch.quantile(q) for q in LATENCY_QUANTILES}
+                            for service, sketch in sketches.items()
+                        }
+                        for name, sketches in latency_panes.windows().items()
+                    } if latency_panes is not None else {},
+                    counters={
+                        "late_events": watermark.late,
+                        "dropped_events": watermark.dropped + failure_window.dropped,
+                        # Failures too late for the pane windows already reported
+                        "refused_events": failure_panes.refused if failure_panes is not None else 0,
+                    },
+                )
+
+            yield
 
 if __name__ == "__main__":
     DATA_DIRECTORY = r"C:\Users\ASUS\Documents\Maestria Ciencia de los Datos\TERCER SEMESTRE\MINERIA DE GRANDES VOLUMENES INFO\TALLER 5\data"
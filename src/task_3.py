@@ -1,73 +1,143 @@
 import datetime
-import json
 import pathlib
-import random
 import time
 from collections import Counter
-from src import domain  # ✅ Import correcto para pytest y ejecución directa
-
-
-def _extract_status_code(message: str) -> int | None:
-    """Extrae el código HTTP del mensaje."""
-    if "HTTP Status Code:" in message:
-        try:
-            return int(message.split(":")[1].strip())
-        except ValueError:
-            return None
-    return None
-
-
-def compute(source: str, k: int = 1000):
-    """Aplica Reservoir Sampling para encontrar el código HTTP más común."""
-    reservoir = []
-    total_seen = 0
+from typing import Dict
+from src import domain, status  # ✅ Import correcto para pytest y ejecución directa
+from src.checkpoint import Checkpointer
+from src.heavy_hitters import CountMap, HeavyHitters
+from src.pipeline import Pipeline
+from src.sampling import SkipReservoir, StratifiedReservoir, WeightedReservoir
+from src.source import START_CURSOR
+
+# Versión del contenido del checkpoint; se incrementa cada vez que cambia
+CHECKPOINT_SCHEMA = 1
+# Peso en modo "weighted" de los eventos sin response_time_ms
+DEFAULT_WEIGHT = 1.0
+
+
+def _make_sampler(sampling: str, k: int):
+    match sampling:
+        case "uniform":
+            return SkipReservoir(k, counts=CountMap())
+        case "stratified":
+            return StratifiedReservoir(k)
+        case "weighted":
+            return WeightedReservoir(k)
+        case _:
+            raise ValueError(f"Invalid sampling: {sampling}")
+
+
+def compute(
+    source: str,
+    k: int = 1000,
+    checkpoint_path: str | None = None,
+    checkpoint_interval: float = 30.0,
+    workers: int = 0,
+    capacity: int = 100,
+    top_n: int = 10,
+    sampling: str = "uniform",
+):
+    """
+    Aplica Reservoir Sampling para encontrar el código HTTP más común.
+    Además sigue los heavy hitters de todo el stream (códigos y servicios) con
+    Space-Saving (`capacity` claves) y Count-Min; emite un resultado por lote
+    con el top `top_n` de cada uno.
+    Con workers > 1 los archivos se decodifican en paralelo en varios procesos.
+
+    `sampling` elige el reservorio: "uniform" (k eventos, Algorithm L),
+    "stratified" (k eventos por servicio) o "weighted" (k eventos con
+    probabilidad proporcional a response_time_ms, A-Res). Los eventos sin
+    response_time_ms pesan DEFAULT_WEIGHT.
+    """
+    sampler = _make_sampler(sampling, k)
+    status_hitters = HeavyHitters(capacity)
+    service_hitters = HeavyHitters(capacity)
     oldest_timestamp = datetime.datetime.now()
-    processed_files = set()
-
-    while True:
-        for file in pathlib.Path(source).glob("*.json"):
-            if file.name in processed_files:
-                continue
-
-            print(f"🔍 Detectado archivo: {file}")  # 👈 Diagnóstico visible
-
-            try:
-                with open(file, "r") as f:
-                    data = json.load(f)
-                    events = data if isinstance(data, list) else [data]
-            except Exception as e:
-                print(f"⚠️ Error leyendo {file}: {e}")
-                continue
-
-            for event in events:
-                message = event.get("message", "")
-                timestamp = datetime.datetime.fromtimestamp(
-                    event.get("timestamp", time.time())
-                )
-                code = _extract_status_code(message)
-                if code is None:
+    cursor = START_CURSOR
+    offsets = None
+
+    checkpointer = None
+    if checkpoint_path is not None:
+        checkpointer = Checkpointer(checkpoint_path, checkpoint_interval, schema=CHECKPOINT_SCHEMA)
+        state = checkpointer.load()
+        if state is not None:
+            # El reservorio guardado solo sirve si es del mismo modo de muestreo
+            if type(state["sampler"]) is type(sampler):
+                sampler = state["sampler"]
+            status_hitters = state["status_hitters"]
+            service_hitters = state["service_hitters"]
+            oldest_timestamp = state["oldest_timestamp"]
+            cursor = state["cursor"]
+            offsets = state["offsets"]
+
+    with Pipeline.from_directory(source, cursor, offsets, workers) as pipeline:
+        for tick in pipeline.ticks():
+            for file in tick.files:
+                print(f"🔍 Detectado archivo: {file}")  # 👈 Diagnóstico visible
+
+            for batch in tick:
+                if batch.error is not None:
+                    print(f"⚠️ Error leyendo {batch.source}: {batch.error}")
+
+                if not len(batch):
                     continue
 
-                total_seen += 1
-                if len(reservoir) < k:
-                    reservoir.append(code)
-                else:
-                    j = random.randint(0, total_seen - 1)
-                    if j < k:
-                        reservoir[j] = code
+                # Conteos del lote: una entrada por mensaje y servicio distintos
+                codes = status.lookup_table(batch.message_table)
+                code_counts: Dict[int, int] = {}
+                for mid, count in Counter(batch.message_ids).items():
+                    if codes[mid] != status.NO_STATUS:
+                        code_counts[codes[mid]] = code_counts.get(codes[mid], 0) + count
+                status_hitters.update_counts(code_counts)
+                service_hitters.update_counts(
+                    {batch.service_names[sid]: count for sid, count in Counter(batch.service_ids).items()}
+                )
 
-                counter = Counter(reservoir)
-                most_common_code, _ = counter.most_common(1)[0]
+                # Solo eventos con código HTTP; las columnas se pasan tal cual
+                status_codes = batch.status_codes
+                service_ids = batch.service_ids
+                response_times = batch.response_times
+                if status.NO_STATUS in codes:
+                    rows = [i for i, code in enumerate(status_codes) if code != status.NO_STATUS]
+                    status_codes = [status_codes[i] for i in rows]
+                    service_ids = [service_ids[i] for i in rows]
+                    response_times = [response_times[i] for i in rows]
+
+                if sampling == "stratified":
+                    sampler.extend(status_codes, service_ids, batch.service_names)
+                elif sampling == "weighted":
+                    sampler.extend(
+                        status_codes,
+                        [DEFAULT_WEIGHT if rt < 0 else rt for rt in response_times],
+                    )
+                else:
+                    sampler.extend(status_codes)
 
+                most_common = sampler.counts.most_common()
+                if most_common is None:
+                    continue
+                newest_ts = max(batch.timestamps)
                 yield domain.Result(
-                    value=float(most_common_code),
-                    newest_considered=timestamp,
+                    value=float(most_common[0]),
+                    newest_considered=datetime.datetime.fromtimestamp(newest_ts or time.time()),
                     oldest_considered=oldest_timestamp,
+                    heavy_hitters={
+                        "status_codes": status_hitters.top(top_n),
+                        "services": service_hitters.top(top_n),
+                    },
                 )
 
-            processed_files.add(file.name)
-
-        time.sleep(1)
+            # Solo se guarda entre lotes, cuando el cursor y el estado coinciden
+            if checkpointer is not None:
+                checkpointer.maybe_save(lambda: {
+                    "cursor": tick.cursor,
+                    "offsets": tick.offsets,
+                    "sampler": sampler,
+                    "status_hitters": status_hitters,
+                    "service_hitters": service_hitters,
+                    "oldest_timestamp": oldest_timestamp,
+                })
 
 
 # --- Ejecución directa ---
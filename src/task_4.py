@@ -1,125 +1,217 @@
-import pathlib
-import json
+import contextlib
 import time
-import hashlib
 import datetime
-import re
-from bitarray import bitarray
-from src import domain
-
-
-class BloomFilter:
-    """Bloom Filter básico, inicializado con patrones de error dinámicos."""
-
-    def __init__(self, size: int = 100000, hash_count: int = 5):
-        self.size = size
-        self.hash_count = hash_count
-        self.bit_array = bitarray(size)
-        self.bit_array.setall(False)
-
-    def _hashes(self, item: str):
-        """Genera múltiples hashes para un elemento."""
-        for i in range(self.hash_count):
-            digest = hashlib.sha256((item + str(i)).encode("utf-8")).hexdigest()
-            yield int(digest, 16) % self.size
-
-    def add(self, item: str):
-        for index in self._hashes(item):
-            self.bit_array[index] = True
-
-    def __contains__(self, item: str):
-        return all(self.bit_array[index] for index in self._hashes(item))
-
-
-def load_dynamic_bloom_filter() -> BloomFilter:
+from src import domain, status
+from src.bloom import (  # noqa: F401
+    DEFAULT_ERROR_RATE,
+    FILTERS,
+    BloomFilter,
+    CountingBloomFilter,
+    MappedBloomFilter,
+    ScalableBloomFilter,
+    iter_interests,
+    optimal_shape,
+)
+from src.checkpoint import Checkpointer
+from src.matcher import PatternMatcher
+from src.pipeline import Pipeline
+from src.sink import ForwardingSink
+from src.source import START_CURSOR
+
+
+INTEREST_MESSAGES = [
+    "HTTP Status Code: 400", "HTTP Status Code: 401", "HTTP Status Code: 403",
+    "HTTP Status Code: 404", "HTTP Status Code: 408", "HTTP Status Code: 429",
+    "HTTP Status Code: 500", "HTTP Status Code: 502", "HTTP Status Code: 503",
+    "HTTP Status Code: 504", "Database Error", "Connection refused", "Timeout Error"
+]
+
+# Versión del contenido del checkpoint; se incrementa cada vez que cambia
+CHECKPOINT_SCHEMA = 2
+# Máximo de subcadenas que se buscan dentro de los mensajes
+MAX_SUBSTRINGS = 10000
+# Segundos que se espera al sink antes de un checkpoint
+SINK_FLUSH_TIMEOUT = 30.0
+
+
+def load_dynamic_bloom_filter(error_rate: float = DEFAULT_ERROR_RATE, kind: str = "standard"):
     """
     Crea un Bloom Filter con patrones representativos de errores HTTP.
     Esto permite cubrir 4xx, 5xx y errores comunes sin lista externa.
+    `kind` elige la variante: "standard" (tamaño fijo), "scalable" (crece
+    si se agregan patrones) o "counting" (permite eliminar patrones).
     """
-    bf = BloomFilter(size=100000, hash_count=5)
+    if kind not in FILTERS:
+        raise ValueError(f"Tipo de filtro inválido: {kind}")
+    bf = FILTERS[kind](len(INTEREST_MESSAGES), error_rate)
 
     # Cargar patrones representativos de errores HTTP y del sistema
-    interest_messages = [
-        "HTTP Status Code: 400", "HTTP Status Code: 401", "HTTP Status Code: 403",
-        "HTTP Status Code: 404", "HTTP Status Code: 408", "HTTP Status Code: 429",
-        "HTTP Status Code: 500", "HTTP Status Code: 502", "HTTP Status Code: 503",
-        "HTTP Status Code: 504", "Database Error", "Connection refused", "Timeout Error"
-    ]
-    for msg in interest_messages:
+    for msg in INTEREST_MESSAGES:
         bf.add(msg)
 
-    print(f"📦 Bloom Filter dinámico cargado con {len(interest_messages)} patrones de error.\n")
+    print(f"📦 Bloom Filter dinámico cargado con {len(INTEREST_MESSAGES)} patrones de error.\n")
     return bf
 
 
-def is_http_error(message: str) -> bool:
+def load_pattern_matcher(patterns=None) -> PatternMatcher:
     """
-    Detecta dinámicamente si el mensaje contiene un error HTTP 4xx o 5xx.
+    Compila los patrones de interés (INTEREST_MESSAGES si no se indican) una
+    sola vez para encontrarlos también dentro de mensajes más largos (p. ej.
+    "upstream: Connection refused").
     """
-    match = re.search(r"HTTP Status Code:\s*(\d{3})", message)
-    if match:
-        code = int(match.group(1))
-        return 400 <= code < 600
-    return False
+    return PatternMatcher(INTEREST_MESSAGES if patterns is None else patterns)
 
 
-def compute(source: str, max_batches: int | None = None):
+def load_substrings(path: str, limit: int = MAX_SUBSTRINGS) -> list:
+    """
+    Lee una lista de subcadenas a buscar dentro de los mensajes, una por
+    línea. El autómata vive en memoria, así que la lista debe ser acotada:
+    con más de `limit` entradas se rechaza en vez de cargarla entera.
+    """
+    substrings = []
+    for substring in iter_interests(path):
+        if len(substrings) >= limit:
+            raise ValueError(f"{path} tiene más de {limit} subcadenas")
+        substrings.append(substring)
+    return substrings
+
+
+def is_http_error(message: str) -> bool:
+    """
+    Detecta dinámicamente si el mensaje contiene un error HTTP 4xx o 5xx.
+    """
+    return status.is_error(status.lookup(message))
+
+
+def compute(
+    source: str,
+    max_batches: int | None = None,
+    checkpoint_path: str | None = None,
+    checkpoint_interval: float = 30.0,
+    workers: int = 0,
+    bloom_path: str | None = None,
+    bloom_kind: str = "standard",
+    sink: ForwardingSink | None = None,
+    substrings_path: str | None = None,
+):
     """
     Filtra mensajes de error y genera resultados en modo streaming.
-    Si max_batches está definido, el procesamiento se detiene tras esa cantidad de archivos (modo test).
+    Si max_batches está definido, el procesamiento se detiene tras esa cantidad de lecturas de archivos (modo test).
+    Un segmento NDJSON que sigue creciendo se vuelve a leer cada vez que crece y
+    cuenta una vez por lectura, no una vez por archivo.
+    Si checkpoint_path está definido, el estado se guarda periódicamente y se retoma al reiniciar.
+    Con workers > 1 los archivos se decodifican en paralelo en varios procesos.
+    Si bloom_path está definido, el Bloom Filter se mapea desde ese archivo
+    (construido con `python -m src.bloom`) en vez de crearse en memoria;
+    si no, bloom_kind elige la variante del filtro en memoria.
+    El filtro solo detecta mensajes idénticos a un patrón. La búsqueda dentro
+    de los mensajes usa INTEREST_MESSAGES, o la lista acotada de subcadenas de
+    substrings_path si está definido (ver `load_substrings`); nunca la lista
+    completa con la que se construyó bloom_path, que puede no caber en memoria.
+    Si sink está definido, cada mensaje detectado se reenvía por él en lotes
+    en vez de imprimirse, y se genera un solo resultado por tick (el promedio
+    acumulado) en lugar de uno por detección; antes de cada checkpoint se
+    espera a que lo enviado haya sido entregado o guardado en disco.
     """
-    bloom = load_dynamic_bloom_filter()
-    processed_files = set()
+    if bloom_path is not None:
+        bloom = MappedBloomFilter(bloom_path)
+        print(f"📦 Bloom Filter mapeado desde {bloom_path} con {bloom.count} patrones.\n")
+    else:
+        bloom = load_dynamic_bloom_filter(kind=bloom_kind)
+    matcher = load_pattern_matcher(load_substrings(substrings_path) if substrings_path is not None else None)
+    batches_read = 0
 
     total_events = 0
     detected_events = 0
     start_time = time.time()
-
-    while True:
-        new_files = [f for f in pathlib.Path(source).glob("*.json") if f.name not in processed_files]
-        if not new_files:
-            time.sleep(1)
-            continue
-
-        for file in new_files:
-            try:
-                with open(file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    events = data if isinstance(data, list) else [data]
-            except Exception as e:
-                print(f"⚠️ Error leyendo {file}: {e}")
-                continue
-
-            for event in events:
-                total_events += 1
-                message = event.get("message", "")
-                ts = event.get("timestamp", time.time())
-                now = datetime.datetime.fromtimestamp(ts)
-
-                # Detectar dinámicamente errores o coincidencias del Bloom Filter
-                if message in bloom or is_http_error(message):
-                    detected_events += 1
-                    avg_detection = detected_events / total_events
-                    yield domain.Result(
-                        value=avg_detection,
-                        newest_considered=now,
-                        oldest_considered=now,
-                    )
-                    print(f"✅ #{detected_events} | {message} | Promedio: {round(avg_detection*100, 2)}%")
-
-            processed_files.add(file.name)
-
-        # Modo test: detener el bucle si se alcanzó el número de lotes
-        if max_batches and len(processed_files) >= max_batches:
-            break
-
-        # Métricas en tiempo real (solo cuando no es test)
-        elapsed = time.time() - start_time
-        if total_events > 0 and not max_batches:
-            ratio = detected_events / total_events
-            print(f"📊 Tiempo: {round(elapsed, 1)}s | Total: {total_events} | Detectados: {detected_events} | Ratio: {round(ratio*100, 2)}%")
-
-        time.sleep(1)
+    cursor = START_CURSOR
+    offsets = None
+
+    checkpointer = None
+    if checkpoint_path is not None:
+        checkpointer = Checkpointer(checkpoint_path, checkpoint_interval, schema=CHECKPOINT_SCHEMA)
+        state = checkpointer.load()
+        if state is not None:
+            # El filtro no se guarda: se arma siempre con los patrones actuales
+            total_events = state["total_events"]
+            detected_events = state["detected_events"]
+            batches_read = state["batches_read"]
+            cursor = state["cursor"]
+            offsets = state["offsets"]
+
+    # El mapeo se libera aunque quien consume el generador se detenga antes
+    release = bloom if bloom_path is not None else contextlib.nullcontext()
+    with release, Pipeline.from_directory(source, cursor, offsets, workers) as pipeline:
+        for tick in pipeline.ticks():
+            # Rango de lo detectado en el tick, para el resultado único con sink
+            newest_detected, oldest_detected = 0.0, float("inf")
+            for batch in tick:
+                if batch.error is not None:
+                    print(f"⚠️ Error leyendo {batch.source}: {batch.error}")
+
+                # Detectar dinámicamente errores, mensajes del Bloom Filter o que
+                # contienen un patrón, una sola vez por mensaje distinto del lote
+                matches = bloom.contains_many(batch.message_table)
+                detected = [
+                    match or matcher.matches(message) or is_http_error(message)
+                    for match, message in zip(matches, batch.message_table)
+                ]
+                for ts, mid, sid in zip(batch.timestamps, batch.message_ids, batch.service_ids):
+                    total_events += 1
+                    if detected[mid]:
+                        message = batch.message_table[mid]
+                        detected_events += 1
+                        if sink is not None:
+                            # Con sink no hay un resultado por evento: uno por tick
+                            sink.submit({"service": batch.service_names[sid], "timestamp": ts, "message": message})
+                            newest_detected = max(newest_detected, ts or time.time())
+                            oldest_detected = min(oldest_detected, ts or time.time())
+                            continue
+                        now = datetime.datetime.fromtimestamp(ts or time.time())
+                        avg_detection = detected_events / total_events
+                        yield domain.Result(
+                            value=avg_detection,
+                            newest_considered=now,
+                            oldest_considered=now,
+                        )
+                        print(f"✅ #{detected_events} | {message} | Promedio: {round(avg_detection*100, 2)}%")
+
+            if sink is not None and newest_detected:
+                yield domain.Result(
+                    value=detected_events / total_events,
+                    newest_considered=datetime.datetime.fromtimestamp(newest_detected),
+                    oldest_considered=datetime.datetime.fromtimestamp(oldest_detected),
+                )
+
+            # Lecturas, no archivos distintos: un segmento que crece se relee
+            batches_read += len(tick.files)
+
+            def snapshot():
+                # Lo detectado antes del checkpoint no se pierde al reiniciar; si el
+                # sink no lo entrega a tiempo, el checkpoint se pospone
+                if sink is not None and not sink.flush(SINK_FLUSH_TIMEOUT):
+                    print(f"⚠️ El sink no entregó lo pendiente en {SINK_FLUSH_TIMEOUT:g}s; se pospone el checkpoint.")
+                    return None
+                return {
+                    "cursor": tick.cursor,
+                    "offsets": tick.offsets,
+                    "total_events": total_events,
+                    "detected_events": detected_events,
+                    "batches_read": batches_read,
+                }
+
+            if checkpointer is not None:
+                checkpointer.maybe_save(snapshot)
+
+            # Modo test: detener el bucle si se alcanzó el número de lotes
+            if max_batches and batches_read >= max_batches:
+                break
+
+            # Métricas en tiempo real (solo cuando no es test)
+            elapsed = time.time() - start_time
+            if total_events > 0 and not max_batches:
+                ratio = detected_events / total_events
+                print(f"📊 Tiempo: {round(elapsed, 1)}s | Total: {total_events} | Detectados: {detected_events} | Ratio: {round(ratio*100, 2)}%")
 
 
 # --- Ejecución directa ---
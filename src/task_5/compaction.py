@@ -0,0 +1,199 @@
+"""
+Compactación incremental de los logs JSON a Parquet particionado por
+servicio y hora (service=<s>/hour=<YYYY-MM-DDTHH>/part-*.parquet).
+
+Leer Parquet en lugar de JSON evita volver a parsear texto en cada análisis:
+las columnas tienen tipo, `message` va codificada como diccionario y cada
+row group guarda estadísticas (mín./máx.), así que un filtro por servicio u
+hora descarta carpetas enteras y uno por timestamp descarta row groups.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import urllib.parse
+from dataclasses import dataclass
+from typing import Dict
+
+import polars as pl
+
+from src.task_5.task_5 import SCHEMA, _expand, _open_all
+
+# Filas por row group de los archivos fusionados
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+# Un archivo con menos filas se considera pequeño y se fusiona con sus vecinos
+DEFAULT_TARGET_ROWS = 1024 * 1024
+
+MANIFEST_NAME = "_manifest.json"
+PARTITION_SCHEMA = {"service": pl.String, "hour": pl.String}
+
+
+@dataclass
+class CompactionStats:
+    files_converted: int = 0
+    rows: int = 0
+    partitions: int = 0
+    files_merged: int = 0
+
+
+def _load_manifest(target: pathlib.Path) -> Dict:
+    try:
+        with open(target / MANIFEST_NAME, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {"sources": {}, "merging": None}
+
+
+def _save_manifest(target: pathlib.Path, manifest: Dict) -> None:
+    # Escritura atómica: un corte deja el manifiesto viejo o el nuevo
+    tmp_path = target / f".{MANIFEST_NAME}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, target / MANIFEST_NAME)
+
+
+def _partition_dir(target: pathlib.Path, service: str, hour: str) -> pathlib.Path:
+    return target / f"service={urllib.parse.quote(service, safe='')}" / f"hour={hour}"
+
+
+def _digest(*names: str) -> str:
+    return hashlib.blake2b("\n".join(names).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _write(frame: pl.DataFrame, path: pathlib.Path, row_group_size: int) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    frame.write_parquet(tmp_path, compression="zstd", statistics=True, row_group_size=row_group_size)
+    os.replace(tmp_path, path)
+
+
+def _finish_merge(target: pathlib.Path, manifest: Dict) -> None:
+    """Completa (o descarta) una fusión interrumpida por un corte."""
+    merging = manifest.get("merging")
+    if not merging:
+        return
+    if (target / merging["output"]).exists():
+        for name in merging["inputs"]:
+            (target / name).unlink(missing_ok=True)
+    manifest["merging"] = None
+    _save_manifest(target, manifest)
+
+
+def _with_partitions(frame: pl.DataFrame) -> pl.DataFrame:
+    hour = pl.from_epoch((pl.col("timestamp") * 1000).cast(pl.Int64), time_unit="ms").dt.strftime("%Y-%m-%dT%H")
+    return frame.with_columns(
+        pl.col("service").fill_null("unknown"),
+        hour.fill_null("unknown").alias("hour"),
+        pl.col("message").cast(pl.Categorical),
+    )
+
+
+def _merge_partition(
+    target: pathlib.Path,
+    directory: pathlib.Path,
+    manifest: Dict,
+    row_group_size: int,
+    target_rows: int,
+) -> int:
+    """Fusiona los archivos pequeños de una partición en uno; devuelve cuántos fusionó."""
+    small = [
+        path for path in sorted(directory.glob("*.parquet"))
+        if pl.scan_parquet(path, hive_partitioning=False).select(pl.len()).collect().item() < target_rows
+    ]
+    if len(small) < 2:
+        return 0
+    merged = pl.read_parquet(small, hive_partitioning=False).sort("timestamp")
+    output = directory / f"part-m{_digest(*(path.name for path in small))}.parquet"
+
+    # Se anota la fusión antes de hacerla visible, para poder completarla tras un corte
+    manifest["merging"] = {
+        "output": str(output.relative_to(target)),
+        "inputs": [str(path.relative_to(target)) for path in small],
+    }
+    _save_manifest(target, manifest)
+    _write(merged, output, row_group_size)
+    _finish_merge(target, manifest)
+    return len(small)
+
+
+def compact(
+    source: str,
+    target: str | os.PathLike,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    target_rows: int = DEFAULT_TARGET_ROWS,
+    storage_options: Dict | None = None,
+) -> CompactionStats:
+    """
+    Convierte a Parquet en `target` los archivos JSON de `source` (patrón local
+    o de S3) que aún no se habían convertido, y fusiona los archivos pequeños
+    de las particiones afectadas en archivos ordenados por timestamp con row
+    groups de `row_group_size` filas.
+
+    Es idempotente: el manifiesto de `target` registra los archivos ya
+    convertidos, y cada archivo de origen escribe partes con nombre fijo, así
+    que repetir una corrida interrumpida reescribe las mismas partes en vez de
+    duplicar filas.
+    """
+    target = pathlib.Path(target)
+    target.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(target)
+    _finish_merge(target, manifest)
+    stats = CompactionStats()
+
+    pending = [path for path in _expand(source, storage_options) if path not in manifest["sources"]]
+    touched = set()
+    for path, file in zip(pending, _open_all(pending, storage_options) if pending else ()):
+        try:
+            frame = _with_partitions(pl.read_json(file, schema=SCHEMA))
+        except Exception as e:
+            # Se reintenta en la próxima corrida
+            print(f"⚠️ Error leyendo {path}: {e}")
+            continue
+        name = f"part-{_digest(path)}.parquet"
+        for (service, hour), part in frame.partition_by(["service", "hour"], as_dict=True).items():
+            directory = _partition_dir(target, service, hour)
+            directory.mkdir(parents=True, exist_ok=True)
+            _write(part.drop("service", "hour").sort("timestamp"), directory / name, row_group_size)
+            touched.add(directory)
+        manifest["sources"][path] = frame.height
+        stats.files_converted += 1
+        stats.rows += frame.height
+    _save_manifest(target, manifest)
+
+    for directory in sorted(touched):
+        stats.files_merged += _merge_partition(target, directory, manifest, row_group_size, target_rows)
+    stats.partitions = len(touched)
+    return stats
+
+
+def scan_compacted(target: str | os.PathLike, storage_options: Dict | None = None) -> pl.LazyFrame:
+    """
+    Lee lo compactado con particionado hive: filtros sobre `service` y `hour`
+    solo leen las carpetas que coinciden, y filtros sobre las demás columnas
+    usan las estadísticas de cada row group.
+    """
+    return pl.scan_parquet(
+        f"{os.fspath(target).rstrip('/')}/**/*.parquet",
+        hive_partitioning=True,
+        hive_schema=PARTITION_SCHEMA,
+        storage_options=storage_options,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compacta logs JSON a Parquet particionado.")
+    parser.add_argument("source", help="Patrón de los JSON, p. ej. 'data/*.json' o 's3://bucket/5gb/*.json'")
+    parser.add_argument("target", type=pathlib.Path)
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    parser.add_argument("--target-rows", type=int, default=DEFAULT_TARGET_ROWS)
+    args = parser.parse_args()
+
+    stats = compact(args.source, args.target, args.row_group_size, args.target_rows)
+    print(
+        f"📦 {stats.files_converted} archivos convertidos ({stats.rows} filas) en {stats.partitions} "
+        f"particiones; {stats.files_merged} archivos pequeños fusionados."
+    )
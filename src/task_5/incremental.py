@@ -0,0 +1,211 @@
+"""
+Modo incremental del análisis de task_5: cada corrida agrega solo los
+archivos nuevos y combina sus agregados parciales con los guardados.
+
+Por endpoint se guardan contadores (errores, solicitudes), los momentos de
+la latencia (n, media, M2, combinables con la fórmula de Chan) y un DDSketch
+para el p95; por user agent, un conteo. Todo es combinable, así que el costo
+de una corrida es proporcional a los datos nuevos y el informe se arma desde
+un estado del tamaño del número de endpoints. El p95 tiene el error relativo
+del sketch (1% por defecto) en lugar de ser exacto.
+"""
+
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import polars as pl
+
+from src.checkpoint import Checkpointer
+from src.sketch import DEFAULT_RELATIVE_ACCURACY, DDSketch
+from src.task_5.task_5 import Report, _collect_all, _expand, _peak_memory_mb, enrich, scan_paths
+
+# Versión del contenido del estado guardado; se incrementa cada vez que cambia
+CHECKPOINT_SCHEMA = 1
+
+
+@dataclass
+class EndpointStats:
+    errors: int = 0
+    requests: int = 0
+    latency_count: int = 0
+    latency_mean: float = 0.0
+    latency_m2: float = 0.0
+    latency: DDSketch = field(default_factory=DDSketch)
+
+    def merge_moments(self, count: int, mean: float, m2: float) -> None:
+        # Combinación de Chan et al. de dos (n, media, M2)
+        if not count:
+            return
+        total = self.latency_count + count
+        delta = mean - self.latency_mean
+        self.latency_m2 += m2 + delta * delta * self.latency_count * count / total
+        self.latency_mean += delta * count / total
+        self.latency_count = total
+
+
+@dataclass
+class State:
+    # Archivos ya agregados, con la hora en que se procesaron
+    processed: Dict[str, float] = field(default_factory=dict)
+    endpoints: Dict[str, EndpointStats] = field(default_factory=dict)
+    user_agents: Dict[str, int] = field(default_factory=dict)
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+
+
+def partial_plans(lazy_df: pl.LazyFrame, gamma_log: float) -> List[pl.LazyFrame]:
+    """
+    Agregados parciales de un conjunto de archivos: por endpoint, por bin del
+    sketch de latencia de cada endpoint y por user agent.
+    """
+    enriched = enrich(lazy_df)
+    with_status = enriched.filter(pl.col("status_code").is_not_null())
+    latency = pl.col("latency_ms")
+
+    endpoints = with_status.group_by("endpoint").agg(
+        (pl.col("status_code") >= 400).sum().alias("errors"),
+        pl.len().alias("requests"),
+        latency.count().alias("count"),
+        latency.mean().alias("mean"),
+        ((latency - latency.mean()) ** 2).sum().alias("m2"),
+        (latency <= 0).sum().alias("zero_count"),
+        latency.sum().alias("total"),
+        latency.min().alias("min"),
+        latency.max().alias("max"),
+    )
+    # Los bins del DDSketch se calculan en Polars: solo viajan (endpoint, bin, conteo)
+    bins = (
+        with_status
+        .filter(latency > 0)
+        .group_by("endpoint", (latency.log() / gamma_log).ceil().cast(pl.Int64).alias("bin"))
+        .agg(pl.len().alias("count"))
+    )
+    user_agents = enriched.group_by("user_agent").agg(pl.len().alias("count"))
+    return [endpoints, bins, user_agents]
+
+
+def _merge(state: State, endpoints: pl.DataFrame, bins: pl.DataFrame, user_agents: pl.DataFrame) -> None:
+    binned: Dict[str, Dict[int, int]] = {}
+    for row in bins.iter_rows(named=True):
+        binned.setdefault(row["endpoint"], {})[row["bin"]] = row["count"]
+
+    for row in endpoints.iter_rows(named=True):
+        stats = state.endpoints.get(row["endpoint"])
+        if stats is None:
+            stats = state.endpoints[row["endpoint"]] = EndpointStats(
+                latency=DDSketch(state.relative_accuracy)
+            )
+        stats.errors += row["errors"]
+        stats.requests += row["requests"]
+        if row["count"]:
+            stats.merge_moments(row["count"], row["mean"], row["m2"])
+            stats.latency.merge_bins(
+                binned.get(row["endpoint"], {}),
+                zero_count=row["zero_count"],
+                total=row["total"],
+                minimum=row["min"],
+                maximum=row["max"],
+            )
+
+    for row in user_agents.iter_rows(named=True):
+        if row["user_agent"] is not None:
+            state.user_agents[row["user_agent"]] = state.user_agents.get(row["user_agent"], 0) + row["count"]
+
+
+def report(state: State) -> List[pl.DataFrame]:
+    """Las tres tablas de task_5 armadas desde el estado, sin leer datos."""
+    names = list(state.endpoints)
+    stats = [state.endpoints[name] for name in names]
+    errors = pl.DataFrame({
+        "endpoint": names,
+        "total_errores": [s.errors for s in stats],
+        "total_solicitudes": [s.requests for s in stats],
+    }, schema={"endpoint": pl.String, "total_errores": pl.Int64, "total_solicitudes": pl.Int64}).with_columns(
+        (pl.col("total_errores") / pl.col("total_solicitudes")).alias("tasa_fallos")
+    ).sort("tasa_fallos", descending=True)
+
+    latency = pl.DataFrame({
+        "endpoint": names,
+        "latencia_promedio": [s.latency_mean if s.latency_count else None for s in stats],
+        "latencia_p95": [s.latency.quantile(0.95) if s.latency_count else None for s in stats],
+        "desviacion_estandar": [
+            math.sqrt(s.latency_m2 / (s.latency_count - 1)) if s.latency_count > 1 else None for s in stats
+        ],
+    }, schema={
+        "endpoint": pl.String,
+        "latencia_promedio": pl.Float64,
+        "latencia_p95": pl.Float64,
+        "desviacion_estandar": pl.Float64,
+    }).sort("latencia_p95", descending=True)
+
+    user_agents = pl.DataFrame({
+        "user_agent": list(state.user_agents),
+        "conteo": list(state.user_agents.values()),
+    }, schema={"user_agent": pl.String, "conteo": pl.Int64}).sort("conteo", descending=True)
+    return [errors, latency, user_agents]
+
+
+def update(
+    uri: str,
+    state_path: str | os.PathLike,
+    storage_options: Dict | None = None,
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+) -> Report:
+    """
+    Agrega los archivos de `uri` que no se habían procesado, combina el
+    resultado con el estado guardado en `state_path` y devuelve el informe.
+
+    El estado y la lista de archivos procesados se guardan juntos y de forma
+    atómica, así que un corte a mitad de corrida no cuenta ningún archivo dos
+    veces: la próxima corrida simplemente repite los pendientes.
+    """
+    start = time.perf_counter()
+    checkpointer = Checkpointer(state_path, interval=0.0, schema=CHECKPOINT_SCHEMA)
+    state = checkpointer.load()
+    if state is None or state.relative_accuracy != relative_accuracy:
+        state = State(relative_accuracy=relative_accuracy)
+
+    pending = [path for path in _expand(uri, storage_options) if path not in state.processed]
+    if pending:
+        print(f"📥 {len(pending)} archivos nuevos de {uri}")
+        gamma_log = DDSketch(relative_accuracy).gamma_log
+        _merge(state, *_collect_all(partial_plans(scan_paths(pending, storage_options), gamma_log)))
+        now = time.time()
+        for path in pending:
+            state.processed[path] = now
+        checkpointer.save(state)
+
+    errors, latency, user_agents = report(state)
+    return Report(
+        errors=errors,
+        latency=latency,
+        user_agents=user_agents,
+        seconds=time.perf_counter() - start,
+        peak_memory_mb=_peak_memory_mb(),
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # Con `python -m` este módulo es __main__: se usa el importado para que el
+    # estado guardado nombre src.task_5.incremental.State y la biblioteca lo lea
+    from src.task_5.incremental import update
+
+    parser = argparse.ArgumentParser(description="Agrega incrementalmente los logs nuevos de task_5.")
+    parser.add_argument("uri", help="Patrón de los archivos, p. ej. 's3://bucket/5gb/*.json'")
+    parser.add_argument("state", help="Archivo donde se guarda el estado entre corridas")
+    parser.add_argument("--interval", type=float, default=None, help="Repetir cada tantos segundos")
+    args = parser.parse_args()
+
+    while True:
+        result = update(args.uri, args.state)
+        print(result.errors)
+        print(result.latency)
+        print(result.user_agents)
+        print(f"\n⏱️ Tiempo: {result.seconds:.1f}s | Pico de memoria: {result.peak_memory_mb:.0f} MB")
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
@@ -6,8 +6,14 @@ Análisis de logs JSON almacenados en AWS S3 con Polars
 Compatibilidad: Polars >= 1.7, s3fs >= 2024.5
 """
 
+import glob
+import resource
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
 import polars as pl
-import re
 
 # -----------------------------------------------------
 # --- CONFIGURACIÓN GENERAL ---
@@ -19,153 +25,244 @@ S3_URI = "s3://terraform-51257688b24ec567/5gb/*.json"
 # Patrón para extraer códigos HTTP
 STATUS_CODE_PATTERN = r"(\d{3})"
 
-# Esquema base de respaldo en caso de error
-FALLBACK_SCHEMA = {"service": pl.String, "timestamp": pl.Float64, "message": pl.String}
+# Esquema declarado de los eventos: evita inferirlo leyendo los datos y fija
+# los tipos aunque un archivo no traiga alguna columna
+SCHEMA = {
+    "service": pl.String,
+    "timestamp": pl.Float64,
+    "message": pl.String,
+    "response_time_ms": pl.Float64,
+}
+
+# Latencia supuesta para los eventos que no informan response_time_ms
+SIMULATED_LATENCY_MS = 150.0
+
+
+@dataclass
+class Report:
+    """Resultados del análisis junto con su costo."""
+
+    errors: pl.DataFrame
+    latency: pl.DataFrame
+    user_agents: pl.DataFrame
+    seconds: float
+    # Pico de memoria residente del proceso, en MB
+    peak_memory_mb: float
 
 
 # -----------------------------------------------------
-# --- FUNCIÓN PRINCIPAL PARA LEER DESDE S3 ---
+# --- LECTURA DE DATOS ---
 # -----------------------------------------------------
 
-def read_json_from_s3(uri: str) -> pl.LazyFrame:
+def _expand(uri: str, storage_options: Dict | None = None) -> List[str]:
+    """Archivos que coinciden con un patrón local o de S3 (vía s3fs)."""
+    if uri.startswith("s3://"):
+        import s3fs
+
+        fs = s3fs.S3FileSystem(**(storage_options or {}))
+        return [f"s3://{path}" for path in sorted(fs.glob(uri))]
+    return sorted(glob.glob(uri, recursive=True))
+
+
+def read_json_from_s3(uri: str, storage_options: Dict | None = None) -> pl.LazyFrame:
     """
-    Lee los archivos JSON desde S3 usando Polars + s3fs (modo lazy scan).
-    No requiere fsspec ni configuración manual de la región.
+    Lee los logs de `uri` (local o S3) como LazyFrame con el esquema declarado.
+
+    NDJSON y Parquet se escanean de forma perezosa, así el motor de streaming
+    los procesa por bloques y solo lee las columnas que el plan usa. Polars no
+    tiene un escáner perezoso para documentos JSON (arreglos), así que cada
+    archivo .json se decodifica entero, con el esquema ya fijado, antes de
+    ejecutar el plan: la memoria crece con el tamaño de la entrada y solo se
+    ahorra la pasada repetida. Para el ahorro de memoria completo, compactar
+    primero los .json a Parquet con src.task_5.compaction.
     """
-    print(f"\n📥 Leyendo archivos JSON desde: {uri}")
+    print(f"\n📥 Leyendo archivos desde: {uri}")
+    storage_options = {"anon": False} if storage_options is None and uri.startswith("s3://") else storage_options
     try:
-        # ✅ Polars usa s3fs automáticamente
-        df_lazy = pl.scan_json(uri, storage_options={"anon": False})
-        print("✅ Conexión establecida correctamente con S3 y archivos detectados.")
-        return df_lazy
+        if uri.endswith(".parquet"):
+            return pl.scan_parquet(uri, storage_options=storage_options, hive_partitioning=True)
+        if uri.endswith((".ndjson", ".jsonl")):
+            return pl.scan_ndjson(uri, schema=SCHEMA, storage_options=storage_options)
+        paths = _expand(uri, storage_options)
+        if not paths:
+            raise FileNotFoundError(f"No hay archivos en {uri}")
+        print(f"✅ {len(paths)} archivos detectados.")
+        return scan_paths(paths, storage_options)
     except Exception as e:
-        print(f"❌ ERROR al leer los JSON desde S3: {e}")
-        return pl.DataFrame({}, schema=FALLBACK_SCHEMA).lazy()
+        # Un origen ilegible no es un origen vacío: el error se propaga
+        print(f"❌ ERROR al leer los JSON desde {uri}: {e}")
+        raise
 
 
-# -----------------------------------------------------
-# --- LECTURA DE DATOS ---
-# -----------------------------------------------------
+def scan_paths(paths: List[str], storage_options: Dict | None = None) -> pl.LazyFrame:
+    """LazyFrame sobre una lista explícita de archivos del mismo formato."""
+    if paths[0].endswith(".parquet"):
+        return pl.scan_parquet(paths, storage_options=storage_options, hive_partitioning=True)
+    if paths[0].endswith((".ndjson", ".jsonl")):
+        return pl.scan_ndjson(paths, schema=SCHEMA, storage_options=storage_options)
+    frames = [pl.read_json(path, schema=SCHEMA).lazy() for path in _open_all(paths, storage_options)]
+    return pl.concat(frames, how="vertical", rechunk=False)
+
+
+def _open_all(paths: List[str], storage_options: Dict | None):
+    if not paths[0].startswith("s3://"):
+        yield from paths
+        return
+    import s3fs
+
+    fs = s3fs.S3FileSystem(**(storage_options or {}))
+    for path in paths:
+        with fs.open(path, "rb") as file:
+            yield file
 
-lazy_df_base = read_json_from_s3(S3_URI)
 
 # -----------------------------------------------------
-# --- ENRIQUECIMIENTO Y LIMPIEZA DE DATOS ---
+# --- PLAN DE ANÁLISIS ---
 # -----------------------------------------------------
 
-lazy_df = (
-    lazy_df_base
-    .with_columns(
-        # Extraer código HTTP
-        pl.col("message").str.extract(STATUS_CODE_PATTERN).cast(pl.Int32, strict=False).alias("status_code"),
+def enrich(lazy_df: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Columnas derivadas que usan las tres métricas. Es un `select`, así que el
+    escaneo solo lee service, message y response_time_ms.
+    """
+    return lazy_df.select(
         # Renombrar columna "service"
         pl.col("service").alias("endpoint"),
-        # Simular latencia
-        (pl.lit(150.0) + pl.int_range(0, pl.len()) * 0.0001).alias("latency_ms"),
+        # Extraer código HTTP (en Parquet compactado message es categórica)
+        pl.col("message").cast(pl.String).str.extract(STATUS_CODE_PATTERN).cast(pl.Int32, strict=False).alias("status_code"),
+        # Latencia informada o, si falta, la simulada
+        pl.coalesce(pl.col("response_time_ms"), pl.lit(SIMULATED_LATENCY_MS)).alias("latency_ms"),
         # Simular user_agent
         pl.when(pl.col("service") == "training")
           .then(pl.lit("Python/Client"))
           .otherwise(pl.lit("Web/Browser"))
-          .alias("user_agent")
+          .alias("user_agent"),
     )
-)
-
-# -----------------------------------------------------
-# --- 1️⃣ TASA DE ERRORES POR ENDPOINT ---
-# -----------------------------------------------------
 
-print("\n--- 1️⃣ Calculando Tasa de Errores por Endpoint ---")
 
-lazy_plan_errores = (
-    lazy_df
-    .filter(pl.col("status_code").is_not_null())
-    .with_columns((pl.col("status_code") >= 400).alias("is_error"))
-    .group_by("endpoint")
-    .agg([
-        pl.col("is_error").sum().alias("total_errores"),
-        pl.len().alias("total_solicitudes"),
-    ])
-    .with_columns((pl.col("total_errores") / pl.col("total_solicitudes")).alias("tasa_fallos"))
-    .sort("tasa_fallos", descending=True)
-)
-
-df_errores = lazy_plan_errores.collect()
-print(df_errores)
-
-
-# -----------------------------------------------------
-# --- 2️⃣ LATENCIA PROMEDIO POR ENDPOINT ---
-# -----------------------------------------------------
+def build_plans(lazy_df: pl.LazyFrame) -> List[pl.LazyFrame]:
+    """Los planes de tasa de errores, latencia y user agents sobre el mismo origen."""
+    enriched = enrich(lazy_df)
+    with_status = enriched.filter(pl.col("status_code").is_not_null())
+
+    # 1️⃣ Tasa de errores por endpoint
+    errors = (
+        with_status
+        .group_by("endpoint")
+        .agg([
+            (pl.col("status_code") >= 400).sum().alias("total_errores"),
+            pl.len().alias("total_solicitudes"),
+        ])
+        .with_columns((pl.col("total_errores") / pl.col("total_solicitudes")).alias("tasa_fallos"))
+        .sort("tasa_fallos", descending=True)
+    )
 
-print("\n--- 2️⃣ Calculando Latencia Promedio ---")
+    # 2️⃣ Latencia promedio por endpoint
+    latency = (
+        with_status
+        .group_by("endpoint")
+        .agg([
+            pl.col("latency_ms").mean().alias("latencia_promedio"),
+            pl.col("latency_ms").quantile(0.95).alias("latencia_p95"),
+            pl.col("latency_ms").std().alias("desviacion_estandar"),
+        ])
+        .sort("latencia_p95", descending=True)
+    )
 
-lazy_plan_latency = (
-    lazy_df
-    .filter(pl.col("status_code").is_not_null())
-    .group_by("endpoint")
-    .agg([
-        pl.col("latency_ms").mean().alias("latencia_promedio"),
-        pl.col("latency_ms").quantile(0.95).alias("latencia_p95"),
-        pl.col("latency_ms").std().alias("desviacion_estandar"),
-    ])
-    .sort("latencia_p95", descending=True)
-)
+    # 3️⃣ Distribución de tráfico por user agent
+    user_agents = (
+        enriched
+        .filter(pl.col("user_agent").is_not_null())
+        .group_by("user_agent")
+        .agg(pl.len().alias("conteo"))
+        .sort("conteo", descending=True)
+    )
+    return [errors, latency, user_agents]
 
-df_latency = lazy_plan_latency.collect()
-print(df_latency)
 
+def _collect_all(plans: List[pl.LazyFrame]) -> List[pl.DataFrame]:
+    try:
+        return pl.collect_all(plans, engine="streaming")
+    except TypeError:
+        # Polars anterior al nuevo motor: el streaming se pide con streaming=True
+        return pl.collect_all(plans, streaming=True)
 
-# -----------------------------------------------------
-# --- 3️⃣ DISTRIBUCIÓN DE TRÁFICO POR USER AGENT ---
-# -----------------------------------------------------
 
-print("\n--- 3️⃣ Calculando Distribución de Tráfico por User Agent ---")
+def _peak_memory_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
 
-lazy_plan_agent = (
-    lazy_df
-    .filter(pl.col("user_agent").is_not_null())
-    .group_by("user_agent")
-    .agg(pl.len().alias("conteo"))
-    .sort("conteo", descending=True)
-)
 
-df_agent = lazy_plan_agent.collect()
-print(df_agent)
+def analyze(uri: str, storage_options: Dict | None = None, single_pass: bool = True) -> Report:
+    """
+    Calcula las tres métricas sobre los logs de `uri`.
+
+    Con single_pass los tres planes se evalúan juntos con `pl.collect_all` en
+    el motor de streaming: el subplan común (escaneo, extracción del código y
+    columnas derivadas) se detecta y se ejecuta una sola vez. Con
+    single_pass=False cada plan se recolecta por separado, como hacía el
+    script original, y el origen se lee y procesa tres veces.
+
+    Solo las entradas NDJSON y Parquet se leen por bloques; los documentos
+    .json se cargan enteros (ver `read_json_from_s3`). Aun así la memoria
+    crece con los datos: el p95 exacto guarda todas las latencias de cada
+    endpoint. `src.task_5.incremental` lo aproxima con un DDSketch.
+    """
+    start = time.perf_counter()
+    plans = build_plans(read_json_from_s3(uri, storage_options))
+    if single_pass:
+        errors, latency, user_agents = _collect_all(plans)
+    else:
+        errors, latency, user_agents = [plan.collect() for plan in plans]
+    return Report(
+        errors=errors,
+        latency=latency,
+        user_agents=user_agents,
+        seconds=time.perf_counter() - start,
+        peak_memory_mb=_peak_memory_mb(),
+    )
 
 
 # -----------------------------------------------------
-# --- EXPORTACIÓN OPCIONAL (VERSIÓN COMPATIBLE) ---
+# --- EXPORTACIÓN A S3 CON BOTO3 ---
 # -----------------------------------------------------
 
-# Guardar localmente
-df_errores.write_csv("errores.csv")
-df_latency.write_csv("latencia.csv")
-df_agent.write_csv("trafico.csv")
+def upload_results(files: List[str], bucket: str = "terraform-51257688b24ec567", prefix: str = "results/") -> None:
+    import boto3
+    from botocore.exceptions import ClientError
 
-print("\n Archivos locales creados correctamente.")
+    s3 = boto3.client("s3")
 
-# -----------------------------------------------------
-# --- EXPORTACIÓN A S3 CON BOTO3 ---
-# -----------------------------------------------------
-import boto3
-from botocore.exceptions import ClientError
+    print("\n📤 Subiendo resultados a S3 con boto3...")
 
-s3 = boto3.client("s3")
+    for file_name in files:
+        key = prefix + file_name
+        try:
+            s3.upload_file(file_name, bucket, key)
+            print(f"✅ Subido: s3://{bucket}/{key}")
+        except ClientError as e:
+            print(f"❌ Error subiendo {file_name}: {e}")
 
-bucket = "terraform-51257688b24ec567"
-prefix = "results/"
+    print("\n🚀 Subida completada.")
 
-files = ["errores.csv", "latencia.csv", "trafico.csv"]
 
-print("\n📤 Subiendo resultados a S3 con boto3...")
+if __name__ == "__main__":
+    report = analyze(S3_URI)
 
-for file_name in files:
-    key = prefix + file_name
-    try:
-        s3.upload_file(file_name, bucket, key)
-        print(f"✅ Subido: s3://{bucket}/{key}")
-    except ClientError as e:
-        print(f"❌ Error subiendo {file_name}: {e}")
+    print("\n--- 1️⃣ Tasa de Errores por Endpoint ---")
+    print(report.errors)
+    print("\n--- 2️⃣ Latencia Promedio ---")
+    print(report.latency)
+    print("\n--- 3️⃣ Distribución de Tráfico por User Agent ---")
+    print(report.user_agents)
+    print(f"\n⏱️ Tiempo: {report.seconds:.1f}s | Pico de memoria: {report.peak_memory_mb:.0f} MB")
+
+    # Guardar localmente
+    report.errors.write_csv("errores.csv")
+    report.latency.write_csv("latencia.csv")
+    report.user_agents.write_csv("trafico.csv")
 
-print("\n🚀 Subida completada.")
+    print("\n Archivos locales creados correctamente.")
 
+    upload_results(["errores.csv", "latencia.csv", "trafico.csv"])
@@ -0,0 +1,405 @@
+import math
+from array import array
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, Iterator, Sequence, Tuple
+
+# Panes a sliding counter's window is split into: eviction filters at most one
+_TIMELINE_PANES = 64
+
+
+class Timeline:
+    """
+    Timestamps of one key, bucketed by `width`-second pane: a dict from pane
+    index to an array('d') of its timestamps, 8 bytes each, plus a deque of
+    the live pane indexes in order.
+
+    Adding appends to the bucket of its pane, so an out-of-order timestamp
+    costs the same O(1) as one in order; only a pane that did not exist yet
+    and is not the newest or oldest is inserted into the deque. Eviction drops
+    whole panes from the front and filters the one the cutoff falls in.
+    """
+
+    __slots__ = ("width", "buckets", "panes", "size")
+
+    def __init__(self, times: Iterable[float] = (), width: float = 1.0):
+        self.width = width
+        self.buckets: Dict[int, array] = {}
+        self.panes: Deque[int] = deque()
+        self.size = 0
+        for timestamp in times:
+            self.add(timestamp)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[float]:
+        for pane in self.panes:
+            yield from sorted(self.buckets[pane])
+
+    def add(self, timestamp: float) -> None:
+        pane = int(timestamp // self.width)
+        bucket = self.buckets.get(pane)
+        if bucket is None:
+            bucket = self.buckets[pane] = array("d")
+            panes = self.panes
+            if not panes or pane > panes[-1]:
+                panes.append(pane)
+            elif pane < panes[0]:
+                panes.appendleft(pane)
+            else:
+                panes.insert(bisect_left(panes, pane), pane)
+        bucket.append(timestamp)
+        self.size += 1
+
+    def evict(self, cutoff: float) -> int:
+        """Drops the timestamps before `cutoff`; returns how many."""
+        panes, buckets = self.panes, self.buckets
+        first = int(cutoff // self.width)
+        evicted = 0
+        while panes and panes[0] < first:
+            evicted += len(buckets.pop(panes.popleft()))
+        if panes and panes[0] == first:
+            bucket = buckets[first]
+            kept = array("d", [timestamp for timestamp in bucket if timestamp >= cutoff])
+            if len(kept) < len(bucket):
+                evicted += len(bucket) - len(kept)
+                if kept:
+                    buckets[first] = kept
+                else:
+                    del buckets[panes.popleft()]
+        self.size -= evicted
+        return evicted
+
+    def count(self, until: float) -> int:
+        """Timestamps up to `until` (inclusive); only panes after it are scanned."""
+        last = int(until // self.width)
+        total = self.size
+        for pane in reversed(self.panes):
+            if pane < last:
+                break
+            bucket = self.buckets[pane]
+            if pane > last:
+                total -= len(bucket)
+            else:
+                total -= sum(1 for timestamp in bucket if timestamp > until)
+        return total
+
+
+class SlidingCounter:
+    """
+    Counts events per key over the last `seconds` of event time.
+
+    Only timestamps are stored. `total` and every key's count are maintained
+    as events are added and evicted, so reading them never scans the window.
+    Events already older than the window start are not stored and are
+    counted in `dropped`.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.timelines: Dict[str, Timeline] = {}
+        self.total = 0
+        self.end = float("-inf")
+        # Older than the window start when added, so never counted
+        self.dropped = 0
+
+    @property
+    def start(self) -> float:
+        return self.end - self.seconds
+
+    @property
+    def pane_width(self) -> float:
+        return self.seconds / _TIMELINE_PANES if self.seconds > 0 else 1.0
+
+    def timeline(self, key: str) -> Timeline:
+        timeline = self.timelines.get(key)
+        if timeline is None:
+            timeline = self.timelines[key] = Timeline(width=self.pane_width)
+        return timeline
+
+    def add(self, key: str, timestamp: float) -> None:
+        # Already outside the window: it would be evicted on the next advance
+        if timestamp < self.start:
+            self.dropped += 1
+            return
+        self.timeline(key).add(timestamp)
+        self.total += 1
+
+    def advance(self, end: float) -> None:
+        """Moves the end of the window forward to `end` and evicts what fell out."""
+        if end <= self.end:
+            return
+        self.end = end
+        cutoff = self.start
+        for timeline in self.timelines.values():
+            self.total -= timeline.evict(cutoff)
+
+    def count(self, key: str, until: float | None = None) -> int:
+        """Events of `key` in the window, only up to `until` (inclusive) if given."""
+        timeline = self.timelines.get(key)
+        if timeline is None:
+            return 0
+        if until is None:
+            return len(timeline)
+        return timeline.count(until)
+
+    def merge(self, other: "SlidingCounter") -> None:
+        """Adds the events of another shard and evicts up to the later end."""
+        for key, timeline in other.timelines.items():
+            mine = self.timeline(key)
+            for timestamp in timeline:
+                mine.add(timestamp)
+        self.total = sum(len(timeline) for timeline in self.timelines.values())
+        self.dropped += other.dropped
+        end, self.end = max(self.end, other.end), float("-inf")
+        self.advance(end)
+
+    def state(self) -> dict:
+        return {
+            "seconds": self.seconds,
+            "end": self.end,
+            "timelines": {key: array("d", timeline) for key, timeline in self.timelines.items()},
+            "dropped": self.dropped,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "SlidingCounter":
+        counter = cls(state["seconds"])
+        counter.end = state["end"]
+        counter.dropped = state.get("dropped", 0)
+        for key, times in state["timelines"].items():
+            counter.timelines[key] = Timeline(times, counter.pane_width)
+            counter.total += len(times)
+        return counter
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    """
+    Windows `size` seconds long starting every `slide` seconds: tumbling when
+    `slide == size`, hopping when it is shorter, and sliding (one pane at a
+    time) when `slide` is None.
+    """
+
+    name: str
+    size: float
+    slide: float | None = None
+
+
+def tumbling(size: float, name: str | None = None) -> WindowSpec:
+    return WindowSpec(name or f"tumbling_{size:g}s", size, size)
+
+
+def hopping(size: float, slide: float, name: str | None = None) -> WindowSpec:
+    return WindowSpec(name or f"hopping_{size:g}s_{slide:g}s", size, slide)
+
+
+def sliding(size: float, name: str | None = None) -> WindowSpec:
+    return WindowSpec(name or f"sliding_{size:g}s", size)
+
+
+def pane_width(specs: Sequence[WindowSpec]) -> float:
+    """The widest pane every window size and slide is a multiple of (ms resolution)."""
+    millis = [round(value * 1000) for spec in specs for value in (spec.size, spec.slide) if value]
+    return math.gcd(*millis) / 1000
+
+
+class Count:
+    """Number of events; the default pane aggregate."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: int = 0):
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"Count({self.value})"
+
+    def __getstate__(self) -> int:
+        return self.value
+
+    def __setstate__(self, value: int) -> None:
+        self.value = value
+
+    def add(self, value: float | None = None) -> None:
+        self.value += 1
+
+    def merge(self, other: "Count") -> None:
+        self.value += other.value
+
+
+class PaneWindows:
+    """
+    Answers many windows at once from one set of pre-aggregated panes.
+
+    Events are folded once into the aggregate of their key in a `width`-second
+    pane (by default the widest pane all the windows align to). A window is
+    answered by merging the panes it covers, so memory depends on the number
+    of panes kept, which is bounded by the largest window, and on the number of
+    keys, never on the number of events.
+
+    `advance` moves the watermark. The window reported for each spec is the
+    latest one the watermark has closed. Events that would land in a pane such
+    a window covers are refused and counted in `refused`, so a reported window
+    never changes; windows still open accept late events. Panes older than
+    every closed window are freed. Aggregates must provide `add(value)` and
+    `merge(other)`.
+    """
+
+    def __init__(
+        self,
+        specs: Sequence[WindowSpec],
+        width: float | None = None,
+        aggregate: Callable[[], object] = Count,
+    ):
+        if not specs:
+            raise ValueError("At least one window is required")
+        self.specs: Dict[str, WindowSpec] = {}
+        for spec in specs:
+            if spec.name in self.specs:
+                raise ValueError(f"Duplicate window name: {spec.name!r}")
+            self.specs[spec.name] = spec
+        self.width = width or pane_width(specs)
+        for spec in specs:
+            for value in (spec.size, spec.slide or self.width):
+                if abs(value / self.width - round(value / self.width)) > 1e-9:
+                    raise ValueError(f"Window {spec.name!r} is not a multiple of the {self.width:g}s pane")
+        self.aggregate = aggregate
+        self.retention = max(spec.size + (spec.slide or self.width) for spec in specs)
+        self.panes: Dict[int, Dict[str, object]] = {}
+        self.watermark = float("-inf")
+        # Events too late for the windows already closed
+        self.refused = 0
+        self._oldest_pane = -math.inf
+        self._closed_pane = -math.inf
+
+    def add(self, key: str, timestamp: float, value: float | None = None) -> bool:
+        """Folds one event in; False when its pane belongs to a closed window."""
+        pane = int(timestamp // self.width)
+        if pane < self._closed_pane:
+            self.refused += 1
+            return False
+        aggregates = self.panes.get(pane)
+        if aggregates is None:
+            aggregates = self.panes[pane] = {}
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+            aggregate = aggregates[key] = self.aggregate()
+        aggregate.add(value)
+        return True
+
+    def advance(self, timestamp: float) -> None:
+        """Moves the watermark forward and frees the panes no window can cover."""
+        if timestamp <= self.watermark:
+            return
+        self.watermark = timestamp
+        self._oldest_pane = int((timestamp - self.retention) // self.width)
+        self._closed_pane = round(max(self.bounds(name)[1] for name in self.specs) / self.width)
+        for pane in [pane for pane in self.panes if pane < self._oldest_pane]:
+            del self.panes[pane]
+
+    def bounds(self, name: str) -> Tuple[float, float]:
+        """Start and end (exclusive) of the last window of spec `name` the watermark closed."""
+        spec = self.specs[name]
+        slide = spec.slide or self.width
+        end = math.floor(self.watermark / slide) * slide
+        return end - spec.size, end
+
+    def window(self, name: str) -> Dict[str, object]:
+        """Merged aggregate of every key in the last closed window of spec `name`."""
+        start, end = self.bounds(name)
+        first, last = round(start / self.width), round(end / self.width)
+        merged: Dict[str, object] = {}
+        for pane, aggregates in self.panes.items():
+            if not first <= pane < last:
+                continue
+            for key, aggregate in aggregates.items():
+                total = merged.get(key)
+                if total is None:
+                    total = merged[key] = self.aggregate()
+                total.merge(aggregate)
+        return merged
+
+    def windows(self) -> Dict[str, Dict[str, object]]:
+        return {name: self.window(name) for name in self.specs}
+
+    def merge(self, other: "PaneWindows") -> None:
+        """Merges the panes of another shard with the same windows."""
+        if other.specs != self.specs or other.width != self.width:
+            raise ValueError("Cannot merge panes of different windows")
+        for pane, aggregates in other.panes.items():
+            mine = self.panes.setdefault(pane, {})
+            for key, aggregate in aggregates.items():
+                total = mine.get(key)
+                if total is None:
+                    total = mine[key] = self.aggregate()
+                total.merge(aggregate)
+        self.refused += other.refused
+        self.advance(other.watermark)
+
+    def state(self) -> dict:
+        return {
+            "specs": list(self.specs.values()),
+            "width": self.width,
+            "watermark": self.watermark,
+            "panes": self.panes,
+            "refused": self.refused,
+        }
+
+    def restore(self, state: dict) -> bool:
+        """Loads a snapshot taken with the same windows; False if they changed."""
+        if state["specs"] != list(self.specs.values()) or state["width"] != self.width:
+            return False
+        self.panes = state["panes"]
+        self.refused = state.get("refused", 0)
+        watermark, self.watermark = state["watermark"], float("-inf")
+        if watermark > self.watermark:
+            self.advance(watermark)
+        return True
+
+
+class Watermark:
+    """
+    Event-time progress under bounded disorder: the watermark trails the newest
+    timestamp seen by `allowed_lateness` seconds, trading that much latency
+    for correctness. Events more than `horizon` seconds behind the watermark
+    can no longer change any result and are dropped; other out-of-order
+    events are still admitted. Both are counted.
+    """
+
+    def __init__(self, allowed_lateness: float = 0.0, horizon: float = 0.0):
+        self.allowed_lateness = allowed_lateness
+        # How far behind the watermark an event still counts, e.g. a window length
+        self.horizon = horizon
+        self.newest = float("-inf")
+        # Admitted although older than the newest event seen
+        self.late = 0
+        # Behind the watermark, so not admitted
+        self.dropped = 0
+
+    @property
+    def value(self) -> float:
+        return self.newest - self.allowed_lateness
+
+    def admit(self, timestamp: float) -> bool:
+        if timestamp < self.newest:
+            if timestamp < self.newest - self.allowed_lateness - self.horizon:
+                self.dropped += 1
+                return False
+            self.late += 1
+        return True
+
+    def observe(self, timestamp: float) -> None:
+        if timestamp > self.newest:
+            self.newest = timestamp
+
+    def state(self) -> dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Watermark":
+        watermark = cls()
+        watermark.__dict__.update(state)
+        return watermark
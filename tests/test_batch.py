@@ -0,0 +1,33 @@
+import pickle
+
+from src.batch import EventBatch
+
+
+def test_event_batch_columns() -> None:
+    events = [
+        {"service": "api", "timestamp": 30.0, "message": "HTTP Status Code: 200"},
+        {"service": "auth", "timestamp": 10.0, "message": "HTTP Status Code: 404"},
+        {"service": "api", "timestamp": 20.0, "message": "HTTP Status Code: 200"},
+        {"service": "db", "timestamp": 40.0, "message": "Database Error"},
+    ]
+    batch = EventBatch.from_events(events, source="batch_1.json")
+
+    assert len(batch) == 4
+    assert batch.service_names == ["api", "auth", "db"]
+    assert list(batch.service_ids) == [0, 1, 0, 2]
+    assert batch.message_table == ["HTTP Status Code: 200", "HTTP Status Code: 404", "Database Error"]
+    assert list(batch.status_codes) == [200, 404, 200, 0]
+    assert batch.messages == [event["message"] for event in events]
+    assert list(batch.events()) == events
+
+    ordered = batch.sorted_by_time()
+    assert list(ordered.timestamps) == [10.0, 20.0, 30.0, 40.0]
+    assert ordered.services == ["auth", "api", "api", "db"]
+
+    # Materialized columns are not shipped between processes
+    restored = pickle.loads(pickle.dumps(batch))
+    assert "_messages" not in restored.__dict__
+    assert restored == batch
+    restored.append("api", 50.0, "HTTP Status Code: 503")
+    assert list(restored.status_codes) == [200, 404, 200, 0, 503]
+    assert restored.service_names == ["api", "auth", "db"]
@@ -0,0 +1,157 @@
+import gzip
+import json
+import pathlib
+
+import pytest
+
+from src import task_4
+from src.bloom import (
+    BloomFilter,
+    CountingBloomFilter,
+    MappedBloomFilter,
+    ScalableBloomFilter,
+    build,
+    build_from_file,
+    optimal_shape,
+)
+
+
+def test_bloom_filter_sizing_and_batched_lookups() -> None:
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    assert (bloom.size, bloom.hash_count) == optimal_shape(2000, 0.01)
+    assert bloom.hash_count == 7
+
+    members = [f"pattern {i}" for i in range(2000)]
+    for member in members:
+        bloom.add(member)
+    assert all(bloom.contains_many(members))
+
+    others = [f"other {i}" for i in range(20000)]
+    found = bloom.contains_many(others)
+    assert found == [other in bloom for other in others]
+    assert sum(found) / len(others) < 0.02
+
+
+def test_scalable_filter_keeps_its_error_rate_as_it_grows() -> None:
+    bloom = ScalableBloomFilter(capacity=100, error_rate=0.01)
+    members = [f"pattern {i}" for i in range(5000)]
+    for member in members:
+        bloom.add(member)
+
+    assert len(bloom.stages) == 6
+    assert all(bloom.contains_many(members))
+    others = [f"other {i}" for i in range(20000)]
+    assert sum(bloom.contains_many(others)) / len(others) < 0.015
+
+
+def test_counting_filter_supports_removal() -> None:
+    bloom = CountingBloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"pattern {i}")
+    for i in range(0, 1000, 2):
+        bloom.remove(f"pattern {i}")
+
+    assert all(bloom.contains_many([f"pattern {i}" for i in range(1, 1000, 2)]))
+    assert sum(bloom.contains_many([f"pattern {i}" for i in range(0, 1000, 2)])) < 50
+    assert bloom.count == 500
+    with pytest.raises(KeyError):
+        bloom.remove("never added")
+
+
+def test_mapped_filter_matches_the_in_memory_one(tmp_path: pathlib.Path) -> None:
+    interests = tmp_path / "interests.txt.gz"
+    with gzip.open(interests, "wt", encoding="utf-8") as file:
+        for i in range(5000):
+            file.write(f"pattern {i}\n")
+        file.write("\n")
+
+    assert build_from_file(interests, tmp_path / "interests.bloom", error_rate=0.01) == 5000
+
+    in_memory = BloomFilter(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        in_memory.add(f"pattern {i}")
+    queries = [f"pattern {i}" for i in range(0, 10000, 7)]
+
+    with MappedBloomFilter(tmp_path / "interests.bloom") as mapped:
+        assert (mapped.size, mapped.hash_count, mapped.count) == (in_memory.size, in_memory.hash_count, 5000)
+        assert mapped.contains_many(queries) == in_memory.contains_many(queries)
+        with pytest.raises(TypeError):
+            mapped.add("pattern -1")
+
+    (tmp_path / "broken.bloom").write_bytes(b"not a filter")
+    with pytest.raises(ValueError):
+        MappedBloomFilter(tmp_path / "broken.bloom")
+
+
+def test_task_4_reads_a_mapped_filter(tmp_path: pathlib.Path) -> None:
+    source = tmp_path / "source"
+    source.mkdir()
+    events = [
+        {"service": "api", "timestamp": 1000.0, "message": "Cache miss"},
+        {"service": "api", "timestamp": 1001.0, "message": "User login successful"},
+    ]
+    with open(source / "batch_1.json", "w") as file:
+        json.dump(events, file)
+    build(["Cache miss"], tmp_path / "interests.bloom", capacity=1)
+
+    results = list(task_4.compute(str(source), max_batches=1, bloom_path=str(tmp_path / "interests.bloom")))
+    assert [result.value for result in results] == [1.0]
+
+
+
+def test_task_4_releases_the_mapped_filter_when_stopped_early(tmp_path: pathlib.Path, monkeypatch) -> None:
+    opened = []
+
+    class Recording(MappedBloomFilter):
+        def __init__(self, path) -> None:
+            super().__init__(path)
+            opened.append(self)
+
+    monkeypatch.setattr(task_4, "MappedBloomFilter", Recording)
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump([{"service": "api", "timestamp": 1000.0, "message": "Cache miss"}] * 2, file)
+    build(["Cache miss"], tmp_path / "interests.bloom", capacity=1)
+
+    generator = task_4.compute(str(tmp_path), bloom_path=str(tmp_path / "interests.bloom"))
+    next(generator)
+    generator.close()
+    assert opened[0]._mmap.closed
+
+
+def test_task_4_matches_a_bounded_substring_list(tmp_path: pathlib.Path) -> None:
+    source = tmp_path / "source"
+    source.mkdir()
+    events = [
+        {"service": "api", "timestamp": 1000.0, "message": "Cache miss"},
+        {"service": "api", "timestamp": 1001.0, "message": "upstream: Cache miss (retrying)"},
+        {"service": "api", "timestamp": 1002.0, "message": "User login successful"},
+    ]
+    with open(source / "batch_1.json", "w") as file:
+        json.dump(events, file)
+    build(["Cache miss"], tmp_path / "interests.bloom", capacity=1)
+    (tmp_path / "substrings.txt").write_text("Cache miss\n")
+
+    # Exact matches come from the mapped filter, substrings from the short list
+    results = list(task_4.compute(
+        str(source),
+        max_batches=1,
+        bloom_path=str(tmp_path / "interests.bloom"),
+        substrings_path=str(tmp_path / "substrings.txt"),
+    ))
+    assert [result.value for result in results] == [1.0, 1.0]
+
+    with pytest.raises(ValueError):
+        task_4.load_substrings(str(tmp_path / "substrings.txt"), limit=0)
+
+
+@pytest.mark.parametrize("kind", ["standard", "scalable", "counting"])
+def test_task_4_filter_kinds(tmp_path: pathlib.Path, kind: str) -> None:
+    events = [
+        {"service": "db", "timestamp": 1000.0, "message": "Database Error"},
+        {"service": "api", "timestamp": 1001.0, "message": "User login successful"},
+    ]
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump(events, file)
+
+    results = list(task_4.compute(str(tmp_path), max_batches=1, bloom_kind=kind))
+    assert [result.value for result in results] == [1.0]
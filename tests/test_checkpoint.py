@@ -0,0 +1,75 @@
+import datetime
+import json
+import pathlib
+import sys
+
+from src.checkpoint import Checkpointer
+from src.task_1 import compute
+
+
+class _Gone:
+    pass
+
+
+def test_checkpointer_roundtrip(tmp_path: pathlib.Path) -> None:
+    checkpointer = Checkpointer(tmp_path / "state.ckpt", interval=3600)
+    assert checkpointer.load() is None
+
+    checkpointer.save({"cursor": (1, "batch_1.json"), "bits": b"\x01\x02"})
+    assert checkpointer.load() == {"cursor": (1, "batch_1.json"), "bits": b"\x01\x02"}
+    assert not checkpointer.maybe_save(lambda: {"cursor": (2, "batch_2.json")})
+    # A state function may decline to be saved this time
+    assert not Checkpointer(tmp_path / "other.ckpt", interval=0).maybe_save(lambda: None)
+    assert not (tmp_path / "other.ckpt").exists()
+    # A snapshot of another state layout is ignored
+    assert Checkpointer(tmp_path / "state.ckpt", schema=1).load() is None
+
+    # A damaged snapshot is ignored rather than resumed from
+    blob = bytearray((tmp_path / "state.ckpt").read_bytes())
+    blob[-1] ^= 0xFF
+    (tmp_path / "state.ckpt").write_bytes(bytes(blob))
+    assert checkpointer.load() is None
+
+
+def test_checkpointer_ignores_snapshots_it_cannot_unpickle(tmp_path: pathlib.Path, monkeypatch) -> None:
+    checkpointer = Checkpointer(tmp_path / "state.ckpt")
+    checkpointer.save({"state": _Gone()})
+    # The class was renamed or moved since the snapshot was taken
+    monkeypatch.delattr(sys.modules[__name__], "_Gone")
+    assert checkpointer.load() is None
+
+
+def test_task_1_resumes_from_checkpoint(tmp_path: pathlib.Path) -> None:
+    source = tmp_path / "source"
+    source.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = str(tmp_path / "task_1.ckpt")
+    basetime = datetime.datetime.now()
+
+    def write_batch(name: str, seconds: int, status: int) -> None:
+        with open(source / name, "w") as file:
+            json.dump(
+                [
+                    {
+                        "service": "monitoring",
+                        "timestamp": (basetime + datetime.timedelta(seconds=seconds)).timestamp(),
+                        "message": f"HTTP Status Code: {status}",
+                    }
+                ],
+                file,
+            )
+
+    write_batch("batch_1.json", 48, 200)
+    write_batch("batch_2.json", 96, 500)
+    generator = compute(str(source), checkpoint_path=checkpoint_path, checkpoint_interval=0)
+    assert next(generator).value == 0.5
+    generator.close()
+
+    # The restarted task must not need the files it already aggregated
+    (source / "batch_1.json").unlink()
+    (source / "batch_2.json").unlink()
+    write_batch("batch_3.json", 144, 200)
+
+    generator = compute(str(source), checkpoint_path=checkpoint_path, checkpoint_interval=0)
+    resumed = next(generator)
+    assert resumed.value == 2 / 3
+    assert resumed.oldest_considered.timestamp() == (basetime + datetime.timedelta(seconds=48)).timestamp()
@@ -0,0 +1,51 @@
+import json
+import pathlib
+
+import pytest
+
+pl = pytest.importorskip("polars")
+
+from src.task_5.compaction import compact, scan_compacted  # noqa: E402
+from src.task_5.task_5 import analyze  # noqa: E402
+
+
+def _write_batch(path: pathlib.Path, events) -> None:
+    with open(path, "w") as file:
+        json.dump(events, file)
+
+
+def test_compaction_is_incremental_and_idempotent(tmp_path: pathlib.Path) -> None:
+    source = tmp_path / "data"
+    source.mkdir()
+    hour = 1760558400.0  # 2025-10-15T20:00:00Z
+    _write_batch(source / "batch_1.json", [
+        {"service": "training", "timestamp": hour + 10, "message": "HTTP Status Code: 200"},
+        {"service": "inference", "timestamp": hour + 20, "message": "HTTP Status Code: 500"},
+    ])
+    _write_batch(source / "batch_2.json", [
+        {"service": "training", "timestamp": hour + 30, "message": "HTTP Status Code: 404"},
+        {"service": "training", "timestamp": hour + 3600, "message": "HTTP Status Code: 200"},
+    ])
+    target = tmp_path / "parquet"
+
+    stats = compact(str(source / "*.json"), target)
+    assert (stats.files_converted, stats.rows, stats.partitions) == (2, 4, 3)
+    # The two small files of training/20h were merged into one
+    assert stats.files_merged == 2
+    assert len(list((target / "service=training" / "hour=2025-10-15T20").glob("*.parquet"))) == 1
+
+    # Nothing new: a second run converts nothing and keeps the rows once
+    assert compact(str(source / "*.json"), target).files_converted == 0
+    assert scan_compacted(target).select(pl.len()).collect().item() == 4
+
+    _write_batch(source / "batch_3.json", [
+        {"service": "inference", "timestamp": hour + 40, "message": "HTTP Status Code: 503"},
+    ])
+    assert compact(str(source / "*.json"), target).files_converted == 1
+
+    pruned = scan_compacted(target).filter(pl.col("service") == "inference").collect()
+    assert sorted(pruned["message"].cast(pl.String).to_list()) == ["HTTP Status Code: 500", "HTTP Status Code: 503"]
+
+    report = analyze(str(target / "**" / "*.parquet"))
+    errors = dict(zip(report.errors["endpoint"], report.errors["tasa_fallos"]))
+    assert errors == {"training": pytest.approx(1 / 3), "inference": 1.0}
@@ -0,0 +1,75 @@
+import datetime
+import json
+import pathlib
+
+import pytest
+
+from src.batch import EventBatch
+from src.bloom import ScalableBloomFilter
+from src.engine import BloomDetector, Engine, Operator, Reservoir, RunningAverage, SlidingWindow, compute
+
+
+def test_engine_runs_every_operator_over_one_read(tmp_path: pathlib.Path) -> None:
+    basetime = datetime.datetime.now()
+    events = [
+        {"service": "monitoring", "timestamp": basetime.timestamp(), "message": "HTTP Status Code: 200"},
+        {"service": "monitoring", "timestamp": basetime.timestamp() + 90, "message": "HTTP Status Code: 500"},
+        {"service": "monitoring", "timestamp": basetime.timestamp() + 100, "message": "HTTP Status Code: 500"},
+        {"service": "db", "timestamp": basetime.timestamp() + 100, "message": "Database Error"},
+    ]
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump(events, file)
+
+    generator = compute(str(tmp_path), checkpoint_path=str(tmp_path / ".state"), checkpoint_interval=0)
+    results = next(generator)
+    generator.close()
+
+    assert results["running_average"].value == pytest.approx(1 / 3)
+    assert results["sliding_window"].value == 2.0
+    assert results["reservoir"].value == 500.0
+    assert results["bloom"].value == 0.75
+
+    # A restart resumes every operator from the shared snapshot
+    with open(tmp_path / "batch_2.json", "w") as file:
+        json.dump(events[:1], file)
+    generator = compute(str(tmp_path), checkpoint_path=str(tmp_path / ".state"))
+    results = next(generator)
+    generator.close()
+
+    assert results["running_average"].value == 0.5
+    assert results["bloom"].value == 0.6
+
+
+def test_engine_rejects_duplicate_names() -> None:
+    with pytest.raises(ValueError):
+        Engine([Reservoir(), Reservoir()])
+
+    engine = Engine([RunningAverage(), SlidingWindow(), BloomDetector()])
+    assert engine.results() == {}
+
+
+def test_incomplete_operator_fails_when_created() -> None:
+    class NoMerge(Operator):
+        def update(self, batch) -> None:
+            pass
+
+        def result(self) -> None:
+            return None
+
+    with pytest.raises(TypeError):
+        NoMerge()
+
+
+def test_bloom_detectors_merge_with_any_filter_kind() -> None:
+    def detector() -> BloomDetector:
+        bloom = ScalableBloomFilter(capacity=10, error_rate=0.01)
+        bloom.add("Database Error")
+        return BloomDetector(bloom)
+
+    first, second = detector(), detector()
+    for operator, message in ((first, "Database Error"), (second, "User login successful")):
+        batch = EventBatch()
+        batch.append("db", 1000.0, message)
+        operator.update(batch)
+    first.merge(second)
+    assert (first.total_events, first.detected_events) == (2, 1)
@@ -0,0 +1,51 @@
+import pickle
+import random
+
+from src.heavy_hitters import CountMap, CountMinSketch, HeavyHitters, SpaceSaving
+
+
+def test_count_map_tracks_most_common() -> None:
+    counts = CountMap()
+    for code in (200, 200, 404, 500, 404, 404):
+        counts.increment(code)
+    assert counts.most_common() == (404, 3)
+
+    counts.replace(404, 200)
+    counts.replace(404, 200)
+    assert counts.most_common() == (200, 4)
+    assert (counts[404], counts[500]) == (1, 1)
+
+    counts.decrement(404)
+    assert 404 not in counts.counts
+    assert len(counts) == 2
+
+
+def test_space_saving_and_count_min() -> None:
+    rng = random.Random(3)
+    stream = [rng.choice("abc") if rng.random() < 0.5 else f"noise-{rng.randrange(5000)}" for _ in range(20000)]
+    exact = {key: stream.count(key) for key in "abc"}
+
+    top_k = SpaceSaving(capacity=50)
+    sketch = CountMinSketch(width=1024, depth=4)
+    for key in stream:
+        top_k.update(key)
+        sketch.update(key)
+
+    # Frequent keys are always monitored and never undercounted
+    assert {key for key, _ in top_k.top(3)} == {"a", "b", "c"}
+    for key, count in top_k.top(3):
+        assert exact[key] <= count <= exact[key] + top_k.errors[key]
+        assert exact[key] <= sketch.estimate(key) <= exact[key] + 0.01 * len(stream)
+
+
+def test_heavy_hitters_weighted_updates() -> None:
+    hitters = HeavyHitters(capacity=2)
+    hitters.update_counts({200: 10, 404: 3})
+    hitters.update_counts({500: 5, 200: 1})
+    assert hitters.top(1) == [(200, 11)]
+    assert hitters.top() == [(200, 11), (500, 8)]
+    assert hitters.estimate(404) == 3
+    assert hitters.total == 19
+
+    restored = pickle.loads(pickle.dumps(hitters))
+    assert restored.top() == hitters.top()
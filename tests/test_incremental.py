@@ -0,0 +1,76 @@
+import json
+import pathlib
+import random
+import subprocess
+import sys
+
+import pytest
+
+pl = pytest.importorskip("polars")
+
+from src.task_5 import incremental  # noqa: E402
+from src.task_5.task_5 import analyze  # noqa: E402
+
+
+def _write_batch(path: pathlib.Path, rng: random.Random) -> None:
+    events = [
+        {
+            "service": rng.choice(["training", "inference", "monitoring"]),
+            "timestamp": 1760559686.0 + i,
+            "message": f"HTTP Status Code: {rng.choice([200, 201, 404, 500])}",
+            "response_time_ms": rng.expovariate(1 / 120),
+        }
+        for i in range(200)
+    ]
+    with open(path, "w") as file:
+        json.dump(events, file)
+
+
+def test_incremental_matches_a_full_recompute(tmp_path: pathlib.Path) -> None:
+    rng = random.Random(3)
+    source = tmp_path / "data"
+    source.mkdir()
+    state = tmp_path / "state"
+    for i in range(3):
+        _write_batch(source / f"batch_{i}.json", rng)
+    incremental.update(str(source / "*.json"), state)
+
+    for i in range(3, 5):
+        _write_batch(source / f"batch_{i}.json", rng)
+    result = incremental.update(str(source / "*.json"), state)
+    full = analyze(str(source / "*.json"))
+
+    assert set(incremental.Checkpointer(state, schema=incremental.CHECKPOINT_SCHEMA).load().processed) == {
+        str(path) for path in source.glob("*.json")
+    }
+    assert result.errors.select("endpoint", "total_errores", "total_solicitudes").sort("endpoint").rows() == (
+        full.errors.select("endpoint", "total_errores", "total_solicitudes").sort("endpoint").rows()
+    )
+    mine = result.latency.sort("endpoint")
+    theirs = full.latency.sort("endpoint")
+    assert mine["latencia_promedio"].to_list() == pytest.approx(theirs["latencia_promedio"].to_list())
+    assert mine["desviacion_estandar"].to_list() == pytest.approx(theirs["desviacion_estandar"].to_list())
+    assert mine["latencia_p95"].to_list() == pytest.approx(theirs["latencia_p95"].to_list(), rel=0.03)
+    assert sorted(result.user_agents.rows()) == sorted(full.user_agents.rows())
+
+    # Nothing new: the report comes from the saved state alone
+    again = incremental.update(str(source / "*.json"), state)
+    assert again.errors.equals(result.errors)
+
+
+def test_state_saved_by_the_cli_loads_from_the_library(tmp_path: pathlib.Path) -> None:
+    _write_batch(tmp_path / "batch_0.json", random.Random(5))
+    state = tmp_path / "state"
+    root = pathlib.Path(__file__).resolve().parent.parent
+    subprocess.run(
+        [sys.executable, "-m", "src.task_5.incremental", str(tmp_path / "*.json"), str(state)],
+        cwd=root,
+        check=True,
+    )
+
+    # The classes were pickled under their module, not as __main__.State, so
+    # the counts of the first file survive even once it is gone
+    (tmp_path / "batch_0.json").unlink()
+    _write_batch(tmp_path / "batch_1.json", random.Random(6))
+    result = incremental.update(str(tmp_path / "*.json"), state)
+    assert result.errors["total_solicitudes"].sum() == 400
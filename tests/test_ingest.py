@@ -0,0 +1,90 @@
+import json
+import pathlib
+
+from src.ingest import ParallelDecoder, read_batches
+
+
+def _write_batches(source: pathlib.Path) -> list[pathlib.Path]:
+    batches = {
+        "batch_1.json": [30.0, 10.0],
+        "batch_2.json": [20.0, 40.0],
+        "batch_3.json": [5.0],
+    }
+    for name, timestamps in batches.items():
+        with open(source / name, "w") as file:
+            json.dump(
+                [
+                    {"service": "api", "timestamp": ts, "message": "HTTP Status Code: 200"}
+                    for ts in timestamps
+                ],
+                file,
+            )
+    with open(source / "broken.json", "w") as file:
+        file.write('[{"service": "api", "timest')
+    return [source / name for name in (*batches, "broken.json")]
+
+
+def test_parallel_decoder_orders(tmp_path: pathlib.Path) -> None:
+    paths = _write_batches(tmp_path)
+
+    for workers in (0, 2):
+        with ParallelDecoder(workers) as decoder:
+            batches = list(decoder.decode(paths))
+        timestamps = [ts for batch in batches for ts in batch.timestamps]
+        assert timestamps == [30.0, 10.0, 20.0, 40.0, 5.0]
+        assert [batch.source for batch in batches if batch.error] == [str(paths[-1])]
+
+        with ParallelDecoder(workers, order="time") as decoder:
+            *errors, merged = decoder.decode(paths)
+        assert list(merged.timestamps) == [5.0, 10.0, 20.0, 30.0, 40.0]
+        assert [batch.source for batch in errors] == [str(paths[-1])]
+        assert next(merged.events()) == {"service": "api", "timestamp": 5.0, "message": "HTTP Status Code: 200"}
+
+
+def test_parallel_decoder_tails_segments(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "segment.ndjson"
+    with open(path, "w") as file:
+        file.write('{"service": "api", "timestamp": 1.0, "message": "HTTP Status Code: 200"}\n')
+
+    with ParallelDecoder() as decoder:
+        assert [list(batch.timestamps) for batch in decoder.decode([path])] == [[1.0]]
+
+        with open(path, "a") as file:
+            file.write('{"service": "api", "timestamp": 2.0, "message": "HTTP Status Code: 500"}\n')
+
+        # Only the appended event is decoded, and the offset can be checkpointed
+        assert [list(batch.timestamps) for batch in decoder.decode([path])] == [[2.0]]
+        assert decoder.offsets == {str(path): path.stat().st_size}
+
+
+def test_read_batches_skips_bad_lines_and_values(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "segment.ndjson"
+    with open(path, "w") as file:
+        file.write('{"timestamp": 1.0}\n{broken\n[1, 2]\n{"timestamp": 3.0}\n')
+
+    (batch,) = read_batches(path)
+    assert list(batch.timestamps) == [1.0, 3.0]
+    assert batch.offset == path.stat().st_size
+    assert "byte" in batch.error and "list" in batch.error
+
+    # Resuming from the saved offset does not trip on the bad lines again
+    (batch,) = read_batches(path, batch.offset)
+    assert len(batch) == 0 and batch.error is None
+
+    with open(tmp_path / "batch.json", "w") as file:
+        json.dump([{"timestamp": 1.0}, [1, 2], {"timestamp": 2.0}], file)
+    (batch,) = read_batches(tmp_path / "batch.json")
+    assert list(batch.timestamps) == [1.0, 2.0]
+    assert "list" in batch.error
+
+
+def test_read_batches_reports_fields_of_the_wrong_type(tmp_path: pathlib.Path) -> None:
+    for name, bad in (("timestamp.json", {"timestamp": "soon"}), ("message.json", {"message": ["x"]})):
+        with open(tmp_path / name, "w") as file:
+            json.dump([{"timestamp": 1.0}, bad, {"timestamp": 3.0}], file)
+
+        # The file stops at the bad event, like any other per-file error
+        (batch,) = read_batches(tmp_path / name)
+        assert list(batch.timestamps) == [1.0]
+        assert len(batch.message_ids) == len(batch.service_ids) == 1
+        assert batch.error is not None
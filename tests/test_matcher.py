@@ -0,0 +1,40 @@
+import json
+import pathlib
+import pickle
+import random
+
+from src import task_4
+from src.matcher import AhoCorasick, PatternMatcher
+
+
+def test_aho_corasick_finds_overlapping_patterns() -> None:
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    assert [automaton.patterns[i] for i in automaton.search("ushers")] == ["she", "he", "hers"]
+    assert automaton.matches("this")
+    assert not automaton.matches("ash tree")
+
+
+def test_pattern_matcher_agrees_with_substring_search() -> None:
+    rng = random.Random(7)
+    for _ in range(500):
+        patterns = sorted({"".join(rng.choice("abc") for _ in range(rng.randint(2, 5))) for _ in range(4)})
+        matcher = PatternMatcher(patterns, gram=2)
+        for _ in range(10):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 30)))
+            assert matcher.matches(text) == any(pattern in text for pattern in patterns)
+            assert sorted(matcher.search(text)) == [pattern for pattern in patterns if pattern in text]
+
+    matcher = pickle.loads(pickle.dumps(PatternMatcher(task_4.INTEREST_MESSAGES)))
+    assert matcher.matches_many(["upstream: Connection refused (111)", "User login successful"]) == [True, False]
+
+
+def test_task_4_detects_patterns_inside_messages(tmp_path: pathlib.Path) -> None:
+    events = [
+        {"service": "db", "timestamp": 1000.0, "message": "query failed: Database Error on shard 3"},
+        {"service": "api", "timestamp": 1001.0, "message": "User login successful"},
+    ]
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump(events, file)
+
+    results = list(task_4.compute(str(tmp_path), max_batches=1))
+    assert [result.value for result in results] == [1.0]
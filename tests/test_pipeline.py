@@ -0,0 +1,55 @@
+import json
+import pathlib
+import time
+
+import pytest
+
+from src.pipeline import Pipeline
+
+
+def _write_batches(source: pathlib.Path, count: int) -> None:
+    source.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        with open(source / f"batch_{i:03d}.json", "w") as file:
+            json.dump([{"service": "api", "timestamp": float(i), "message": "HTTP Status Code: 200"}], file)
+
+
+def test_pipeline_bounds_pending_batches(tmp_path: pathlib.Path) -> None:
+    _write_batches(tmp_path, 20)
+
+    with Pipeline.from_directory(tmp_path, max_pending=2) as pipeline:
+        tick = next(pipeline.ticks())
+        # A slow consumer leaves the reader blocked on a full queue
+        time.sleep(0.3)
+        assert pipeline.stats["read"].batches <= 3
+
+        timestamps = [batch.timestamps[0] for batch in tick]
+        assert timestamps == [float(i) for i in range(20)]
+        assert tick.cursor[1] == "batch_019.json"
+        assert pipeline.stats["compute"].events == 20
+        assert pipeline.stats["read"].waiting_seconds > 0
+
+
+def test_pipeline_yields_idle_ticks(tmp_path: pathlib.Path) -> None:
+    with Pipeline.from_directory(tmp_path) as pipeline:
+        ticks = pipeline.ticks(idle_timeout=0.1)
+        assert next(ticks) is None
+
+        _write_batches(tmp_path, 1)
+        tick = next(ticks)
+        while tick is None:
+            tick = next(ticks)
+        assert len(list(tick)) == 1
+
+
+def test_pipeline_reraises_reader_errors(tmp_path: pathlib.Path) -> None:
+    _write_batches(tmp_path, 1)
+    pipeline = Pipeline.from_directory(tmp_path)
+
+    def fail(paths):
+        raise OSError("disk went away")
+
+    pipeline.decoder.decode = fail
+    with pipeline, pytest.raises(OSError, match="disk went away"):
+        for tick in pipeline.ticks():
+            tick.drain()
@@ -0,0 +1,91 @@
+import gzip
+import io
+import json
+import pathlib
+
+import pytest
+
+from src.reader import iter_appended, iter_chunks, iter_events, iter_json
+
+
+def test_iter_json_across_block_boundaries() -> None:
+    document = [
+        {"service": "api", "timestamp": 1760559686.31526, "message": "HTTP Status Code: 200"},
+        {"service": "auth", "timestamp": -2.5e-3, "message": "x" * 300},
+        [1, 2, {"nested": None}],
+        123456789,
+        True,
+    ]
+    for text in (json.dumps(document), json.dumps(document, indent=2)):
+        for block_size in (1, 3, 7, 64):
+            assert list(iter_json(io.StringIO(text), block_size)) == document
+
+    assert list(iter_json(io.StringIO('{"service": "api"}'), 4)) == [{"service": "api"}]
+    assert list(iter_json(io.StringIO(" [ ] "), 2)) == []
+
+    for malformed in ("", "[1, 2", "[1 2]", "[1,]", "[1] [2]"):
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json(io.StringIO(malformed), 2))
+
+
+def test_iter_events_streams_large_files(tmp_path: pathlib.Path) -> None:
+    events = [
+        {"service": "api", "timestamp": float(i), "message": "HTTP Status Code: 200"}
+        for i in range(2500)
+    ]
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump(events, file)
+
+    # Forcing the incremental parser on a file that would be loaded whole
+    assert list(iter_events(tmp_path / "batch_1.json", block_size=128, small_file_size=0)) == events
+    assert list(iter_events(tmp_path / "batch_1.json")) == events
+
+    chunks = list(iter_chunks(tmp_path / "batch_1.json", chunk_size=1000, small_file_size=0))
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    assert [event for chunk in chunks for event in chunk] == events
+
+
+def test_iter_events_line_delimited_and_compressed(tmp_path: pathlib.Path) -> None:
+    events = [
+        {"service": "api", "timestamp": float(i), "message": "HTTP Status Code: 200"}
+        for i in range(10)
+    ]
+    lines = "".join(json.dumps(event) + "\n" for event in events)
+    (tmp_path / "segment.ndjson").write_text(lines + "\n")
+    with gzip.open(tmp_path / "segment.jsonl.gz", "wt") as file:
+        file.write(lines)
+    with gzip.open(tmp_path / "batch.json.gz", "wt") as file:
+        json.dump(events, file)
+
+    for name in ("segment.ndjson", "segment.jsonl.gz", "batch.json.gz"):
+        assert list(iter_events(tmp_path / name)) == events
+
+
+def test_iter_appended_resumes_from_offset(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "segment.jsonl"
+    with open(path, "w") as file:
+        file.write('{"timestamp": 1.0}\n{"timestamp": 2.0}\n{"timest')
+
+    read = list(iter_appended(path))
+    assert [event for _, event in read] == [{"timestamp": 1.0}, {"timestamp": 2.0}]
+    offset = read[-1][0]
+
+    # The writer finishes the partial line and keeps appending
+    with open(path, "a") as file:
+        file.write('amp": 3.0}\n{"timestamp": 4.0}')
+
+    read = list(iter_appended(path, offset))
+    assert [event for _, event in read] == [{"timestamp": 3.0}, {"timestamp": 4.0}]
+    assert read[-1][0] == path.stat().st_size
+
+
+def test_iter_appended_skips_malformed_lines(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "segment.jsonl"
+    with open(path, "w") as file:
+        file.write('{"timestamp": 1.0}\n{broken\n{"timestamp": 3.0}\n')
+
+    errors: list = []
+    read = list(iter_appended(path, errors=errors))
+    assert [event for _, event in read] == [{"timestamp": 1.0}, None, {"timestamp": 3.0}]
+    assert read[-1][0] == path.stat().st_size
+    assert len(errors) == 1
@@ -0,0 +1,64 @@
+import random
+
+from src.sampling import SkipReservoir, StratifiedReservoir, WeightedReservoir
+
+
+class _Column:
+    """Sequence that records which positions are read."""
+
+    def __init__(self, values):
+        self.values = values
+        self.reads = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return self.values[index]
+
+
+def test_skip_reservoir_is_uniform_and_skips() -> None:
+    rng = random.Random(11)
+    early = 0
+    for _ in range(300):
+        reservoir = SkipReservoir(10, rng)
+        for start in range(0, 1000, 100):
+            reservoir.extend(range(start, start + 100))
+        assert len(reservoir) == 10 and reservoir.seen == 1000
+        early += sum(1 for item in reservoir.items if item < 500)
+    # Half of the sample should come from the first half of the stream
+    assert abs(early / 3000 - 0.5) < 0.05
+
+    # Once full, a large batch only reads the few replaced positions
+    column = _Column(list(range(100000)))
+    reservoir.extend(column)
+    assert column.reads < 200
+
+
+def test_stratified_reservoir_keeps_every_service() -> None:
+    reservoir = StratifiedReservoir(5, random.Random(1))
+    names = ["api", "rare"]
+    ids = [0] * 1000 + [1] * 3
+    reservoir.extend([200] * 1000 + [500] * 3, ids, names)
+    assert len(reservoir.strata["api"]) == 5
+    assert reservoir.strata["rare"].items == [500, 500, 500]
+    assert reservoir.counts.most_common() == (200, 5)
+
+
+def test_weighted_reservoir_follows_weights() -> None:
+    rng = random.Random(5)
+    heavy = 0
+    for _ in range(200):
+        reservoir = WeightedReservoir(2, rng)
+        values = list(range(1000))
+        weights = [1.0] * 1000
+        weights[500] = 1000.0
+        weights[10] = 0.0
+        reservoir.extend(values[:100], weights[:100])
+        reservoir.extend(values[100:], weights[100:])
+        assert 10 not in reservoir.items
+        heavy += 500 in reservoir.items
+        assert sum(reservoir.counts.counts.values()) == 2
+    # Item 500 holds half the weight: kept first with p ~ 1/2, else second with p ~ 1/2
+    assert abs(heavy / 200 - 0.75) < 0.1
@@ -0,0 +1,80 @@
+import json
+import pathlib
+
+import pytest
+
+from src.batch import EventBatch
+from src.engine import BloomDetector, Engine, RunningAverage, SlidingWindow
+from src.shard import ShardedEngine, compute, shard_of, split_by_shard
+
+
+def _operators():
+    return [RunningAverage(), SlidingWindow(seconds=60.0), BloomDetector()]
+
+
+def _events(n: int):
+    services = ["monitoring", "db", "auth", "cache", "search"]
+    return [
+        {
+            "service": services[i % len(services)],
+            "timestamp": 1000.0 + i,
+            "message": f"HTTP Status Code: {500 if i % 3 == 0 else 200}" if i % 7 else "Database Error",
+        }
+        for i in range(n)
+    ]
+
+
+def test_split_by_shard_keeps_each_service_on_its_owner() -> None:
+    batch = EventBatch()
+    batch.extend(_events(50))
+    parts = split_by_shard(batch, 3)
+
+    assert sum(len(part) for part in parts if part is not None) == len(batch)
+    for shard, part in enumerate(parts):
+        if part is not None:
+            assert all(shard_of(event["service"], 3) == shard for event in part.events())
+    assert split_by_shard(EventBatch(), 3) == [None, None, None]
+
+
+def test_sharded_engine_matches_a_single_engine(tmp_path: pathlib.Path) -> None:
+    events = _events(200)
+    for i in range(4):
+        with open(tmp_path / f"batch_{i}.json", "w") as file:
+            json.dump(events[i * 50:(i + 1) * 50], file)
+    files = sorted(tmp_path.glob("batch_*.json"))
+
+    single = Engine(_operators())
+    batch = EventBatch()
+    batch.extend(events)
+    single.update(batch)
+
+    with ShardedEngine(3, _operators) as engine:
+        _, states = engine.process([(path, 0) for path in files[:2]])
+        assert states is None
+        _, states = engine.process([(path, 0) for path in files[2:]], snapshot=True)
+        merged = engine.merge(states).results()
+
+    expected = single.results()
+    assert merged["running_average"].value == pytest.approx(expected["running_average"].value)
+    assert merged["sliding_window"].value == expected["sliding_window"].value
+    assert merged["bloom"].value == pytest.approx(expected["bloom"].value)
+
+
+def test_sharded_compute_resumes_from_checkpoint(tmp_path: pathlib.Path) -> None:
+    events = _events(30)
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump(events, file)
+
+    checkpoint = str(tmp_path / ".state")
+    generator = compute(str(tmp_path), shards=2, factory=_operators, checkpoint_path=checkpoint, checkpoint_interval=0)
+    first = next(generator)
+    generator.close()
+
+    with open(tmp_path / "batch_2.json", "w") as file:
+        json.dump(events[:1], file)
+    generator = compute(str(tmp_path), shards=2, factory=_operators, checkpoint_path=checkpoint)
+    second = next(generator)
+    generator.close()
+
+    # Only the new file is read; the previous events come from the snapshot
+    assert second["bloom"].value == pytest.approx((first["bloom"].value * 30 + 1) / 31)
@@ -0,0 +1,146 @@
+import http.server
+import json
+import pathlib
+import socketserver
+import threading
+from typing import List
+
+from src import task_4
+from src.sink import ForwardingSink, HttpTransport
+
+
+class _Receiver(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    batches: List[List[dict]]
+    failures: List[int]
+    connections: set
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.connections.add(id(self.connection))
+        if self.failures[0] > 0:
+            self.failures[0] -= 1
+            status = 503
+        else:
+            self.batches.append([json.loads(line) for line in body.splitlines()])
+            status = 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _serve(server_class, address, failures: int = 0):
+    handler = type("Receiver", (_Receiver,), {"batches": [], "failures": [failures], "connections": set()})
+    if server_class is _UnixServer:
+        # BaseHTTPRequestHandler expects an (host, port) client address
+        handler.address_string = lambda self: "unix"
+    server = server_class(address, handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, handler
+
+
+def test_sink_batches_by_size_and_reuses_connections() -> None:
+    server, receiver = _serve(http.server.ThreadingHTTPServer, ("127.0.0.1", 0))
+    url = f"http://127.0.0.1:{server.server_address[1]}/ingest"
+    try:
+        with ForwardingSink(HttpTransport(url, pool_size=2), max_batch=100, max_delay=60.0) as sink:
+            for i in range(1050):
+                sink.submit({"id": i})
+            assert sink.flush(timeout=10.0)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert sorted(record["id"] for batch in receiver.batches for record in batch) == list(range(1050))
+    assert sorted(len(batch) for batch in receiver.batches)[-1] == 100
+    assert len(receiver.connections) <= 2
+    assert sink.sent == 1050
+
+
+def test_sink_retries_then_spools_and_replays(tmp_path: pathlib.Path) -> None:
+    socket_path = str(tmp_path / "receiver.sock")
+    server, receiver = _serve(_UnixServer, socket_path, failures=2)
+    transport = HttpTransport("http://receiver/ingest", unix_socket=socket_path)
+    with ForwardingSink(transport, max_batch=10, retries=3, backoff=0.01, spool_dir=tmp_path / "spool") as sink:
+        for i in range(10):
+            sink.submit({"id": i})
+        assert sink.flush(timeout=10.0)
+    assert (sink.sent, sink.failures) == (10, 2)
+    server.shutdown()
+    server.server_close()
+    pathlib.Path(socket_path).unlink()
+
+    # Nothing listens any more: the batch ends up in the spool
+    with ForwardingSink(transport, max_delay=0.05, retries=1, backoff=0.01, spool_dir=tmp_path / "spool") as sink:
+        sink.submit({"id": 10})
+        assert sink.flush(timeout=10.0)
+    assert sink.spooled == 1
+    assert len(list((tmp_path / "spool").glob("*.ndjson"))) == 1
+
+    # Once the receiver is back, a new sink replays the spool
+    server, receiver = _serve(_UnixServer, socket_path)
+    with ForwardingSink(transport, max_delay=0.05, spool_dir=tmp_path / "spool") as sink:
+        sink.submit({"id": 11})
+        assert sink.flush(timeout=10.0)
+    server.shutdown()
+    server.server_close()
+
+    assert sorted(record["id"] for batch in receiver.batches for record in batch) == [10, 11]
+    assert not list((tmp_path / "spool").glob("*.ndjson"))
+
+
+def test_task_4_forwards_detections(tmp_path: pathlib.Path) -> None:
+    events = [
+        {"service": "db", "timestamp": 1000.0, "message": "Database Error"},
+        {"service": "api", "timestamp": 1001.0, "message": "User login successful"},
+        {"service": "auth", "timestamp": 1002.0, "message": "HTTP Status Code: 401"},
+    ]
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump(events, file)
+
+    server, receiver = _serve(http.server.ThreadingHTTPServer, ("127.0.0.1", 0))
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        with ForwardingSink(HttpTransport(url), max_delay=0.05) as sink:
+            results = list(task_4.compute(str(tmp_path), max_batches=1, sink=sink))
+            assert sink.flush(timeout=10.0)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # With a sink there is one result per tick rather than per detection
+    assert [result.value for result in results] == [2 / 3]
+    forwarded = [record for batch in receiver.batches for record in batch]
+    assert [record["service"] for record in forwarded] == ["db", "auth"]
+
+
+def test_sink_survives_a_truncated_response() -> None:
+    class Truncating(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            while self.rfile.readline() not in (b"\r\n", b""):
+                pass
+            self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\nabc")
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Truncating)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        with ForwardingSink(HttpTransport(url), max_delay=0.05, retries=1, backoff=0.01) as sink:
+            sink.submit({"id": 1})
+            assert sink.flush(timeout=10.0)
+            # A batch that cannot be serialized is dropped, not left pending
+            sink.submit({"id": object()})
+            assert sink.flush(timeout=10.0)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert (sink.sent, sink.dropped, sink.failures) == (0, 2, 2)
@@ -0,0 +1,61 @@
+import math
+import pickle
+import random
+
+from src.sketch import DDSketch
+from src.window import PaneWindows, tumbling
+
+
+def test_ddsketch_relative_error() -> None:
+    rng = random.Random(7)
+    values = [rng.lognormvariate(5, 1) for _ in range(20000)]
+    left, right = DDSketch(), DDSketch()
+    left.extend(values[:5000])
+    right.extend(values[5000:])
+    left.merge(right)
+
+    ordered = sorted(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * (len(values) - 1))]
+        assert abs(left.quantile(q) - exact) <= 0.01 * exact
+    assert left.count == 20000
+    assert len(left.bins) < 1000
+
+    restored = pickle.loads(pickle.dumps(left))
+    assert restored.quantile(0.99) == left.quantile(0.99)
+
+
+def test_ddsketch_bounded_bins() -> None:
+    sketch = DDSketch(max_bins=64)
+    sketch.extend([0.0, 0.0] + [1.5 ** i for i in range(200)])
+    assert len(sketch.bins) == 64
+    assert sketch.quantile(0.0) == 0.0
+    # Upper quantiles keep their guarantee after the lowest bins collapse
+    assert abs(sketch.quantile(1.0) - 1.5 ** 199) <= 0.01 * 1.5 ** 199
+    assert DDSketch().quantile(0.5) != DDSketch().quantile(0.5)
+
+
+def test_ddsketch_as_pane_aggregate() -> None:
+    windows = PaneWindows([tumbling(60)], aggregate=DDSketch)
+    for ts, latency in ((10.0, 100.0), (20.0, 200.0), (70.0, 1000.0)):
+        windows.add("api", ts, latency)
+    windows.advance(120.0)
+    sketch = windows.window("tumbling_60s")["api"]
+    assert sketch.count == 1
+    assert abs(sketch.quantile(0.5) - 1000.0) <= 10.0
+
+
+def test_sketch_merges_bins_computed_elsewhere() -> None:
+    values = [0.0, 1.5, 20.0, 20.0, 300.0]
+    direct = DDSketch()
+    direct.extend(values)
+
+    binned = DDSketch()
+    bins = {}
+    for value in values[1:]:
+        key = math.ceil(math.log(value) / binned.gamma_log)
+        bins[key] = bins.get(key, 0) + 1
+    binned.merge_bins(bins, zero_count=1, total=sum(values), minimum=0.0, maximum=300.0)
+
+    assert (binned.bins, binned.count, binned.zero_count) == (direct.bins, direct.count, direct.zero_count)
+    assert binned.quantile(0.5) == direct.quantile(0.5)
@@ -0,0 +1,54 @@
+import json
+import os
+import pathlib
+
+import pytest
+
+from src.source import DirectoryTailer
+
+
+@pytest.mark.parametrize("use_inotify", [None, False])
+def test_directory_tailer(tmp_path: pathlib.Path, use_inotify: bool | None) -> None:
+    source = tmp_path / "source"
+    source.mkdir(parents=True, exist_ok=True)
+
+    with open(source / "batch_1.json", "w") as file:
+        json.dump([], file)
+
+    with DirectoryTailer(source, use_inotify=use_inotify, interval=0.01) as tailer:
+        assert tailer.poll(timeout=1.0) == [source / "batch_1.json"]
+
+        # Temporary files and other extensions are never handed out
+        for name in ("batch_3.json", "batch_2.json", ".batch_4.json", "notes.txt"):
+            with open(source / name, "w") as file:
+                json.dump([], file)
+
+        files = tailer.poll(timeout=1.0)
+        files += tailer.poll(timeout=0.2)
+        assert sorted(files) == [source / "batch_2.json", source / "batch_3.json"]
+        assert tailer.poll(timeout=0.1) == []
+        cursor = tailer.cursor
+
+    # Resuming from the cursor skips everything already handed out
+    with DirectoryTailer(source, cursor=cursor, interval=0.01) as tailer:
+        assert tailer.poll(timeout=0.1) == []
+
+
+@pytest.mark.parametrize("use_inotify", [None, False])
+def test_directory_tailer_picks_up_moved_in_files(tmp_path: pathlib.Path, use_inotify: bool | None) -> None:
+    source = tmp_path / "source"
+    source.mkdir()
+    with open(source / "batch_1.json", "w") as file:
+        json.dump([], file)
+
+    with DirectoryTailer(source, use_inotify=use_inotify, interval=0.01) as tailer:
+        assert tailer.poll(timeout=1.0) == [source / "batch_1.json"]
+
+        # Written long ago elsewhere, then moved in: its mtime is behind the cursor
+        staged = tmp_path / "batch_0.json"
+        with open(staged, "w") as file:
+            json.dump([], file)
+        os.utime(staged, (1_000_000, 1_000_000))
+        os.rename(staged, source / "batch_0.json")
+
+        assert tailer.poll(timeout=1.0) == [source / "batch_0.json"]
@@ -0,0 +1,21 @@
+from src import status
+from src.batch import EventBatch
+
+
+def test_status_lookup() -> None:
+    assert status.lookup("HTTP Status Code: 200") == 200
+    assert status.lookup("upstream said HTTP Status Code:503 after retry") == 503
+    assert status.lookup("HTTP Status Code: 2001") == status.NO_STATUS
+    assert status.lookup("Database Error") == status.NO_STATUS
+    assert status.is_error(404) and not status.is_error(302)
+
+
+def test_status_extract_batch() -> None:
+    messages = ["HTTP Status Code: 404", "Timeout Error", "HTTP Status Code: 200"]
+    batch = EventBatch.from_events(
+        {"service": "api", "timestamp": 1.0, "message": messages[i % 3]} for i in range(9)
+    )
+    codes = status.extract(batch.message_table, batch.message_ids)
+    assert codes.typecode == "H"
+    assert list(codes) == [404, 0, 200] * 3
+    assert batch.status_codes == codes
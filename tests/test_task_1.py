@@ -3,7 +3,8 @@ import json
 import pathlib
 
 from src import domain
-from src.task_1 import compute
+from src.batch import EventBatch
+from src.task_1 import ServiceMetrics, compute, process_batch
 from src.domain import Result
 
 def test_task_1(tmp_path: pathlib.Path) -> None:
@@ -73,3 +74,52 @@ def test_task_1(tmp_path: pathlib.Path) -> None:
         oldest_considered=basetime + datetime.timedelta(seconds=48),
     )
     
+
+
+def test_task_1_reports_every_service(tmp_path: pathlib.Path) -> None:
+    basetime = datetime.datetime.now().timestamp()
+    events = [
+        {"service": "api", "timestamp": basetime, "message": "HTTP Status Code: 500"},
+        {"service": "api", "timestamp": basetime + 10, "message": "HTTP Status Code: 200"},
+        {"service": "api", "timestamp": basetime + 30, "message": "HTTP Status Code: 200"},
+        {"service": "db", "timestamp": basetime + 5, "message": "HTTP Status Code: 404"},
+        # Late event: weighted by its age, does not rewind the decay
+        {"service": "api", "timestamp": basetime + 20, "message": "HTTP Status Code: 500"},
+    ]
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump(events, file)
+
+    generator = compute(str(tmp_path), half_lives=(10.0,))
+    result = next(generator)
+    generator.close()
+
+    api = result.services["api"]
+    assert api.count == 4
+    assert api.success_rate == 0.5
+    # Gaps of the in-order events: 10s and 20s
+    assert api.mean_interarrival == 15.0
+    assert api.interarrival_variance == 50.0
+    # With a 10s half-life the two recent successes dominate
+    weights = [0.125, 0.25, 1.0, 0.5]
+    successes = [0, 1, 1, 0]
+    expected = sum(w * s for w, s in zip(weights, successes)) / sum(weights)
+    assert abs(api.decayed_success_rate[10.0] - expected) < 1e-9
+
+    assert result.services["db"].count == 1
+    assert result.services["db"].success_rate == 0.0
+    assert result.value == 0.0
+
+
+def test_service_snapshot_is_rebuilt_only_after_changes() -> None:
+    metrics = ServiceMetrics()
+    batch = EventBatch.from_events([{"service": "api", "timestamp": 10.0, "message": "HTTP Status Code: 200"}])
+    process_batch(batch, metrics)
+
+    first = metrics.snapshot()
+    # Nothing was added in between: the same services are reported again
+    assert metrics.snapshot() is first
+    assert "_snapshot" not in metrics.state()
+
+    process_batch(batch, metrics)
+    assert metrics.snapshot()["api"].count == 2
+    assert first["api"].count == 1
@@ -95,4 +95,65 @@ def test_task_2_sliding_window(tmp_path: pathlib.Path) -> None:
         value=1.0, 
         newest_considered=basetime + datetime.timedelta(seconds=155),
         oldest_considered=basetime + datetime.timedelta(seconds=95),
-    )
\ No newline at end of file
+    )
+
+def test_task_2_allowed_lateness(tmp_path: pathlib.Path) -> None:
+    basetime = float(int(datetime.datetime.now().timestamp()) // 3600 * 3600)
+
+    def event(offset: float, code: int) -> dict:
+        return {"service": "monitoring", "timestamp": basetime + offset, "message": f"HTTP Status Code: {code}"}
+
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump([event(100, 500)], file)
+
+    generator = compute(str(tmp_path), allowed_lateness=30)
+    first = next(generator)
+    # The watermark trails the newest event, so that failure is not final yet
+    assert first.value == 0.0
+    assert first.newest_considered.timestamp() == basetime + 70
+
+    with open(tmp_path / "batch_2.json", "w") as file:
+        json.dump([event(80, 500), event(60, 500), event(5, 500), event(110, 200)], file)
+
+    next(generator)
+    second = next(generator)
+    generator.close()
+
+    # 60 is behind the watermark but still inside the window; 5 is before it
+    assert second.value == 2.0
+    assert second.newest_considered.timestamp() == basetime + 80
+    assert second.counters == {"late_events": 2, "dropped_events": 1, "refused_events": 0}
+
+
+def test_task_2_counts_out_of_order_failures_inside_the_window(tmp_path: pathlib.Path) -> None:
+    # Aligned to the hour so the 1-minute panes fall at known offsets
+    basetime = float(int(datetime.datetime.now().timestamp()) // 3600 * 3600)
+
+    def event(offset: float, code: int) -> dict:
+        return {"service": "monitoring", "timestamp": basetime + offset, "message": f"HTTP Status Code: {code}"}
+
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump([event(100, 500)], file)
+
+    generator = compute(str(tmp_path))
+    next(generator)
+    next(generator)
+
+    # An older batch, as the generator produces when it moves timestamps back.
+    # 80 lands in the still open [60, 120) window; 40 would change the
+    # reported [0, 60) one, so only the exact window takes it
+    with open(tmp_path / "batch_2.json", "w") as file:
+        json.dump([event(80, 500), event(40, 500)], file)
+
+    second = next(generator)
+    next(generator)
+
+    with open(tmp_path / "batch_3.json", "w") as file:
+        json.dump([event(130, 200)], file)
+
+    third = next(generator)
+    generator.close()
+
+    assert second.value == 3.0
+    assert second.counters == {"late_events": 2, "dropped_events": 0, "refused_events": 1}
+    assert third.windows["1m"] == {"monitoring": 2.0}
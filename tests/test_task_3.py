@@ -40,4 +40,36 @@ def test_task_3(tmp_path: pathlib.Path) -> None:
     assert result.newest_considered >= basetime
     assert result.oldest_considered <= datetime.datetime.now()
 # ----------------------------------------------
-import datetime 
\ No newline at end of file
+import datetime 
+
+def test_task_3_weighted_without_response_times(tmp_path: pathlib.Path) -> None:
+    events = [
+        {"service": "auth", "timestamp": 1000.0, "message": "HTTP Status Code: 500"},
+        {"service": "auth", "timestamp": 1001.0, "message": "HTTP Status Code: 500"},
+    ]
+    with open(tmp_path / "batch_1.json", "w") as f:
+        json.dump(events, f)
+
+    # Sin response_time_ms cada evento pesa lo mismo, así que igual hay resultado
+    result = next(compute(str(tmp_path), k=10, sampling="weighted"))
+    assert result.value == 500.0
+
+
+def test_task_3_resumes_with_another_sampling(tmp_path: pathlib.Path) -> None:
+    source = tmp_path / "source"
+    source.mkdir()
+    checkpoint_path = str(tmp_path / "task_3.ckpt")
+    with open(source / "batch_1.json", "w") as f:
+        json.dump([{"service": "auth", "timestamp": 1000.0, "message": "HTTP Status Code: 404"}], f)
+
+    generator = compute(str(source), k=10, checkpoint_path=checkpoint_path, checkpoint_interval=0)
+    next(generator)
+    # Al pedir el siguiente resultado se guarda el checkpoint del primer lote
+    with open(source / "batch_2.json", "w") as f:
+        json.dump([{"service": "auth", "timestamp": 1001.0, "message": "HTTP Status Code: 500"}], f)
+    next(generator)
+    generator.close()
+
+    # El reservorio uniforme guardado no se usa en modo "weighted"
+    result = next(compute(str(source), k=10, checkpoint_path=checkpoint_path, sampling="weighted"))
+    assert result.value == 500.0
@@ -2,7 +2,7 @@ import datetime
 import json
 import pathlib
 
-from src import domain
+from src import domain, task_4
 from src.task_4 import compute
 
 
@@ -65,3 +65,17 @@ def test_task_4(tmp_path: pathlib.Path) -> None:
     assert detections >= 3, f"Se esperaban >=3 detecciones, pero hubo {detections}"
 
     print(f"✅ Test completado correctamente: {detections} detecciones encontradas.")
+
+
+def test_task_4_resumes_with_current_interest_list(tmp_path: pathlib.Path, monkeypatch) -> None:
+    checkpoint_path = str(tmp_path / "task_4.ckpt")
+    with open(tmp_path / "batch_1.json", "w") as f:
+        json.dump([{"service": "db", "timestamp": 1000.0, "message": "Database Error"}], f)
+    assert len(list(compute(str(tmp_path), max_batches=1, checkpoint_path=checkpoint_path, checkpoint_interval=0))) == 1
+
+    # Tras actualizar la lista de interés, el filtro retomado la incluye
+    monkeypatch.setattr(task_4, "INTEREST_MESSAGES", task_4.INTEREST_MESSAGES + ["Disk full"])
+    with open(tmp_path / "batch_2.json", "w") as f:
+        json.dump([{"service": "db", "timestamp": 1001.0, "message": "Disk full"}], f)
+    results = list(compute(str(tmp_path), max_batches=2, checkpoint_path=checkpoint_path))
+    assert [result.value for result in results] == [1.0]
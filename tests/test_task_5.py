@@ -0,0 +1,44 @@
+import json
+import pathlib
+
+import pytest
+
+pl = pytest.importorskip("polars")
+
+from src.task_5.task_5 import analyze  # noqa: E402
+
+
+def test_task_5_single_pass_matches_separate_collects(tmp_path: pathlib.Path) -> None:
+    events = [
+        {"service": "training", "timestamp": 1.0, "message": "HTTP Status Code: 200", "response_time_ms": 100.0},
+        {"service": "training", "timestamp": 2.0, "message": "HTTP Status Code: 500", "response_time_ms": 300.0},
+        {"service": "inference", "timestamp": 3.0, "message": "HTTP Status Code: 404"},
+        {"service": "inference", "timestamp": 4.0, "message": "Database Error"},
+    ]
+    with open(tmp_path / "batch_1.json", "w") as file:
+        json.dump(events[:2], file)
+    with open(tmp_path / "batch_2.json", "w") as file:
+        json.dump(events[2:], file)
+
+    single = analyze(str(tmp_path / "*.json"))
+    separate = analyze(str(tmp_path / "*.json"), single_pass=False)
+
+    assert single.errors.equals(separate.errors)
+    assert single.latency.equals(separate.latency)
+    assert single.user_agents.equals(separate.user_agents)
+
+    errors = dict(zip(single.errors["endpoint"], single.errors["tasa_fallos"]))
+    assert errors == {"training": 0.5, "inference": 1.0}
+    latency = dict(zip(single.latency["endpoint"], single.latency["latencia_promedio"]))
+    assert latency == {"training": 200.0, "inference": 150.0}
+    assert dict(zip(single.user_agents["user_agent"], single.user_agents["conteo"])) == {
+        "Python/Client": 2,
+        "Web/Browser": 2,
+    }
+    assert single.seconds > 0 and single.peak_memory_mb > 0
+
+
+def test_task_5_fails_on_an_empty_source(tmp_path: pathlib.Path) -> None:
+    # Reporting an unreadable source as an empty one would hide the failure
+    with pytest.raises(FileNotFoundError):
+        analyze(str(tmp_path / "*.json"))
@@ -0,0 +1,119 @@
+import pytest
+
+from src.window import (
+    PaneWindows,
+    SlidingCounter,
+    Timeline,
+    Watermark,
+    WindowSpec,
+    hopping,
+    pane_width,
+    sliding,
+    tumbling,
+)
+
+
+def test_timeline_buckets_by_pane() -> None:
+    timeline = Timeline(width=10.0)
+    for ts in range(3000):
+        timeline.add(float(ts))
+    # Out of order: appended to the bucket of its pane
+    timeline.add(10.5)
+
+    assert timeline.evict(11.0) == 12
+    assert len(timeline) == 2989
+    assert next(iter(timeline)) == 11.0
+    assert timeline.count(20.0) == 10
+
+    # Whole panes go at once and the partial one is filtered
+    assert timeline.evict(2005.0) == 1994
+    assert timeline.panes[0] == 200
+    assert list(timeline)[:2] == [2005.0, 2006.0]
+
+
+def test_sliding_counter_running_counts() -> None:
+    counter = SlidingCounter(60)
+    counter.add("api", 90.0)
+    counter.add("db", 100.0)
+    counter.advance(100.0)
+    assert (counter.count("api"), counter.count("db"), counter.total) == (1, 1, 2)
+
+    counter.add("api", 120.0)
+    # Behind the window start already: never stored, but counted
+    counter.add("api", 10.0)
+    counter.advance(155.0)
+    assert counter.start == 95.0
+    assert (counter.count("api"), counter.count("db"), counter.total) == (1, 1, 2)
+    assert counter.dropped == 1
+
+    restored = SlidingCounter.from_state(counter.state())
+    assert (restored.count("api"), restored.total, restored.start, restored.dropped) == (1, 2, 95.0, 1)
+
+
+def test_sliding_counter_merges_shards() -> None:
+    first, second = SlidingCounter(60), SlidingCounter(60)
+    for ts in (100.0, 130.0, 101.0):
+        first.add("api", ts)
+    second.add("api", 150.0)
+    second.add("api", 99.0)
+    first.advance(130.0)
+    second.advance(160.0)
+    second.add("api", 10.0)
+
+    first.merge(second)
+    assert first.start == 100.0
+    assert list(first.timelines["api"]) == [100.0, 101.0, 130.0, 150.0]
+    assert (first.count("api", until=130.0), first.total, first.dropped) == (3, 4, 1)
+
+
+def test_pane_windows_share_panes() -> None:
+    specs = [tumbling(60), hopping(120, 60), sliding(30)]
+    assert pane_width(specs) == 30.0
+
+    windows = PaneWindows(specs)
+    for ts in (10.0, 50.0, 70.0, 100.0, 130.0):
+        windows.add("api", ts)
+    windows.add("db", 125.0)
+    windows.advance(130.0)
+
+    # Each spec reports the last window the watermark closed
+    assert windows.bounds("tumbling_60s") == (60.0, 120.0)
+    assert windows.bounds("hopping_120s_60s") == (0.0, 120.0)
+    assert windows.bounds("sliding_30s") == (90.0, 120.0)
+    counts = {name: {key: c.value for key, c in window.items()} for name, window in windows.windows().items()}
+    assert counts == {
+        "tumbling_60s": {"api": 2},
+        "hopping_120s_60s": {"api": 4},
+        "sliding_30s": {"api": 1},
+    }
+
+    # Panes no window can reach are freed, and late events into them refused
+    windows.advance(250.0)
+    assert min(windows.panes) == 2
+    assert not windows.add("api", 30.0)
+
+    restored = PaneWindows(specs)
+    assert restored.restore(windows.state())
+    assert {key: c.value for key, c in restored.window("hopping_120s_60s").items()} == {"api": 1, "db": 1}
+    assert not PaneWindows([tumbling(60)]).restore(windows.state())
+
+
+def test_watermark_counts_late_and_dropped_events() -> None:
+    watermark = Watermark(allowed_lateness=30)
+    watermark.observe(100.0)
+    assert watermark.value == 70.0
+    assert [watermark.admit(ts) for ts in (120.0, 90.0, 70.0, 50.0)] == [True, True, True, False]
+    assert (watermark.late, watermark.dropped) == (2, 1)
+
+    restored = Watermark.from_state(watermark.state())
+    assert (restored.value, restored.late, restored.dropped) == (70.0, 2, 1)
+
+    # Within the horizon behind the watermark an event is still admitted
+    windowed = Watermark(allowed_lateness=30, horizon=60)
+    windowed.observe(100.0)
+    assert [windowed.admit(ts) for ts in (50.0, 10.0, 9.0)] == [True, True, False]
+
+
+def test_pane_windows_reject_misaligned_windows() -> None:
+    with pytest.raises(ValueError):
+        PaneWindows([WindowSpec("odd", 45.0)], width=30.0)